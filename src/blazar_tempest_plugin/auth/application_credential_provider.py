@@ -0,0 +1,64 @@
+from keystoneauth1 import loading
+from tempest.lib.auth import KeystoneV3AuthProvider
+from tempest.lib.auth import KeystoneV3Credentials
+from oslo_log import log as logging
+
+from blazar_tempest_plugin.auth.oidc_provider import get_plugin_auth
+
+
+LOG = logging.getLogger(__name__)
+
+
+class KeystoneV3ApplicationCredentials(KeystoneV3Credentials):
+
+    _EXTRA_ATTRS = [
+        "application_credential_id",
+        "application_credential_name",
+        "application_credential_secret",
+    ]
+
+    ATTRIBUTES = KeystoneV3Credentials.ATTRIBUTES + _EXTRA_ATTRS
+
+    # left out of str(), which tempest puts in logs and exceptions
+    _SECRET_ATTRS = ("password", "application_credential_secret")
+
+    def __str__(self):
+        attrs = [attr for attr in self.ATTRIBUTES if attr not in self._SECRET_ATTRS]
+        return str(dict((attr, getattr(self, attr)) for attr in attrs))
+
+    def is_valid(self):
+        """An id, or a name and its user, with the secret."""
+        if self.application_credential_secret is None:
+            return False
+        if self.application_credential_id is not None:
+            return True
+        return self.application_credential_name is not None and any(
+            [self.user_id is not None, self.username is not None]
+        )
+
+
+class KeystoneV3ApplicationCredentialAuthProvider(KeystoneV3AuthProvider):
+
+    def _get_auth(self):
+        """Acquire a token through keystoneauth1 v3applicationcredential plugin.
+
+        The token is scoped to the application credential's project.
+        """
+        LOG.debug("Authenticating with an application credential to %s",
+                  self.auth_url)
+
+        loader = loading.get_plugin_loader("v3applicationcredential")
+        plugin = loader.load_from_options(
+            auth_url=self.auth_url,
+            application_credential_id=self.credentials.application_credential_id,
+            application_credential_name=self.credentials.application_credential_name,
+            application_credential_secret=(
+                self.credentials.application_credential_secret
+            ),
+            user_id=self.credentials.user_id,
+            username=self.credentials.username,
+            user_domain_id=self.credentials.user_domain_id,
+            user_domain_name=self.credentials.user_domain_name,
+        )
+
+        return get_plugin_auth(self, plugin)
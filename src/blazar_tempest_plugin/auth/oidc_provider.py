@@ -53,35 +53,44 @@ class KeystoneV3OidcAuthProvider(KeystoneV3AuthProvider):
             project_domain_name=self.credentials.project_domain_name,
         )
 
-        ks_sess = session.Session(
-            auth=plugin,
-            verify=not self.dscv,
-            cert=self.ca_certs,
-            timeout=self.http_timeout,
-        )
-
-        token = ks_sess.get_token()
-        auth_ref = plugin.get_access(ks_sess)
-
-        # Flatten it so tempest _fill_credentials() likes it
-        if hasattr(auth_ref, "to_dict"):
-            raw = auth_ref.to_dict()
-        else:
-            raw = auth_ref._data
-
-        t = raw["token"]
-
-        auth_data = {
-            "expires_at": t["expires_at"],
-            "catalog": t.get("catalog", []),
-            "user": t["user"],
-        }
-
-        if "project" in t:
-            auth_data["project"] = t["project"]
-        if "domain" in t:
-            auth_data["domain"] = t["domain"]
-        if "system" in t:
-            auth_data["system"] = t["system"]
-
-        return token, auth_data
+        return get_plugin_auth(self, plugin)
+
+
+def get_plugin_auth(provider, plugin):
+    """Return (token, auth data) of a keystoneauth1 plugin, for a provider.
+
+    The auth data is flattened the way tempest's ``_fill_credentials``
+    expects it.
+    """
+    ks_sess = session.Session(
+        auth=plugin,
+        verify=not provider.dscv,
+        cert=provider.ca_certs,
+        timeout=provider.http_timeout,
+    )
+
+    token = ks_sess.get_token()
+    auth_ref = plugin.get_access(ks_sess)
+
+    # Flatten it so tempest _fill_credentials() likes it
+    if hasattr(auth_ref, "to_dict"):
+        raw = auth_ref.to_dict()
+    else:
+        raw = auth_ref._data
+
+    t = raw["token"]
+
+    auth_data = {
+        "expires_at": t["expires_at"],
+        "catalog": t.get("catalog", []),
+        "user": t["user"],
+    }
+
+    if "project" in t:
+        auth_data["project"] = t["project"]
+    if "domain" in t:
+        auth_data["domain"] = t["domain"]
+    if "system" in t:
+        auth_data["system"] = t["system"]
+
+    return token, auth_data
@@ -0,0 +1,310 @@
+"""Admission of test classes to scarce reservable hardware.
+
+Test classes that reserve hardware right away declare what they need in
+``resource_demand``, e.g. ``{"device:raspberrypi4-64": 1}`` or
+``{"physical:host": 1}``; a key is a reservation resource type, optionally
+followed by a node type (hosts) or machine name (devices). Before such a
+class sets up its resources it is admitted by the AdmissionController,
+which waits while every unit of that hardware is already held by other
+workers on this host. A class that would only have timed out waiting for
+its lease to start queues locally instead.
+
+Capacity comes from the reservation API: the matching resources that are
+not allocated, at this time, to a lease other than the ones created by
+admitted classes, which report them with ``note_lease``. A holder's unit
+is thus counted once, whether or not its lease exists yet. It is
+refreshed every ``refresh_interval`` seconds. Holders are kept in a JSON file per
+resource, locked with ``fcntl.flock`` while it is updated, and holders
+whose process has exited are dropped, so a killed worker does not keep
+its units.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+from datetime import datetime, timezone
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from oslo_log import log as logging
+from tempest.lib import exceptions as lib_exc
+
+from blazar_tempest_plugin.common import exceptions
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_LOCK_DIR = os.path.join(tempfile.gettempdir(), "blazar-tempest-admission")
+
+HOST = "physical:host"
+DEVICE = "device"
+
+
+def parse_demand_key(key):
+    """Split ``"device:raspberrypi4-64"`` into resource type and filter."""
+    for resource_type in (HOST, DEVICE):
+        if key == resource_type:
+            return resource_type, None
+        if key.startswith(resource_type + ":"):
+            return resource_type, key[len(resource_type) + 1:]
+    raise ValueError("Unknown resource demand %r" % key)
+
+
+def _parse_date(value):
+    return datetime.strptime(value[:19].replace("T", " "), "%Y-%m-%d %H:%M:%S")
+
+
+def count_free(resources, allocations, match, now=None, ignore_leases=()):
+    """Count the resources matching ``match`` with no allocation at ``now``.
+
+    ``now`` is a naive UTC datetime, as in blazar's allocation dates.
+    Allocations to the leases in ``ignore_leases`` do not count.
+    """
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+    busy = set()
+    for allocation in allocations:
+        for reservation in allocation.get("reservations", []):
+            if reservation.get("lease_id") in ignore_leases:
+                continue
+            start = _parse_date(reservation["start_date"])
+            end = _parse_date(reservation["end_date"])
+            if start <= now < end:
+                busy.add(str(allocation["resource_id"]))
+                break
+    return sum(
+        1
+        for resource in resources
+        if resource.get("reservable", True)
+        and match(resource)
+        and str(resource["id"]) not in busy
+    )
+
+
+class ApiCapacity(object):
+    """Free reservable hardware, read from the hosts and devices APIs."""
+
+    def __init__(self, hosts_client=None, devices_client=None):
+        self.hosts_client = hosts_client
+        self.devices_client = devices_client
+
+    def __call__(self, key, holder_leases=()):
+        resource_type, name = parse_demand_key(key)
+        if resource_type == HOST:
+            resources = self.hosts_client.list_hosts()["hosts"]
+            allocations = self.hosts_client.list_host_allocations()["allocations"]
+            field = "node_type"
+        else:
+            resources = self.devices_client.list_devices()["devices"]
+            allocations = self.devices_client.list_device_allocations()["allocations"]
+            field = "machine_name"
+        return count_free(
+            resources,
+            allocations,
+            lambda resource: name is None or resource.get(field) == name,
+            ignore_leases=set(holder_leases),
+        )
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class FileSemaphore(object):
+    """Counting semaphore shared by every process using the same path."""
+
+    def __init__(self, path, clock=time.time):
+        self.path = path
+        self.clock = clock
+        # flock only excludes other open files, not threads sharing one
+        self._lock = threading.Lock()
+
+    def _update(self, fn):
+        with self._lock:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                data = os.pread(fd, 1 << 20, 0)
+                state = json.loads(data) if data else {}
+                state.setdefault("holders", {})
+                state["holders"] = {
+                    holder: units
+                    for holder, units in state["holders"].items()
+                    if _pid_alive(int(holder.split(":", 1)[0]))
+                }
+                # holder -> ids of the leases it created
+                state["leases"] = {
+                    holder: leases
+                    for holder, leases in state.get("leases", {}).items()
+                    if holder in state["holders"]
+                }
+                result = fn(state)
+                data = json.dumps(state, sort_keys=True).encode("utf-8")
+                os.ftruncate(fd, 0)
+                os.pwrite(fd, data, 0)
+                return result
+            finally:
+                os.close(fd)
+
+    def try_acquire(self, holder, units, capacity_fn, refresh_interval):
+        """Take ``units`` for ``holder`` if they are free. Returns success.
+
+        ``capacity_fn`` is given the holders' lease ids, whose allocations
+        are left to the holders.
+        """
+
+        def acquire(state):
+            held = sum(state["holders"].values())
+            now = self.clock()
+            if "refreshed" not in state or now - state["refreshed"] >= refresh_interval:
+                holder_leases = sorted(
+                    lease for leases in state["leases"].values() for lease in leases
+                )
+                state["capacity"] = capacity_fn(holder_leases)
+                state["refreshed"] = now
+            # a class is always let in alone, even if it asks for too much,
+            # so it fails on its own rather than waiting forever
+            capacity = state["capacity"]
+            if capacity is None or held == 0 or held + units <= capacity:
+                state["holders"][holder] = state["holders"].get(holder, 0) + units
+                return True
+            return False
+
+        return self._update(acquire)
+
+    def add_lease(self, holder, lease_id):
+        """Record a lease created by ``holder``, if it still holds units."""
+
+        def add(state):
+            if holder in state["holders"]:
+                state["leases"].setdefault(holder, []).append(lease_id)
+
+        self._update(add)
+
+    def release(self, holder):
+        def release(state):
+            state["leases"].pop(holder, None)
+            state["holders"].pop(holder, None)
+
+        self._update(release)
+
+    def holders(self):
+        return self._update(lambda state: dict(state["holders"]))
+
+
+class AdmissionController(object):
+    def __init__(
+        self,
+        capacity,
+        lock_dir=None,
+        poll_interval=10,
+        timeout=3600,
+        refresh_interval=60,
+        clock=time.time,
+        sleep=time.sleep,
+    ):
+        self.capacity = capacity
+        self.lock_dir = lock_dir or DEFAULT_LOCK_DIR
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.refresh_interval = refresh_interval
+        self.clock = clock
+        self.sleep = sleep
+        os.makedirs(self.lock_dir, exist_ok=True)
+
+    def _semaphore(self, key):
+        name = key.replace(":", "_").replace("/", "_")
+        return FileSemaphore(os.path.join(self.lock_dir, name), clock=self.clock)
+
+    def _capacity_of(self, key):
+        def capacity(holder_leases):
+            try:
+                return self.capacity(key, holder_leases)
+            except lib_exc.RestClientException as ex:
+                # e.g. allocations hidden from non-admin users: admit freely
+                LOG.warning("Could not read the capacity of %s: %s", key, ex)
+                return None
+
+        return capacity
+
+    def admit(self, name, demand):
+        """Wait until every resource of ``demand`` can be held by ``name``.
+
+        Resources are taken in sorted order, so two classes with
+        overlapping demands cannot hold one each and wait for the other.
+        Returns the holder id to release, and the seconds spent waiting.
+        """
+        holder = "%d:%s" % (os.getpid(), name)
+        started = self.clock()
+        taken = []
+        try:
+            for key in sorted(demand):
+                semaphore = self._semaphore(key)
+                while not semaphore.try_acquire(
+                    holder, demand[key], self._capacity_of(key), self.refresh_interval
+                ):
+                    waited = self.clock() - started
+                    if waited >= self.timeout:
+                        raise exceptions.AdmissionTimeoutException(
+                            name=name, resource=key, timeout=self.timeout,
+                            holders=", ".join(sorted(semaphore.holders())),
+                        )
+                    LOG.debug("%s waiting for %s, held by %s", name, key,
+                              semaphore.holders())
+                    self.sleep(self.poll_interval)
+                taken.append(key)
+        except BaseException:
+            self.release(holder, taken)
+            raise
+        return holder, self.clock() - started
+
+    def note_lease(self, holder, keys, lease_id):
+        """Record that ``holder`` created a lease for its units of ``keys``."""
+        for key in keys:
+            self._semaphore(key).add_lease(holder, lease_id)
+
+    def release(self, holder, keys):
+        for key in keys:
+            self._semaphore(key).release(holder)
+
+
+def admit_test_class(test_class, clients, **kwargs):
+    """Admit a tempest test class to its ``resource_demand``.
+
+    The units are released by a class resource cleanup. ``kwargs`` are
+    passed to the AdmissionController.
+    """
+    capacity = ApiCapacity(
+        hosts_client=clients.reservation.ReservableHostsClient(),
+        devices_client=clients.reservation.ReservableDevicesClient(),
+    )
+    controller = AdmissionController(capacity, **kwargs)
+    name = "%s.%s" % (test_class.__module__, test_class.__name__)
+    holder, waited = controller.admit(name, test_class.resource_demand)
+    test_class._admission = (controller, holder, list(test_class.resource_demand))
+    test_class.addClassResourceCleanup(
+        controller.release, holder, list(test_class.resource_demand)
+    )
+    if waited >= 1:
+        LOG.info("%s waited %.0f seconds for %s", name, waited, test_class.resource_demand)
+    return waited
+
+
+def note_lease(test_class, lease_id):
+    """Record a lease created by an admitted test class, see admit_test_class."""
+    # not inherited: a subclass is admitted on its own, if at all
+    admitted = test_class.__dict__.get("_admission")
+    if admitted is not None:
+        controller, holder, keys = admitted
+        controller.note_lease(holder, keys, lease_id)
@@ -0,0 +1,30 @@
+"""Track which test is running, so per-test statistics can be recorded.
+
+tempest runs the tests of a worker one after another, so a process-wide
+value is enough. The reservation base test classes set it to the test's id
+in setUp, and to the class's id, from ``class_id``, while the class's
+resources are set up and cleaned up and between its tests, so requests
+made then are not counted against the previous test.
+"""
+
+import threading
+
+_lock = threading.Lock()
+_current_test = None
+
+
+def set_current_test(test_id):
+    global _current_test
+    with _lock:
+        _current_test = test_id
+
+
+def get_current_test():
+    """Return the id of the running test, or None outside of a test."""
+    with _lock:
+        return _current_test
+
+
+def class_id(cls):
+    """Return the id of a test class, as recorded in statistics."""
+    return "%s.%s" % (cls.__module__, cls.__name__)
@@ -6,6 +6,10 @@ class LeaseErrorException(lib_exc.TempestException):
     message = "Lease %(lease_id)s failed to start and is in ERROR status"
 
 
+class LeasesTerminationException(lib_exc.TempestException):
+    message = "%(count)d lease(s) failed to terminate: %(details)s"
+
+
 class NoValidHostWasFoundException(BuildErrorException):
     """Nova scheduler returns a 500 status code when scheduler returns 0 results.
     When blazar is in-play, there are valid reasons to get this result.
@@ -13,3 +17,17 @@ class NoValidHostWasFoundException(BuildErrorException):
 
     status_code = 500
     message = "No valid host was found. There are not enough hosts available"
+
+
+class CircuitOpenException(lib_exc.TempestException):
+    message = (
+        "Not sending request to %(endpoint)s after %(failures)d consecutive "
+        "failures, retrying in %(retry_in).0f seconds"
+    )
+
+
+class AdmissionTimeoutException(lib_exc.TimeoutException):
+    message = (
+        "%(name)s was not admitted to %(resource)s within %(timeout)s seconds, "
+        "held by: %(holders)s"
+    )
@@ -0,0 +1,172 @@
+"""History of test durations, and longest-first scheduling of test classes.
+
+The reservation base test classes record how long each test and each test
+class (fixtures included) took in a SQLite database, ``[reservation]
+duration_history``. Several workers write to the same file, so every
+record is its own short transaction.
+
+``schedule`` uses the history to spread test classes over stestr workers
+longest-processing-time first: classes are taken from the longest to the
+shortest and each goes to the worker with the least work so far. A class
+is never split, so class-level fixtures such as a reserved bare metal
+node are set up once. ``blazar-schedule`` writes the result as an stestr
+``--worker-file``.
+"""
+
+import heapq
+import os
+import re
+import sqlite3
+import statistics
+import threading
+import time
+
+from oslo_log import log as logging
+
+LOG = logging.getLogger(__name__)
+
+# samples per test used for its estimate, newest first
+DEFAULT_WINDOW = 10
+
+TEST = "test"
+CLASS = "class"
+
+_histories = {}
+_histories_lock = threading.Lock()
+
+
+def class_of(test_id):
+    """Return the class id of a test id, dropping attributes like [smoke]."""
+    return test_id.split("[", 1)[0].rsplit(".", 1)[0]
+
+
+class DurationHistory(object):
+    def __init__(self, path, window=DEFAULT_WINDOW):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.window = window
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS durations ("
+                "kind TEXT NOT NULL, id TEXT NOT NULL, duration REAL NOT NULL, "
+                "recorded_at REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS durations_id "
+                "ON durations (kind, id, recorded_at)"
+            )
+
+    def record(self, kind, item_id, duration, recorded_at=None):
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO durations VALUES (?, ?, ?, ?)",
+                (kind, item_id, duration,
+                 time.time() if recorded_at is None else recorded_at),
+            )
+
+    def record_test(self, test_id, duration):
+        self.record(TEST, test_id, duration)
+
+    def record_class(self, class_id, duration):
+        self.record(CLASS, class_id, duration)
+
+    def estimates(self, kind):
+        """Return id -> median of the ``window`` most recent durations."""
+        samples = {}
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, duration FROM durations WHERE kind = ? "
+                "ORDER BY recorded_at DESC",
+                (kind,),
+            )
+            for item_id, duration in rows:
+                values = samples.setdefault(item_id, [])
+                if len(values) < self.window:
+                    values.append(duration)
+        return {item_id: statistics.median(values) for item_id, values in samples.items()}
+
+    def class_estimates(self, test_ids=None, default=None):
+        """Return class id -> expected duration.
+
+        A class's own recorded duration is used when there is one, since it
+        includes its fixtures; otherwise the durations of its tests are
+        added up. Tests never seen count as ``default``, which defaults to
+        the median of the known test durations. Without ``test_ids``, every
+        class in the history is estimated.
+        """
+        tests = self.estimates(TEST)
+        classes = self.estimates(CLASS)
+        if default is None:
+            default = statistics.median(tests.values()) if tests else 60.0
+        estimates = {}
+        if test_ids is None:
+            # every class and test in the history
+            estimates.update(classes)
+            test_ids = tests
+
+        for test_id in test_ids:
+            class_id = class_of(test_id)
+            if class_id in classes:
+                estimates[class_id] = classes[class_id]
+            else:
+                estimates[class_id] = estimates.get(class_id, 0) + tests.get(
+                    test_id, default
+                )
+        return estimates
+
+    def close(self):
+        self._db.close()
+
+
+def get_history(path):
+    """Return the DurationHistory of ``path``, shared within the process."""
+    with _histories_lock:
+        history = _histories.get(path)
+        if history is None:
+            history = _histories[path] = DurationHistory(path)
+        return history
+
+
+def record(path, kind, item_id, duration):
+    """Record a duration in the history at ``path``, if one is configured.
+
+    A history that cannot be written is logged, not raised: it must not
+    fail the test being timed.
+    """
+    if not path:
+        return
+    try:
+        get_history(path).record(kind, item_id, duration)
+    except sqlite3.Error as ex:
+        LOG.warning("Could not record the duration of %s in %s: %s", item_id, path, ex)
+
+
+def schedule(estimates, workers):
+    """Assign classes to workers, longest first, each to the least loaded.
+
+    Returns a list of (expected duration, [class ids]) per worker.
+    """
+    heap = [(0.0, worker, []) for worker in range(workers)]
+    for class_id, duration in sorted(
+        estimates.items(), key=lambda item: (-item[1], item[0])
+    ):
+        load, worker, classes = heapq.heappop(heap)
+        classes.append(class_id)
+        heapq.heappush(heap, (load + duration, worker, classes))
+    return [(load, classes) for load, _, classes in sorted(heap, key=lambda w: w[1])]
+
+
+def worker_file(groups):
+    """Render a schedule as an stestr --worker-file."""
+    lines = []
+    for _, classes in groups:
+        if not classes:
+            continue
+        lines.append("- worker:")
+        for class_id in classes:
+            lines.append("  - '^%s\\.'" % re.escape(class_id).replace("'", "''"))
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,142 @@
+"""Warm pool of ACTIVE flavor leases, shared by scenario tests.
+
+Reserving capacity means creating a lease and waiting for it to start, for
+every test that needs one. With a pool, a test borrows an ACTIVE lease for
+its flavor, boots its own servers on it, and gives it back when its
+cleanups have deleted them; the next test asking for the same flavor
+reuses the lease. Up to ``size`` idle leases are kept per key, which is
+the project, the resource type and the flavor, since servers can only use
+their own project's reservations. With dynamic credentials each test class
+has its own project, and drains its leases when it ends, so leases are
+only shared between classes running with pre-provisioned credentials.
+
+Only the resource types in POOLED_RESOURCE_TYPES are pooled. A bare metal
+node is cleaned by Ironic after its server is deleted, and a server booted
+on it before cleaning is done fails to schedule, so physical:host leases
+are never handed to a second test.
+
+A lease is checked when it is borrowed: one that is no longer ACTIVE is
+dropped, and one ending within ``min_remaining`` seconds is extended with
+update_lease. Leases are deleted by ``drain``, for a project when its
+dynamic credentials go away, and for every project at exit.
+"""
+
+import atexit
+import collections
+import threading
+
+from datetime import datetime, timezone
+
+from oslo_log import log as logging
+from tempest.lib import exceptions as lib_exc
+from tempest.lib.common.utils import test_utils
+
+from blazar_tempest_plugin.common import utils
+from blazar_tempest_plugin.common import waiters
+
+LOG = logging.getLogger(__name__)
+
+# resource types whose leases can be reused as soon as their servers are gone
+POOLED_RESOURCE_TYPES = ("flavor:instance",)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _end_date(lease):
+    return datetime.fromisoformat(lease["end_date"]).replace(tzinfo=None)
+
+
+class LeasePool(object):
+    def __init__(self, size=1, min_remaining=1800, duration=3600, now=_utcnow):
+        self.size = size
+        self.min_remaining = min_remaining
+        self.duration = duration
+        self.now = now
+        self._lock = threading.Lock()
+        # key -> [(lease, leases_client)], idle leases
+        self._idle = collections.defaultdict(list)
+        # lease id -> (key, leases_client), borrowed leases
+        self._borrowed = {}
+
+    def borrow(self, key, leases_client, create):
+        """Return an ACTIVE lease for ``key``, from the pool or ``create()``.
+
+        ``create`` makes a new lease and waits for it to start. The lease
+        must be given back, with give_back, once its servers are deleted.
+        """
+        while True:
+            with self._lock:
+                idle = self._idle[key]
+                entry = idle.pop() if idle else None
+            if entry is None:
+                lease = create()
+                break
+            lease, client = entry
+            try:
+                lease = self._refresh(client, lease)
+                break
+            except lib_exc.RestClientException as ex:
+                LOG.info("Dropping pooled lease %s: %s", lease["id"], ex)
+                self._delete(client, [lease["id"]])
+
+        with self._lock:
+            self._borrowed[lease["id"]] = (key, leases_client)
+        return lease
+
+    def _refresh(self, client, lease):
+        lease = client.show_lease(lease["id"])["lease"]
+        if lease["status"] != "ACTIVE":
+            raise lib_exc.Conflict("lease is %s" % lease["status"])
+        remaining = (_end_date(lease) - self.now()).total_seconds()
+        if remaining < self.min_remaining:
+            end_date = utils.time_offset_to_blazar_string(seconds=self.duration)
+            LOG.info("Extending pooled lease %s to %s", lease["id"], end_date)
+            lease = client.update_lease(lease["id"], end_date=end_date)["lease"]
+        return lease
+
+    def give_back(self, lease_id):
+        """Return a borrowed lease, keeping it if its key has room."""
+        with self._lock:
+            key, client = self._borrowed.pop(lease_id)
+            idle = self._idle[key]
+            if len(idle) < self.size:
+                idle.append(({"id": lease_id}, client))
+                return
+        self._delete(client, [lease_id])
+
+    def drain(self, project_id=None):
+        """Delete the pooled leases of a project, or of every project."""
+        by_client = collections.defaultdict(list)
+        with self._lock:
+            for key, idle in self._idle.items():
+                if project_id is None or key[0] == project_id:
+                    for lease, client in idle:
+                        by_client[client].append(lease["id"])
+                    idle[:] = []
+            for lease_id, (key, client) in list(self._borrowed.items()):
+                if project_id is None or key[0] == project_id:
+                    by_client[client].append(lease_id)
+                    del self._borrowed[lease_id]
+        for client, lease_ids in by_client.items():
+            self._delete(client, lease_ids)
+
+    def _delete(self, client, lease_ids):
+        for lease_id in lease_ids:
+            test_utils.call_and_ignore_notfound_exc(client.delete_lease, lease_id)
+        waiters.wait_for_leases_termination(client, lease_ids, ignore_error=True)
+
+
+def get_lease_pool(size=1, min_remaining=1800, duration=3600):
+    """Return the lease pool of this process, created on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = LeasePool(size, min_remaining=min_remaining, duration=duration)
+            atexit.register(_pool.drain)
+        return _pool
+
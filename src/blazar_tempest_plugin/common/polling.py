@@ -0,0 +1,113 @@
+"""Polling schedules for waiting on leases."""
+
+import random
+import time
+
+from datetime import datetime, timezone
+
+from tempest import config
+
+CONF = config.CONF
+
+# target status -> lease date at which blazar moves the lease into it
+TRANSITION_DATES = {
+    "ACTIVE": "start_date",
+    "TERMINATING": "end_date",
+    "TERMINATED": "end_date",
+}
+
+
+def parse_lease_date(date_string):
+    """Parse a blazar lease date into a unix timestamp, assuming UTC."""
+    if not date_string:
+        return None
+    parsed = datetime.fromisoformat(date_string)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class LeasePollSchedule(object):
+    """Decide how long to sleep between polls of a lease.
+
+    The lease's own ``start_date``/``end_date`` tell us when blazar is
+    expected to move it into the target status. Until shortly before that
+    time there is nothing to see, so we sleep straight through. Around the
+    transition (allowing for the manager's event loop lag) we poll every
+    ``min_interval``. Outside of that window, or when no transition date is
+    known, we back off exponentially up to ``max_interval``, with jitter so
+    that many waiters don't poll in lockstep.
+    """
+
+    def __init__(
+        self,
+        lease,
+        status,
+        min_interval=None,
+        max_interval=None,
+        lead_time=None,
+        transition_window=None,
+        jitter=0.25,
+        clock=time.time,
+    ):
+        if isinstance(status, str):
+            status = [status]
+
+        if min_interval is None:
+            min_interval = CONF.reservation.lease_poll_min_interval
+        if max_interval is None:
+            max_interval = CONF.reservation.lease_poll_max_interval
+        if lead_time is None:
+            lead_time = CONF.reservation.lease_poll_lead_time
+        if transition_window is None:
+            transition_window = CONF.reservation.lease_poll_transition_window
+
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.lead_time = lead_time
+        self.transition_window = transition_window
+        self.jitter = jitter
+        self.clock = clock
+
+        self.transitions = sorted(
+            t
+            for t in (
+                parse_lease_date(lease.get(TRANSITION_DATES[s]))
+                for s in status
+                if s in TRANSITION_DATES
+            )
+            if t is not None
+        )
+        self._backoff_attempt = 0
+
+    def next_transition(self):
+        """Return the next transition time we still expect to observe."""
+        now = self.clock()
+        for transition in self.transitions:
+            if now < transition + self.transition_window:
+                return transition
+        return None
+
+    def next_interval(self):
+        """Return the number of seconds to sleep before the next poll."""
+        now = self.clock()
+        transition = self.next_transition()
+
+        if transition is not None:
+            until = transition - now
+            if until > self.lead_time:
+                # sleep until shortly before the expected transition
+                self._backoff_attempt = 0
+                return until - self.lead_time
+            # poll tightly around the transition
+            self._backoff_attempt = 0
+            return self.min_interval
+
+        return self._backoff()
+
+    def _backoff(self):
+        delay = min(
+            self.max_interval, self.min_interval * (2**self._backoff_attempt)
+        )
+        self._backoff_attempt += 1
+        return random.uniform(delay * (1 - self.jitter), delay)
@@ -0,0 +1,173 @@
+"""Run many shell checks on a server in one SSH command.
+
+Image tests check a server with a series of commands, each its own SSH
+exec, and poll for files with one exec per second. ``run_checks`` sends
+them all as one generated bash script instead, and returns a CheckResult
+per check: its exit code, combined stdout and stderr, and duration. The
+checks run in order, each in a subshell, so one failing or calling
+``exit`` does not stop the others.
+
+Waits happen on the server too: ``wait_for_file`` blocks on inotify, or
+a short local loop, until a path appears, and ``wait_for_command`` bounds
+a command that blocks until something is done. ``wait`` runs one of them
+in a single exec and reports how long it took.
+"""
+
+import base64
+import os
+import shlex
+
+from oslo_log import log as logging
+
+from blazar_tempest_plugin.common import tracing
+
+LOG = logging.getLogger(__name__)
+
+_RUNNER = """\
+run_check() {
+    local out start end rc
+    out=$(mktemp)
+    start=$(date +%%s.%%N)
+    ( "check_$1" ) >"$out" 2>&1 </dev/null
+    rc=$?
+    end=$(date +%%s.%%N)
+    echo "%(marker)s $1 $rc $start $end $(base64 -w0 <"$out")"
+    rm -f "$out"
+}
+"""
+
+
+class Check(object):
+    """A named shell snippet, passing when it exits with 0.
+
+    A ``blocking`` check waits for something on the server, and is better
+    run on its own with ``wait`` so it cannot time out a whole batch.
+    """
+
+    def __init__(self, name, command, blocking=False):
+        self.name = name
+        self.command = command
+        self.blocking = blocking
+
+    def __repr__(self):
+        return "Check(%r)" % self.name
+
+
+class CheckResult(object):
+    def __init__(self, name, exit_code, stdout, duration):
+        self.name = name
+        self.exit_code = exit_code
+        self.stdout = stdout
+        self.duration = duration
+
+    @property
+    def ok(self):
+        return self.exit_code == 0
+
+    def __repr__(self):
+        return "CheckResult(%r, exit_code=%r, duration=%r)" % (
+            self.name, self.exit_code, self.duration)
+
+
+def wait_for_file(path, timeout=30, interval=0.2):
+    """Return a command waiting on the server for the file ``path`` to exist.
+
+    It blocks in inotifywait on the path's directory when inotify-tools is
+    installed, waking up at least every second in case the file appeared
+    before the watch was set, and otherwise checks every ``interval``
+    seconds. It exits with 0 as soon as the file exists, and 1 after
+    ``timeout`` seconds.
+    """
+    path = shlex.quote(path)
+    return (
+        f"deadline=$((SECONDS + {int(timeout)})); "
+        f"until test -f {path}; do "
+        f"[ $SECONDS -lt $deadline ] || exit 1; "
+        f"if command -v inotifywait >/dev/null 2>&1; then "
+        f"inotifywait -qq -t 1 -e create -e moved_to \"$(dirname {path})\" "
+        f">/dev/null 2>&1 || sleep {interval}; "
+        f"else sleep {interval}; fi; "
+        f"done"
+    )
+
+
+def wait_for_command(command, timeout=300):
+    """Return ``command`` stopped after ``timeout`` seconds, exiting with 124.
+
+    For commands that block until something is done on the server, e.g.
+    ``cloud-init status --wait``. ``timeout`` must be shorter than the
+    remote client's SSH timeout, or that fires first and 124 is never seen.
+    """
+    return f"timeout {int(timeout)} {command}"
+
+
+def build_script(checks, marker):
+    """Generate the bash script running ``checks``.
+
+    Each check prints one line: the marker, its index, exit code, start
+    and end times, and its base64 encoded output.
+    """
+    lines = [_RUNNER % {"marker": marker}]
+    for index, check in enumerate(checks):
+        lines.append("check_%d() {\n%s\n}" % (index, check.command))
+    for index in range(len(checks)):
+        lines.append("run_check %d" % index)
+    lines.append("exit 0")
+    return "\n".join(lines) + "\n"
+
+
+def parse_output(output, checks, marker):
+    """Return check name -> CheckResult, for the checks that reported."""
+    results = {}
+    for line in output.splitlines():
+        if not line.startswith(marker + " "):
+            continue
+        fields = line[len(marker) + 1:].split(" ", 4)
+        index, exit_code, start, end = fields[:4]
+        encoded = fields[4] if len(fields) > 4 else ""
+        check = checks[int(index)]
+        try:
+            duration = float(end) - float(start)
+        except ValueError:
+            # a date without %N
+            duration = None
+        results[check.name] = CheckResult(
+            check.name,
+            int(exit_code),
+            base64.b64decode(encoded).decode("utf-8", "replace"),
+            duration,
+        )
+    return results
+
+
+@tracing.traced("remote_checks")
+def run_checks(remote, checks):
+    """Run ``checks`` over one exec of a tempest RemoteClient.
+
+    Returns check name -> CheckResult. A check missing from the result
+    did not get to run, e.g. because the SSH command timed out.
+    """
+    if not checks:
+        return {}
+    marker = "check-result-" + os.urandom(8).hex()
+    script = base64.b64encode(build_script(checks, marker).encode("utf-8"))
+    output = remote.exec_command(
+        "echo %s | base64 -d | bash" % script.decode("ascii")
+    )
+    results = parse_output(output, checks, marker)
+    LOG.debug("Remote checks: %s", sorted(results.values(), key=lambda r: r.name))
+    return results
+
+
+def wait(remote, name, command):
+    """Run one wait command, e.g. from ``wait_for_file``, in one exec.
+
+    Returns its CheckResult, whose duration is how long the wait took.
+    The command must finish within the remote client's SSH timeout.
+    """
+    result = run_checks(remote, [Check(name, command)]).get(name)
+    if result is None:
+        result = CheckResult(name, None, "", None)
+    LOG.info("Waited %s for %s on the server: %s", result.duration, name,
+             "done" if result.ok else "exit code %s" % result.exit_code)
+    return result
@@ -0,0 +1,208 @@
+"""Reuse one authenticated SSH transport per server.
+
+tempest's SSH client connects, authenticates and disconnects for every
+command, and remote clients are often created again for the same server.
+On a far away site the handshake costs more than most commands. A
+CachedSSHClient takes its connection from the process-wide
+ConnectionCache instead, keyed by host, port, user and key, and opens a
+new channel on it per command.
+
+A cached transport that died, e.g. because its server rebooted or was
+rebuilt, is replaced by a new connection before a channel is opened on
+it; a channel that fails to open on a transport that looked alive is
+retried once on a new one, and opening a channel times out after the
+client's channel_timeout rather than paramiko's hour. Keepalives are sent
+so dead peers are noticed between commands. Connections to a server must
+be discarded when it is deleted, since its floating IP can be given to
+the next server. Handshakes and reused connections are counted, logged
+and summarized when the process exits.
+"""
+
+import atexit
+import collections
+import hashlib
+import socket
+import threading
+
+from oslo_log import log as logging
+from tempest.lib.common import ssh
+
+try:
+    import paramiko
+except ImportError:
+    paramiko = None
+
+LOG = logging.getLogger(__name__)
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _connection_errors():
+    errors = (EOFError, socket.error)
+    if paramiko is not None:
+        errors += (paramiko.SSHException,)
+    return errors
+
+
+def cache_key(client):
+    """Return the key of a tempest ssh.Client's connection."""
+    if client.pkey is not None:
+        credential = "key:" + hashlib.sha256(client.pkey.asbytes()).hexdigest()
+    elif client.key_filename:
+        credential = "file:%s" % (client.key_filename,)
+    else:
+        password = (client.password or "").encode("utf-8")
+        credential = "password:" + hashlib.sha256(password).hexdigest()
+    return (client.host, client.port, client.username, credential)
+
+
+class ConnectionCache(object):
+    def __init__(self, keepalive_interval=30):
+        self.keepalive_interval = keepalive_interval
+        self._lock = threading.Lock()
+        # key -> paramiko.SSHClient
+        self._connections = {}
+        # key -> lock held while connecting, so one handshake is made per key
+        self._connecting = collections.defaultdict(threading.Lock)
+        self.handshakes = 0
+        self.reconnects = 0
+        self.reuses = 0
+
+    def get(self, client, connect, stale=None):
+        """Return the live connection of ``client``, or make it with ``connect``.
+
+        ``stale`` is a connection known to be dead, replaced even if its
+        transport still looks active.
+        """
+        key = cache_key(client)
+        with self._lock:
+            connecting = self._connecting[key]
+        with connecting:
+            with self._lock:
+                connection = self._connections.get(key)
+            if connection is not None and connection is not stale and _is_alive(connection):
+                with self._lock:
+                    self.reuses += 1
+                LOG.debug("Reusing ssh connection to %s@%s", client.username, client.host)
+                return connection
+
+            replaced = connection is not None
+            if replaced:
+                connection.close()
+            connection = connect()
+            if self.keepalive_interval:
+                connection.get_transport().set_keepalive(self.keepalive_interval)
+            with self._lock:
+                self._connections[key] = connection
+                self.handshakes += 1
+                self.reconnects += replaced
+                handshakes = self.handshakes
+            LOG.info(
+                "ssh handshake with %s@%s (%d in this process)",
+                client.username, client.host, handshakes,
+            )
+            return connection
+
+    def discard(self, host):
+        """Close the connections to ``host``, e.g. once it was rebuilt."""
+        with self._lock:
+            keys = [key for key in self._connections if key[0] == host]
+            connections = [self._connections.pop(key) for key in keys]
+        for connection in connections:
+            connection.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "connections": len(self._connections),
+                "handshakes": self.handshakes,
+                "reconnects": self.reconnects,
+                "reuses": self.reuses,
+            }
+
+    def close(self):
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+        for connection in connections:
+            connection.close()
+
+
+def _is_alive(connection):
+    transport = connection.get_transport()
+    return transport is not None and transport.is_active()
+
+
+def get_connection_cache(keepalive_interval=30):
+    """Return the connection cache of this process, created on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ConnectionCache(keepalive_interval)
+            atexit.register(_close_cache, _cache)
+        return _cache
+
+
+def _close_cache(cache):
+    stats = cache.stats()
+    if stats["handshakes"]:
+        LOG.info(
+            "ssh connections: %(handshakes)d handshakes, %(reconnects)d "
+            "reconnects, %(reuses)d reused", stats,
+        )
+    cache.close()
+
+
+class _SharedConnection(object):
+    """A cached paramiko.SSHClient that its borrower cannot close."""
+
+    def __init__(self, client, connection):
+        self._client = client
+        self._connection = connection
+
+    def get_transport(self):
+        return _SharedTransport(self._client, self._connection)
+
+    def close(self):
+        pass
+
+
+class _SharedTransport(object):
+    def __init__(self, client, connection):
+        self._client = client
+        self._connection = connection
+
+    def open_session(self, *args, **kwargs):
+        kwargs.setdefault("timeout", self._client.channel_timeout)
+        try:
+            return self._connection.get_transport().open_session(*args, **kwargs)
+        except _connection_errors() as ex:
+            # nothing was sent yet, so it is safe to retry on a new connection
+            LOG.info("ssh connection to %s is dead (%s), reconnecting",
+                     self._client.host, ex)
+            self._connection = self._client._cached_connection(stale=self._connection)
+            return self._connection.get_transport().open_session(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._connection.get_transport(), name)
+
+
+class CachedSSHClient(ssh.Client):
+    """tempest's ssh.Client, sharing its connection through a ConnectionCache."""
+
+    cache = None
+
+    @classmethod
+    def from_client(cls, client, cache):
+        """Wrap a tempest ssh.Client, e.g. the one of a RemoteClient."""
+        cached = cls.__new__(cls)
+        cached.__dict__.update(client.__dict__)
+        cached.cache = cache
+        return cached
+
+    def _cached_connection(self, stale=None):
+        return self.cache.get(self, super()._get_ssh_connection, stale=stale)
+
+    def _get_ssh_connection(self, sleep=1.5, backoff=1):
+        return _SharedConnection(self, self._cached_connection())
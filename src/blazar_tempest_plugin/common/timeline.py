@@ -0,0 +1,281 @@
+"""Timelines of the provisioning phases of scenario tests.
+
+A scenario test waiting for a reserved server to become SSHABLE only shows
+the total time. The Timeline records when each step of the way happened:
+the lease becoming ACTIVE, the server's BUILD task state transitions, its
+port becoming ACTIVE, the floating IP association, the first accepted TCP
+connection to port 22 and the SSH login. PHASES turns those events into
+durations, which are logged per test, appended to ``[reservation]
+timeline_file`` and summarized per worker when it exits.
+
+``blazar-timeline FILE`` summarizes the file written by a whole run.
+"""
+
+import atexit
+import json
+import os
+import socket
+import statistics
+import threading
+import time
+
+from oslo_log import log as logging
+from tempest.lib import exceptions as lib_exc
+
+LOG = logging.getLogger(__name__)
+
+# phase -> (start event, end event)
+PHASES = (
+    ("lease_activation", "lease_created", "lease_active"),
+    ("scheduling", "server_created", "server_spawning"),
+    ("deploy", "server_spawning", "server_active"),
+    ("port_activation", "server_created", "port_active"),
+    ("floating_ip_association", "server_active", "floating_ip_associated"),
+    ("ssh_port_open", "server_active", "ssh_port_open"),
+    ("ssh_login", "ssh_port_open", "ssh_login"),
+    ("server_provisioning", "server_created", "ssh_login"),
+)
+
+# phase durations of the tests run by this process, for the exit summary
+_finished = []
+_finished_lock = threading.Lock()
+
+
+class Timeline(object):
+    """Timestamps of the provisioning events of one test."""
+
+    def __init__(self, test_id, clock=time.time):
+        self.test_id = test_id
+        self.clock = clock
+        self.events = []
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def mark(self, event, at=None, **details):
+        """Record an event, unless it was already recorded.
+
+        Only the first occurrence counts: a second server or a reconnect
+        does not move the phase boundaries of the first one.
+        """
+        with self._lock:
+            if event in self._seen:
+                return False
+            self._seen.add(event)
+            self.events.append(
+                {"event": event, "time": self.clock() if at is None else at,
+                 "details": details}
+            )
+            return True
+
+    def note(self, event, **details):
+        """Record an event that may happen several times, e.g. a transition."""
+        with self._lock:
+            self.events.append({"event": event, "time": self.clock(), "details": details})
+
+    def time_of(self, event):
+        for item in self.events:
+            if item["event"] == event:
+                return item["time"]
+        return None
+
+    def phases(self):
+        """Return phase -> duration in seconds, for the phases seen."""
+        durations = {}
+        for phase, start, end in PHASES:
+            start_time, end_time = self.time_of(start), self.time_of(end)
+            if start_time is not None and end_time is not None:
+                durations[phase] = max(0, end_time - start_time)
+        return durations
+
+    def to_dict(self):
+        return {
+            "test_id": self.test_id,
+            "events": sorted(self.events, key=lambda item: item["time"]),
+            "phases": self.phases(),
+        }
+
+    def finish(self, path=None):
+        """Log the phase durations and append the timeline to ``path``."""
+        if not self.events:
+            return
+        record = self.to_dict()
+        if record["phases"]:
+            LOG.info(
+                "Provisioning phases of %s: %s",
+                self.test_id,
+                ", ".join("%s=%.1fs" % item for item in record["phases"].items()),
+            )
+        with _finished_lock:
+            _finished.append(record)
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            line = (json.dumps(record, sort_keys=True) + "\n").encode("utf-8")
+            # one O_APPEND write per line, so several workers can share a file
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+
+
+def load(path):
+    """Read the timelines appended to a timeline file."""
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def summarize(records):
+    """Return phase -> count, mean, median and max duration, and the slowest test."""
+    by_phase = {}
+    for record in records:
+        for phase, duration in record["phases"].items():
+            by_phase.setdefault(phase, []).append((duration, record["test_id"]))
+
+    summary = {}
+    order = [phase for phase, _, _ in PHASES]
+    for phase in sorted(by_phase, key=lambda p: order.index(p) if p in order else len(order)):
+        values = sorted(by_phase[phase])
+        durations = [duration for duration, _ in values]
+        summary[phase] = {
+            "count": len(durations),
+            "mean": sum(durations) / len(durations),
+            "median": statistics.median(durations),
+            "max": durations[-1],
+            "slowest_test": values[-1][1],
+        }
+    return summary
+
+
+def format_summary(summary):
+    lines = ["%-24s %6s %9s %9s %9s  %s" % (
+        "phase", "count", "mean", "median", "max", "slowest test")]
+    for phase, stats in summary.items():
+        lines.append("%-24s %6d %8.1fs %8.1fs %8.1fs  %s" % (
+            phase, stats["count"], stats["mean"], stats["median"], stats["max"],
+            stats["slowest_test"]))
+    return "\n".join(lines)
+
+
+@atexit.register
+def _log_summary():
+    with _finished_lock:
+        records = list(_finished)
+    summary = summarize(records)
+    if summary:
+        LOG.info("Provisioning phases of this worker:\n%s", format_summary(summary))
+
+
+class ProvisioningObserver(object):
+    """Watch a server being provisioned, from a background thread.
+
+    Tests keep calling tempest's create_server, which blocks until the
+    server is SSHABLE; the observer finds the server by name and records
+    its transitions on the timeline as they are seen. It only reads, so
+    it does not change how the server is provisioned.
+    """
+
+    def __init__(self, timeline, clients, server_name, interval=2, ssh_port=22):
+        self.timeline = timeline
+        self.servers_client = clients.servers_client
+        self.ports_client = clients.ports_client
+        self.floating_ips_client = clients.floating_ips_client
+        self.server_name = server_name
+        self.interval = interval
+        self.ssh_port = ssh_port
+        self._stop = threading.Event()
+        self._thread = None
+        self._server_id = None
+        self._state = None
+        self._port_ids = []
+        self._floating_ip = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if self.poll():
+                    return
+            except (lib_exc.RestClientException, OSError) as ex:
+                # observing must never fail the test
+                LOG.debug("Provisioning observer poll failed: %s", ex)
+            self._stop.wait(self.interval)
+
+    def poll(self):
+        """Look at the server once. Return True when there is nothing left to see."""
+        if self._server_id is None:
+            servers = self.servers_client.list_servers(name=self.server_name)["servers"]
+            if not servers:
+                return False
+            self._server_id = servers[0]["id"]
+
+        if self.timeline.time_of("server_active") is None:
+            server = self.servers_client.show_server(self._server_id)["server"]
+            self.observe_server(server)
+
+        if self.timeline.time_of("port_active") is None:
+            ports = self.ports_client.list_ports(device_id=self._server_id)["ports"]
+            self._port_ids = [port["id"] for port in ports]
+            if ports and all(port["status"] == "ACTIVE" for port in ports):
+                self.timeline.mark("port_active")
+
+        if self._floating_ip is None:
+            for port_id in self._port_ids:
+                fips = self.floating_ips_client.list_floatingips(port_id=port_id)
+                for fip in fips["floatingips"]:
+                    self._floating_ip = fip["floating_ip_address"]
+                    self.timeline.mark(
+                        "floating_ip_associated", address=self._floating_ip
+                    )
+                    break
+
+        if self._floating_ip is not None and self.timeline.time_of("ssh_port_open") is None:
+            try:
+                with socket.create_connection(
+                    (self._floating_ip, self.ssh_port), timeout=min(self.interval, 5)
+                ):
+                    self.timeline.mark("ssh_port_open")
+            except OSError:
+                pass
+
+        return all(
+            self.timeline.time_of(event) is not None
+            for event in ("server_active", "port_active", "ssh_port_open")
+        )
+
+    def observe_server(self, server):
+        status = server.get("status")
+        task = server.get("OS-EXT-STS:task_state")
+        if (status, task) == self._state:
+            return
+        self._state = (status, task)
+        record_server_state(self.timeline, server)
+
+
+def record_server_state(timeline, server):
+    """Record a server status or task state transition on a timeline."""
+    status = server.get("status")
+    task = server.get("OS-EXT-STS:task_state")
+    timeline.note("server_state", status=status, task_state=task)
+    if status == "BUILD" and task == "spawning":
+        timeline.mark("server_spawning")
+    elif status == "ACTIVE":
+        timeline.mark("server_active")
+    elif status == "ERROR":
+        timeline.mark("server_error", fault=server.get("fault"))
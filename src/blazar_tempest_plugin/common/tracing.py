@@ -0,0 +1,247 @@
+"""Lightweight tracing of reservation API calls and waits.
+
+Spans are written to a local file, one JSON document per line, either as
+flat span records (``jsonl``) or as OTLP/JSON ``ExportTraceServiceRequest``
+documents (``otlp``) that an OpenTelemetry collector can ingest with its
+file receiver. Every span of a test shares a trace id derived from the
+test id, so a test's requests and waits can be pulled out together and
+joined to server side logs through ``x-openstack-request-id``.
+
+Tracing is off until ``configure`` is called, which the reservation
+clients do when ``[reservation] trace_file`` is set. Until then ``span``
+costs a function call.
+"""
+
+import contextlib
+import contextvars
+import functools
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+
+from blazar_tempest_plugin.common import context
+
+FORMATS = ("jsonl", "otlp")
+
+# OTLP span kinds
+KIND_INTERNAL = 1
+KIND_CLIENT = 3
+
+_current_span = contextvars.ContextVar("blazar_tracing_span", default=None)
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+class _FileExporter(object):
+    def __init__(self, path, fmt="jsonl"):
+        if fmt not in FORMATS:
+            raise ValueError("Unknown trace format %r" % fmt)
+        self.path = path
+        self.format = fmt
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, span):
+        record = span.to_otlp() if self.format == "otlp" else span.to_dict()
+        line = (json.dumps(record, sort_keys=True) + "\n").encode("utf-8")
+        # one O_APPEND write per line, so several workers can share a file
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+
+
+def configure(path, fmt="jsonl"):
+    """Write spans to ``path``, or stop tracing if path is None."""
+    global _exporter
+    with _exporter_lock:
+        if path is None:
+            _exporter = None
+        elif (
+            _exporter is None
+            or _exporter.path != path
+            or _exporter.format != fmt
+        ):
+            _exporter = _FileExporter(path, fmt)
+
+
+def is_enabled():
+    return _exporter is not None
+
+
+def trace_id_for(test_id):
+    """Return the trace id shared by every span of a test."""
+    return hashlib.sha256(str(test_id).encode("utf-8")).hexdigest()[:32]
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Span(object):
+    def __init__(self, name, kind=KIND_INTERNAL, parent=None, attributes=None):
+        self.name = name
+        self.kind = kind
+        self.test_id = context.get_current_test()
+        self.trace_id = parent.trace_id if parent else trace_id_for(self.test_id)
+        self.span_id = os.urandom(8).hex()
+        self.parent_span_id = parent.span_id if parent else None
+        self.attributes = dict(attributes or {})
+        self.error = None
+        self.start_time = time.time_ns()
+        self.end_time = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def add(self, name, value=1):
+        """Add to a numeric attribute, e.g. a poll counter."""
+        self.attributes[name] = self.attributes.get(name, 0) + value
+
+    @property
+    def duration(self):
+        end = self.end_time or time.time_ns()
+        return (end - self.start_time) / 1e9
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "name": self.name,
+            "kind": "client" if self.kind == KIND_CLIENT else "internal",
+            "test_id": self.test_id,
+            "start_time_unix_nano": self.start_time,
+            "end_time_unix_nano": self.end_time,
+            "duration": self.duration,
+            "status": "ERROR" if self.error else "OK",
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+    def to_otlp(self):
+        attributes = dict(self.attributes)
+        if self.test_id is not None:
+            attributes["test.id"] = self.test_id
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_time),
+            "endTimeUnixNano": str(self.end_time),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in sorted(attributes.items())
+                if value is not None
+            ],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {"key": "service.name",
+                             "value": {"stringValue": "blazar-tempest-plugin"}},
+                            {"key": "process.pid", "value": {"intValue": str(os.getpid())}},
+                        ]
+                    },
+                    "scopeSpans": [
+                        {"scope": {"name": "blazar_tempest_plugin"}, "spans": [span]}
+                    ],
+                }
+            ]
+        }
+
+
+class _NoopSpan(object):
+    def set(self, **attributes):
+        pass
+
+    def add(self, name, value=1):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+@contextlib.contextmanager
+def span(name, kind=KIND_INTERNAL, **attributes):
+    """Record the enclosed block as a span, nested under the current one.
+
+    Yields the span, so attributes known only later can be ``set``. An
+    exception escaping the block marks the span as failed.
+    """
+    exporter = _exporter
+    if exporter is None:
+        yield _NOOP_SPAN
+        return
+
+    current = Span(name, kind=kind, parent=_current_span.get(), attributes=attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as ex:
+        current.error = "%s: %s" % (type(ex).__name__, ex)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end_time = time.time_ns()
+        exporter.export(current)
+
+
+def add(name, value=1):
+    """Add to a numeric attribute of the current span, if any."""
+    current = _current_span.get()
+    if current is not None:
+        current.add(name, value)
+
+
+def sleep(seconds):
+    """time.sleep, counted as ``sleep_time`` and ``sleeps`` on the current span."""
+    add("sleep_time", seconds)
+    add("sleeps")
+    time.sleep(seconds)
+
+
+def traced(name=None, *arg_names):
+    """Decorate a function to run in a span, recording some arguments.
+
+    ``arg_names`` are parameters of the function whose values are added as
+    span attributes, e.g. ``@traced("wait", "lease_id")``.
+    """
+
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _exporter is None:
+                return fn(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            attributes = {
+                arg: str(bound.arguments[arg])
+                for arg in arg_names
+                if arg in bound.arguments
+            }
+            with span(name or fn.__name__, **attributes):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -8,6 +8,8 @@ from typing import Optional
 from tempest import config
 from tempest.lib import exceptions
 
+from blazar_tempest_plugin.common import remote_checks
+
 CONF = config.CONF
 
 
@@ -33,15 +35,18 @@ def get_server_floating_ip(server):
 
 
 def wait_for_remote_file(remote, path, timeout=30, interval=1):
-    """Wait for a file to exist on a remote system via SSH."""
+    """Wait for a file to exist on a remote system.
 
-    start = time.time()
-    while time.time() - start < timeout:
-        output = remote.exec_command(f'test -f {path} && echo FOUND || echo MISSING')
-        if "FOUND" in output:
-            return True
-        time.sleep(interval)
-    return False
+    The wait runs on the server in one SSH exec, see
+    remote_checks.wait_for_file; ``interval`` is only used where inotify
+    is not available, and capped to a fifth of a second.
+    """
+    result = remote_checks.wait(
+        remote,
+        "file %s" % path,
+        remote_checks.wait_for_file(path, timeout, interval=min(interval, 0.2)),
+    )
+    return result.ok
 
 
 def should_skip(check_name, check_regex):
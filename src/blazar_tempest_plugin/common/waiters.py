@@ -1,23 +1,32 @@
 """Module of ways for a resource to reach a status."""
 
+import threading
 import time
 import socket
 import urllib3
+import weakref
+
+from concurrent import futures
 
 from oslo_log import log as logging
 from tempest.lib import exceptions as lib_exc
 
 from blazar_tempest_plugin.common import exceptions as blazar_exceptions
+from blazar_tempest_plugin.common import polling
+from blazar_tempest_plugin.common import timeline as blazar_timeline
+from blazar_tempest_plugin.common import tracing
 
 LOG = logging.getLogger(__name__)
 
 
+@tracing.traced("wait_for_lease_status", "lease_id", "status")
 def wait_for_lease_status(leases_client, lease_id, status):
     if isinstance(status, str):
         terminal_status = [status]
     else:
         terminal_status = status
 
+    schedule = None
     start = int(time.time())
     while int(time.time()) - start < leases_client.build_timeout:
         lease_body = leases_client.show_lease(lease_id)
@@ -26,11 +35,199 @@ def wait_for_lease_status(leases_client, lease_id, status):
         if current_status in terminal_status:
             return lease
         if current_status in ["ERROR"]:
-            raise blazar_exceptions.LeaseErrorException(lease_id)
+            raise blazar_exceptions.LeaseErrorException(lease_id=lease_id)
+
+        if schedule is None:
+            schedule = polling.LeasePollSchedule(lease, terminal_status)
+        remaining = leases_client.build_timeout - (time.time() - start)
+        tracing.sleep(max(0, min(schedule.next_interval(), remaining)))
+
+
+class _LeaseWatch(object):
+    def __init__(self, terminal_status):
+        self.terminal_status = terminal_status
+        self.future = futures.Future()
+        self.schedule = None
+        self.next_poll = time.time()
+
+
+class LeaseWatcher(object):
+    """Track the status of many leases with one ``list_leases`` call per tick.
+
+    Callers register a lease and the statuses they are waiting for, and get
+    back a future. A background thread refreshes every watched lease from a
+    single lease listing, and resolves each future with the lease body once
+    it reaches a target status. Leases that move to ERROR fail their future
+    with ``LeaseErrorException``.
+
+    Each watch is polled on a ``LeasePollSchedule`` built from the lease's
+    dates, and a tick happens whenever the earliest watch is due. Passing
+    ``interval`` polls at that fixed interval instead.
+
+    The thread only runs while there is at least one lease being watched.
+    """
+
+    def __init__(self, leases_client, interval=None):
+        self.leases_client = leases_client
+        self.interval = interval
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        # lease_id -> list of _LeaseWatch
+        self._watches = {}
+        self._thread = None
+
+    def watch(self, lease_id, status):
+        """Start watching a lease, return a future for its target status."""
+        if isinstance(status, str):
+            terminal_status = [status]
+        else:
+            terminal_status = list(status)
+
+        watch = _LeaseWatch(terminal_status)
+        with self._lock:
+            self._watches.setdefault(lease_id, []).append(watch)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="lease-watcher", daemon=True
+                )
+                self._thread.start()
+        self._wakeup.set()
+        return watch.future
+
+    def unwatch(self, lease_id, future):
+        """Stop watching a lease for the given future, and cancel it."""
+        with self._lock:
+            watches = self._watches.get(lease_id, [])
+            self._watches[lease_id] = [w for w in watches if w.future is not future]
+            if not self._watches[lease_id]:
+                del self._watches[lease_id]
+        future.cancel()
+
+    @tracing.traced("LeaseWatcher.wait_for_lease_status", "lease_id", "status")
+    def wait_for_lease_status(self, lease_id, status, timeout=None):
+        """Block until the lease reaches status, same as the module function.
+
+        Like it, returns None if the lease did not get there in time.
+        """
+        if timeout is None:
+            timeout = self.leases_client.build_timeout
+
+        future = self.watch(lease_id, status)
+        try:
+            return future.result(timeout=timeout)
+        except futures.TimeoutError:
+            self.unwatch(lease_id, future)
+            LOG.warning(
+                "Lease %s did not reach status %s within %d seconds",
+                lease_id, status, timeout,
+            )
+            return None
+
+    def poll(self):
+        """Refresh all watched leases from a single lease listing."""
+        with self._lock:
+            if not self._watches:
+                return
+            # watches added while the listing is in flight may be for leases
+            # created after it was taken, leave those for the next poll
+            polled = {w for ws in self._watches.values() for w in ws}
+
+        try:
+            leases = self.leases_client.list_leases()["leases"]
+        except Exception as ex:
+            # Every waiter would have hit the same error on its own show_lease
+            with self._lock:
+                watches, self._watches = self._watches, {}
+            for watch_list in watches.values():
+                for watch in watch_list:
+                    # unwatch() may have cancelled it meanwhile
+                    if not watch.future.done():
+                        watch.future.set_exception(ex)
+            return
+
+        now = time.time()
+        leases_by_id = {lease["id"]: lease for lease in leases}
+        with self._lock:
+            for lease_id in list(self._watches):
+                lease = leases_by_id.get(lease_id)
+                if lease is None:
+                    error = lib_exc.NotFound("Lease %s was not found" % lease_id)
+                elif lease["status"] == "ERROR":
+                    error = blazar_exceptions.LeaseErrorException(lease_id=lease_id)
+                else:
+                    error = None
+
+                pending = []
+                for watch in self._watches[lease_id]:
+                    if watch.future.done():
+                        continue
+                    if watch not in polled:
+                        pending.append(watch)
+                    elif lease is not None and lease["status"] in watch.terminal_status:
+                        watch.future.set_result(lease)
+                    elif error is not None:
+                        watch.future.set_exception(error)
+                    else:
+                        if watch.next_poll <= now:
+                            watch.next_poll = now + self._next_interval(watch, lease)
+                        pending.append(watch)
 
-        time.sleep(leases_client.build_interval)
+                if pending:
+                    self._watches[lease_id] = pending
+                else:
+                    del self._watches[lease_id]
 
+    def _next_interval(self, watch, lease):
+        if self.interval is not None:
+            return self.interval
+        if watch.schedule is None:
+            watch.schedule = polling.LeasePollSchedule(lease, watch.terminal_status)
+        return watch.schedule.next_interval()
 
+    def _run(self):
+        try:
+            while True:
+                with self._lock:
+                    if not self._watches:
+                        self._thread = None
+                        return
+                    due = min(w.next_poll for ws in self._watches.values() for w in ws)
+
+                delay = due - time.time()
+                if delay > 0:
+                    # new watches are due immediately, so wake up early for them
+                    self._wakeup.wait(delay)
+                    self._wakeup.clear()
+                    continue
+                try:
+                    self.poll()
+                except Exception:
+                    # a dead thread would leave every later wait hanging
+                    LOG.exception("Lease watcher poll failed")
+                    self._wakeup.wait(max(self.leases_client.build_interval, 1))
+                    self._wakeup.clear()
+        finally:
+            with self._lock:
+                if self._thread is threading.current_thread():
+                    self._thread = None
+
+
+_lease_watchers = weakref.WeakKeyDictionary()
+_lease_watchers_lock = threading.Lock()
+
+
+def get_lease_watcher(leases_client):
+    """Return the shared LeaseWatcher for a leases client."""
+    with _lease_watchers_lock:
+        watcher = _lease_watchers.get(leases_client)
+        if watcher is None:
+            watcher = LeaseWatcher(leases_client)
+            _lease_watchers[leases_client] = watcher
+        return watcher
+
+
+@tracing.traced("wait_for_lease_termination", "lease_id")
 def wait_for_lease_termination(client, lease_id, ignore_error=False):
     """Waits for lease to reach termination.
 
@@ -42,12 +239,14 @@ def wait_for_lease_termination(client, lease_id, ignore_error=False):
     except lib_exc.NotFound:
         return
     old_status = body["status"]
+    if old_status == "TERMINATED":
+        return
 
     start_time = int(time.time())
     while True:
-        time.sleep(client.build_interval)
+        tracing.sleep(client.build_interval)
         try:
-            body = client.show_server(lease_id)["server"]
+            body = client.show_lease(lease_id)["lease"]
         except lib_exc.NotFound:
             return
         lease_status = body["status"]
@@ -59,6 +258,8 @@ def wait_for_lease_termination(client, lease_id, ignore_error=False):
                 lease_status,
                 time.time() - start_time,
             )
+        if lease_status == "TERMINATED":
+            return
         if lease_status == "ERROR" and not ignore_error:
             details = "Lease %s failed to delete and is in ERROR status." % lease_id
 
@@ -69,6 +270,60 @@ def wait_for_lease_termination(client, lease_id, ignore_error=False):
         old_status = lease_status
 
 
+@tracing.traced("wait_for_leases_termination", "lease_ids")
+def wait_for_leases_termination(client, lease_ids, ignore_error=False):
+    """Waits for a set of leases to reach termination, polling them together.
+
+    Each tick fetches all leases with a single ``list_leases`` call. A lease
+    is done once it is gone from the listing or is TERMINATED. Leases that
+    are in ERROR (unless ignore_error), or that are still around after
+    ``build_timeout``, are all reported in one LeasesTerminationException.
+    """
+    pending = set(lease_ids)
+    errors = {}
+    last_status = {}
+
+    start_time = int(time.time())
+    while pending:
+        leases = {lease["id"]: lease for lease in client.list_leases()["leases"]}
+        for lease_id in list(pending):
+            lease = leases.get(lease_id)
+            if lease is None or lease["status"] == "TERMINATED":
+                pending.discard(lease_id)
+                continue
+
+            lease_status = lease["status"]
+            if lease_status != last_status.setdefault(lease_id, lease_status):
+                LOG.info(
+                    'Lease %s state transition "%s" ==> "%s" after %d second wait',
+                    lease_id,
+                    last_status[lease_id],
+                    lease_status,
+                    time.time() - start_time,
+                )
+                last_status[lease_id] = lease_status
+
+            if lease_status == "ERROR" and not ignore_error:
+                errors[lease_id] = "failed to delete and is in ERROR status"
+                pending.discard(lease_id)
+
+        if not pending:
+            break
+        if int(time.time()) - start_time >= client.build_timeout:
+            for lease_id in pending:
+                errors[lease_id] = "timed out in status %s" % last_status[lease_id]
+            break
+        tracing.sleep(client.build_interval)
+
+    if errors:
+        details = "; ".join(
+            "lease %s %s" % (lease_id, error) for lease_id, error in sorted(errors.items())
+        )
+        raise blazar_exceptions.LeasesTerminationException(
+            count=len(errors), details=details
+        )
+
+
 def wait_for_tcp(port: int, host: str, timeout: float = 60.0) -> None:
     """Wait for tcp port to start responding."""
 
@@ -110,10 +365,15 @@ def wait_for_http(url: str, timeout: float = 60.0) -> None:
                 ) from ex
 
 
-def _wait_for_server_scheduling(client, server_id: str):
-    """Wait for server to finish scheduling, but not active."""
+def _wait_for_server_scheduling(client, server_id: str, timeline=None):
+    """Wait for server to finish scheduling, but not active.
+
+    State transitions are recorded on ``timeline``, if given.
+    """
 
     body = client.show_server(server_id)["server"]
+    if timeline is not None:
+        blazar_timeline.record_server_state(timeline, body)
     # store previous state for logging
     old_status = server_status = body.get("status")
     old_task = server_task = body.get("OS-EXT-STS:task_state")
@@ -135,6 +395,8 @@ def _wait_for_server_scheduling(client, server_id: str):
         server_status = body.get("status")
         server_task = body.get("OS-EXT-STS:task_state")
         if (server_status != old_status) or (server_task != old_task):
+            if timeline is not None:
+                blazar_timeline.record_server_state(timeline, body)
             LOG.info(
                 'State transition "%s" ==> "%s" after %d second wait',
                 "/".join((old_status, str(old_task))),
@@ -36,6 +36,229 @@ ReservationGroup = [
         default=300,
         help="Timeout in seconds to wait for a lease to finish.",
     ),
+    cfg.FloatOpt(
+        "lease_poll_min_interval",
+        default=2,
+        help="Time in seconds between lease status checks around an expected "
+        "lease start or end.",
+    ),
+    cfg.FloatOpt(
+        "lease_poll_max_interval",
+        default=60,
+        help="Maximum time in seconds between lease status checks when no "
+        "lease transition is expected soon.",
+    ),
+    cfg.FloatOpt(
+        "lease_poll_lead_time",
+        default=5,
+        help="How many seconds before a lease's start or end date to begin "
+        "polling its status.",
+    ),
+    cfg.FloatOpt(
+        "lease_poll_transition_window",
+        default=120,
+        help="How many seconds after a lease's start or end date to keep "
+        "polling at the minimum interval, to cover blazar event lag.",
+    ),
+    cfg.BoolOpt(
+        "response_cache_enabled",
+        default=False,
+        help="Cache responses of read-only, slow changing reservation "
+        "endpoints (host, network and device details and properties).",
+    ),
+    cfg.IntOpt(
+        "response_cache_size",
+        default=256,
+        help="Maximum number of responses cached per reservation client.",
+    ),
+    cfg.DictOpt(
+        "response_cache_ttls",
+        default={},
+        help="Per-URI cache TTLs in seconds, overriding the client defaults. "
+        "Keys are URI templates, e.g. /os-hosts/%s:120,/os-hosts/properties:600",
+    ),
+    cfg.BoolOpt(
+        "connection_keepalive",
+        default=True,
+        help="Keep connections to the reservation service open, in a pool "
+        "shared by every reservation client in the process.",
+    ),
+    cfg.IntOpt(
+        "connection_pool_size",
+        default=10,
+        help="Maximum number of open connections kept per reservation "
+        "endpoint.",
+    ),
+    cfg.BoolOpt(
+        "connection_pool_block",
+        default=False,
+        help="Wait for a free connection when the pool is full, instead of "
+        "opening an extra connection that is discarded afterwards.",
+    ),
+    cfg.IntOpt(
+        "retry_max_attempts",
+        default=1,
+        help="Maximum number of attempts for idempotent reservation API "
+        "requests (GET and DELETE) that fail with a transient error. "
+        "1 disables retries.",
+    ),
+    cfg.FloatOpt(
+        "retry_base_delay",
+        default=1,
+        help="Minimum time in seconds to wait before retrying a request.",
+    ),
+    cfg.FloatOpt(
+        "retry_max_delay",
+        default=30,
+        help="Maximum time in seconds to wait before retrying a request, "
+        "unless the service asks for longer with a Retry-After header.",
+    ),
+    cfg.ListOpt(
+        "retry_statuses",
+        default=["500", "502", "503", "504"],
+        help="Response status codes that are retried.",
+    ),
+    cfg.BoolOpt(
+        "retry_put",
+        default=False,
+        help="Also retry PUT requests. Only enable this if updates made by "
+        "the tests are safe to apply twice.",
+    ),
+    cfg.IntOpt(
+        "circuit_breaker_threshold",
+        default=0,
+        help="Number of consecutive connection failures, or 502, 503 and "
+        "504 responses to retryable requests, after which requests to the "
+        "reservation endpoint fail immediately. 0 disables the circuit "
+        "breaker.",
+    ),
+    cfg.FloatOpt(
+        "circuit_breaker_reset_timeout",
+        default=60,
+        help="Time in seconds after which an open circuit breaker lets a "
+        "trial request through.",
+    ),
+    cfg.FloatOpt(
+        "rate_limit",
+        default=0,
+        help="Maximum number of requests per second sent to the reservation "
+        "service, shared by every test worker on this host. 0 disables the "
+        "limit.",
+    ),
+    cfg.IntOpt(
+        "rate_limit_burst",
+        help="Number of requests that may be sent at once before the rate "
+        "limits apply. Defaults to one second worth of requests.",
+    ),
+    cfg.DictOpt(
+        "rate_limits",
+        default={},
+        help="Lower rate limits in requests per second for a verb, a "
+        "resource, or both, e.g. POST:0.5,/os-hosts:2,GET /leases:5",
+    ),
+    cfg.StrOpt(
+        "rate_limit_lock_dir",
+        help="Directory holding the rate limiter state shared by the test "
+        "workers. Defaults to a directory in the system temp dir.",
+    ),
+    cfg.StrOpt(
+        "trace_file",
+        help="Write a span for every reservation API request and lease wait "
+        "to this file. Tracing is disabled when unset.",
+    ),
+    cfg.StrOpt(
+        "trace_format",
+        default="jsonl",
+        choices=["jsonl", "otlp"],
+        help="Format of the trace file: flat JSON span records, or OTLP/JSON "
+        "documents for an OpenTelemetry collector file receiver.",
+    ),
+    cfg.BoolOpt(
+        "provisioning_timeline",
+        default=False,
+        help="Record when the servers created by scenario tests pass each "
+        "provisioning phase (scheduling, deploy, port, floating IP, SSH), "
+        "by watching them from a background thread. The SSH login is the "
+        "first successful login of the test's remote clients.",
+    ),
+    cfg.StrOpt(
+        "timeline_file",
+        help="Append the provisioning timeline of every scenario test to "
+        "this file, one JSON document per line. Summarize it with "
+        "blazar-timeline.",
+    ),
+    cfg.StrOpt(
+        "duration_history",
+        help="SQLite database to record the duration of every reservation "
+        "test and test class in, for blazar-schedule to plan stestr workers "
+        "from. Durations are not recorded when unset.",
+    ),
+    cfg.BoolOpt(
+        "admission_control",
+        default=True,
+        help="Queue test classes that declare a resource_demand until the "
+        "hardware they need is free, instead of letting them time out "
+        "waiting for their lease to start.",
+    ),
+    cfg.StrOpt(
+        "admission_lock_dir",
+        help="Directory holding the admission state shared by the test "
+        "workers. Defaults to a directory in the system temp dir.",
+    ),
+    cfg.FloatOpt(
+        "admission_timeout",
+        default=3600,
+        help="Maximum time in seconds a test class waits to be admitted.",
+    ),
+    cfg.FloatOpt(
+        "admission_poll_interval",
+        default=10,
+        help="Time in seconds between admission attempts of a waiting test "
+        "class.",
+    ),
+    cfg.FloatOpt(
+        "admission_refresh_interval",
+        default=60,
+        help="How often in seconds the free hardware is read again from the "
+        "reservation API.",
+    ),
+    cfg.IntOpt(
+        "lease_pool_size",
+        default=0,
+        help="Number of idle ACTIVE flavor leases scenario tests keep per "
+        "project and flavor, for later tests to boot their servers on "
+        "instead of reserving again. Host leases are not pooled, since their "
+        "nodes are cleaned after each test. Leases belong to a project, so "
+        "with [auth] use_dynamic_credentials, where every test class gets a "
+        "new project, the pool only serves the tests of one class and is "
+        "drained when the class ends; use pre-provisioned credentials to "
+        "share leases between classes. 0 disables the pool.",
+    ),
+    cfg.FloatOpt(
+        "lease_pool_min_remaining",
+        default=1800,
+        help="Pooled leases ending within this many seconds are extended "
+        "when they are borrowed.",
+    ),
+    cfg.FloatOpt(
+        "lease_pool_lease_duration",
+        default=3600,
+        help="Duration in seconds of new pooled leases, and of the "
+        "extension of a pooled lease, counted from now.",
+    ),
+    cfg.BoolOpt(
+        "ssh_connection_cache",
+        default=True,
+        help="Keep one authenticated SSH connection per server, user and "
+        "key for the remote clients of scenario tests, and open a channel "
+        "on it per command instead of connecting for every command.",
+    ),
+    cfg.IntOpt(
+        "ssh_keepalive_interval",
+        default=30,
+        help="Seconds between keepalives on cached SSH connections, so dead "
+        "ones are noticed. 0 disables them.",
+    ),
     cfg.StrOpt(
         "reservable_flavor_ref",
         help="flavor to use for reservable instances",
@@ -116,4 +339,28 @@ ImageGroup = [
         default="/home/cc/openrc",
         help="Path to the openrc file on the server used in image tests.",
     ),
+    cfg.BoolOpt(
+        "cc_image_tests_parallel_provisioning",
+        default=False,
+        help=(
+            "Reserve the hosts of every configured image with one lease and "
+            "boot all the images at once, before the first image test class "
+            "runs, instead of one image at a time. Only for runs of every "
+            "image test class on one worker, e.g. with stestr --group-regex "
+            "'test_images\\.TestImage_': each worker running an image test "
+            "class provisions every configured image, and holds the hosts of "
+            "images it does not test until it exits."
+        ),
+    ),
+    cfg.BoolOpt(
+        "cc_image_tests_rebuild_in_place",
+        default=False,
+        help=(
+            "Reserve one host per node type for the image tests and rebuild "
+            "its server with each image in turn, instead of booting a server "
+            "per image. Like cc_image_tests_parallel_provisioning, which it "
+            "takes precedence over, only for runs of every image test class "
+            "on one worker."
+        ),
+    ),
 ]
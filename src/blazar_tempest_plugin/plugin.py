@@ -56,8 +56,39 @@ class BlazarTempestPlugin(plugins.TempestPlugin):
                 "ReservableNetworksClient",
                 "ReservableFloatingIPsClient",
                 "ReservableDevicesClient",
+                "AsyncLeasesClient",
+                "AsyncReservableHostsClient",
+                "AsyncReservableNetworksClient",
+                "AsyncReservableFloatingIPsClient",
+                "AsyncReservableDevicesClient",
             ],
         }
         reservation_client.update(reservation_config)
+        reservation_client.update(
+            response_cache=config.CONF.reservation.response_cache_enabled,
+            response_cache_size=config.CONF.reservation.response_cache_size,
+            response_cache_ttls={
+                uri: float(ttl)
+                for uri, ttl in config.CONF.reservation.response_cache_ttls.items()
+            },
+            connection_keepalive=config.CONF.reservation.connection_keepalive,
+            connection_pool_size=config.CONF.reservation.connection_pool_size,
+            connection_pool_block=config.CONF.reservation.connection_pool_block,
+            retry_attempts=config.CONF.reservation.retry_max_attempts,
+            retry_base_delay=config.CONF.reservation.retry_base_delay,
+            retry_max_delay=config.CONF.reservation.retry_max_delay,
+            retry_statuses=config.CONF.reservation.retry_statuses,
+            retry_put=config.CONF.reservation.retry_put,
+            circuit_breaker_threshold=config.CONF.reservation.circuit_breaker_threshold,
+            circuit_breaker_reset_timeout=(
+                config.CONF.reservation.circuit_breaker_reset_timeout
+            ),
+            rate_limit=config.CONF.reservation.rate_limit,
+            rate_limit_burst=config.CONF.reservation.rate_limit_burst,
+            rate_limits=config.CONF.reservation.rate_limits,
+            rate_limit_lock_dir=config.CONF.reservation.rate_limit_lock_dir,
+            trace_file=config.CONF.reservation.trace_file,
+            trace_format=config.CONF.reservation.trace_format,
+        )
 
         return [reservation_client]
@@ -1,3 +1,10 @@
+from blazar_tempest_plugin.services.reservation.async_clients import (
+    AsyncLeasesClient,
+    AsyncReservableDevicesClient,
+    AsyncReservableFloatingIPsClient,
+    AsyncReservableHostsClient,
+    AsyncReservableNetworksClient,
+)
 from blazar_tempest_plugin.services.reservation.devices_client import (
     ReservableDevicesClient,
 )
@@ -20,4 +27,9 @@ __all__ = [
     ReservableNetworksClient,
     ReservableFloatingIPsClient,
     ReservableDevicesClient,
+    AsyncLeasesClient,
+    AsyncReservableHostsClient,
+    AsyncReservableNetworksClient,
+    AsyncReservableFloatingIPsClient,
+    AsyncReservableDevicesClient,
 ]
@@ -0,0 +1,306 @@
+"""asyncio support for the reservation clients.
+
+The public methods of the reservation clients only build a URI and return
+whatever the base ``*_resource`` methods return. Mixing
+``AsyncReservableResourceMixin`` in ahead of a client class replaces those
+base methods with coroutines, so the client keeps its method names and
+return shapes, but every call has to be awaited::
+
+    client = AsyncReservableHostsClient(auth_provider, "reservation", region)
+    async with client:
+        hosts = (await client.list_hosts())["hosts"]
+        allocations = await asyncio.gather(
+            *(client.show_host_allocation(h["id"]) for h in hosts)
+        )
+
+Requests go through a pooled aiohttp session, and are authenticated with
+the tempest auth provider of the client, so the token and catalog are
+shared with the blocking clients. Fetching or refreshing the token is a
+blocking keystone request, so it is made in a thread, once for all the
+coroutines waiting for it, before the cached token is used on the loop.
+The rate limiter's file lock is also taken in a thread.
+"""
+
+import asyncio
+import ssl
+
+from urllib import parse as urllib
+
+from oslo_serialization import jsonutils as json
+from tempest.lib import exceptions as lib_exc
+from tempest.lib.common import rest_client
+
+from blazar_tempest_plugin.services.reservation import base
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+class _Response(dict):
+    """Response headers in the same shape tempest's http objects return."""
+
+    def __init__(self, response):
+        for key, value in response.headers.items():
+            self[key.lower()] = value
+        self.status = response.status
+        self["status"] = str(self.status)
+        self.reason = response.reason
+        self["content-location"] = str(response.url)
+
+
+class AsyncReservableResourceMixin(object):
+    """Make a reservation client's resource methods coroutines."""
+
+    def __init__(
+        self,
+        auth_provider,
+        service,
+        region,
+        connection_limit=100,
+        **kwargs,
+    ):
+        if aiohttp is None:
+            raise RuntimeError(
+                "aiohttp is required for the asyncio reservation clients, "
+                "install blazar-tempest-plugin[async]"
+            )
+        super(AsyncReservableResourceMixin, self).__init__(
+            auth_provider, service, region, **kwargs
+        )
+
+        self.connection_limit = connection_limit
+        self._proxy_url = kwargs.get("proxy_url")
+        self._timeout = aiohttp.ClientTimeout(total=kwargs.get("http_timeout"))
+        if self.dscv:
+            self._ssl = False
+        elif kwargs.get("ca_certs"):
+            self._ssl = ssl.create_default_context(cafile=kwargs["ca_certs"])
+        else:
+            self._ssl = None
+
+        self._session = None
+        self._session_loop = None
+        self._auth_lock = None
+        self._auth_lock_loop = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self):
+        # sessions are bound to the loop they were created on
+        loop = asyncio.get_running_loop()
+        if (
+            self._session is None
+            or self._session.closed
+            or self._session_loop is not loop
+        ):
+            connector = aiohttp.TCPConnector(limit=self.connection_limit, ssl=self._ssl)
+            self._session = aiohttp.ClientSession(
+                connector=connector, timeout=self._timeout
+            )
+            self._session_loop = loop
+        return self._session
+
+    def _get_auth_lock(self):
+        loop = asyncio.get_running_loop()
+        if self._auth_lock is None or self._auth_lock_loop is not loop:
+            self._auth_lock = asyncio.Lock()
+            self._auth_lock_loop = loop
+        return self._auth_lock
+
+    def _needs_auth(self):
+        provider = self.auth_provider
+        if not hasattr(provider, "get_auth"):
+            return False
+        return provider.cache is None or provider.is_expired(provider.cache)
+
+    async def _authenticate(self):
+        """Make sure the auth provider holds a token that is not expiring.
+
+        Afterwards the provider's auth_request, token and base_url are
+        answered from its cache, without blocking the loop.
+        """
+        if not self._needs_auth():
+            return
+        async with self._get_auth_lock():
+            if self._needs_auth():
+                await asyncio.to_thread(self.auth_provider.get_auth)
+
+    async def request_async(self, method, url, headers=None, body=None):
+        """Send an authenticated request, like RestClient.request.
+
+        Failures are retried, and the circuit breaker and rate limits of
+        the endpoint are applied, the same way as for the blocking clients.
+        """
+        await self._authenticate()
+        breaker = self.circuit_breaker
+        limiter = self.rate_limiter
+        attempt = 0
+        delay = None
+        with self._request_span(method, url, body) as span:
+            while True:
+                attempt += 1
+                span.set(retries=attempt - 1)
+                if breaker is not None:
+                    breaker.before_request()
+                if limiter is not None:
+                    await asyncio.sleep(
+                        await asyncio.to_thread(limiter.reserve, method, url)
+                    )
+                try:
+                    resp, resp_body = await self._request_async(
+                        method, url, headers, body
+                    )
+                except (lib_exc.RestClientException, aiohttp.ClientError) as ex:
+                    base._set_response_attributes(span, getattr(ex, "resp", None), None)
+                    delay = self._after_failure(breaker, method, url, attempt, ex, delay)
+                    if delay is None:
+                        raise
+                    await asyncio.sleep(delay)
+                    continue
+
+                base._set_response_attributes(span, resp, resp_body)
+                if breaker is not None:
+                    breaker.record_success()
+                return resp, resp_body
+
+    async def _request_async(self, method, url, headers=None, body=None):
+        # a retry may come after the token started expiring
+        await self._authenticate()
+        req_headers = self.get_headers()
+        req_headers.update(headers or {})
+        req_url, req_headers, req_body = self.auth_provider.auth_request(
+            method, url, req_headers, body, self.filters
+        )
+
+        self._log_request_start(method, req_url)
+        session = self._get_session()
+        async with session.request(
+            method,
+            req_url,
+            headers=req_headers,
+            data=req_body,
+            proxy=self._proxy_url,
+        ) as response:
+            resp_body = await response.read()
+            resp = _Response(response)
+
+        self.response_checker(method, resp, resp_body)
+        self._error_checker(resp, resp_body)
+        return resp, resp_body
+
+    async def _get_resource(self, req_uri):
+        entry = None
+        if self.response_cache is not None:
+            entry, fresh = self.response_cache.lookup(req_uri)
+            if fresh:
+                return entry.body
+
+        await self._authenticate()
+        key = ("GET", self.base_url, req_uri, self.token)
+        return await base._single_flight.do_async(
+            key, lambda: self._fetch_resource_async(req_uri, entry)
+        )
+
+    async def _fetch_resource_async(self, req_uri, entry=None):
+        headers = entry.validators() if entry is not None else None
+        resp, body = await self.request_async("GET", req_uri, headers=headers)
+        if entry is not None and resp.status == 304:
+            return self.response_cache.revalidated(req_uri, entry)
+
+        body = json.loads(body)
+        self.expected_success(200, resp.status)
+        result = rest_client.ResponseBody(resp, body)
+        if self.response_cache is not None:
+            self.response_cache.store(req_uri, result)
+        return result
+
+    async def list_resources(self, uri, **filters):
+        req_uri = uri
+        if filters:
+            req_uri += "?" + urllib.urlencode(filters, doseq=1)
+        return await self._get_resource(req_uri)
+
+    async def iter_resources(self, uri, limit=None, **filters):
+        """Async counterpart of iter_resources.
+
+        Pagination works the same way, but each page is read whole before
+        its items are yielded.
+        """
+        if limit is None:
+            limit = self.page_limit
+
+        marker = None
+        previous_page = set()
+        while True:
+            page_filters = dict(filters)
+            if limit:
+                page_filters["limit"] = limit
+            if marker is not None:
+                page_filters["marker"] = marker
+
+            req_uri = uri
+            if page_filters:
+                req_uri += "?" + urllib.urlencode(page_filters, doseq=1)
+
+            resp, body = await self.request_async("GET", req_uri)
+            self.expected_success(200, resp.status)
+            stream = base._JsonListStream([body])
+            page = set()
+            count = 0
+            last_item = None
+            for item in stream:
+                item_marker = base._item_marker(item)
+                if item_marker is not None and item_marker in previous_page:
+                    return
+                page.add(item_marker)
+                count += 1
+                last_item = item
+                yield item
+
+            marker = base._next_link_marker(stream.members)
+            if marker is None and limit and count == limit:
+                marker = base._item_marker(last_item)
+            if marker is None:
+                return
+            previous_page = page
+
+    async def show_resource(self, uri):
+        return await self._get_resource(uri)
+
+    async def delete_resource(
+        self, uri, expect_empty_body=False, expect_response_code=200
+    ):
+        resp, body = await self.request_async("DELETE", uri)
+        self._invalidate_cache(uri)
+        self.expected_success(expect_response_code, resp.status)
+        body = None if expect_empty_body else json.loads(body)
+        return rest_client.ResponseBody(resp, body)
+
+    async def create_resource(
+        self, uri, post_data, expect_empty_body=False, expect_response_code=201
+    ):
+        resp, body = await self.request_async("POST", uri, body=json.dumps(post_data))
+        self._invalidate_cache(uri)
+        body = None if expect_empty_body else json.loads(body)
+        self.expected_success(expect_response_code, resp.status)
+        return rest_client.ResponseBody(resp, body)
+
+    async def update_resource(
+        self, uri, post_data, expect_empty_body=False, expect_response_code=200
+    ):
+        resp, body = await self.request_async("PUT", uri, body=json.dumps(post_data))
+        self._invalidate_cache(uri)
+        body = None if expect_empty_body else json.loads(body)
+        self.expected_success(expect_response_code, resp.status)
+        return rest_client.ResponseBody(resp, body)
@@ -0,0 +1,44 @@
+from blazar_tempest_plugin.services.reservation import async_base
+from blazar_tempest_plugin.services.reservation.devices_client import (
+    ReservableDevicesClient,
+)
+from blazar_tempest_plugin.services.reservation.floatingip_client import (
+    ReservableFloatingIPsClient,
+)
+from blazar_tempest_plugin.services.reservation.hosts_client import (
+    ReservableHostsClient,
+)
+from blazar_tempest_plugin.services.reservation.leases_client import (
+    LeasesClient,
+)
+from blazar_tempest_plugin.services.reservation.networks_client import (
+    ReservableNetworksClient,
+)
+
+
+class AsyncLeasesClient(async_base.AsyncReservableResourceMixin, LeasesClient):
+    pass
+
+
+class AsyncReservableHostsClient(
+    async_base.AsyncReservableResourceMixin, ReservableHostsClient
+):
+    pass
+
+
+class AsyncReservableNetworksClient(
+    async_base.AsyncReservableResourceMixin, ReservableNetworksClient
+):
+    pass
+
+
+class AsyncReservableDevicesClient(
+    async_base.AsyncReservableResourceMixin, ReservableDevicesClient
+):
+    pass
+
+
+class AsyncReservableFloatingIPsClient(
+    async_base.AsyncReservableResourceMixin, ReservableFloatingIPsClient
+):
+    pass
@@ -1,8 +1,246 @@
+import asyncio
+import codecs
+import functools
+import json as stdlib_json
+import re
+import threading
+import time
+
 from urllib import parse as urllib
 
+import urllib3
+
+from oslo_log import log as logging
 from oslo_serialization import jsonutils as json
+from tempest.lib import exceptions as lib_exc
 from tempest.lib.common import rest_client
 
+from blazar_tempest_plugin.common import tracing
+from blazar_tempest_plugin.services.reservation import cache
+from blazar_tempest_plugin.services.reservation import pool
+from blazar_tempest_plugin.services.reservation import ratelimit
+from blazar_tempest_plugin.services.reservation import retry
+
+LOG = logging.getLogger(__name__)
+
+# bytes read from the socket at a time when streaming list responses
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class _JsonListStream(object):
+    """Incrementally decode the first list-valued member of a JSON object.
+
+    List responses look like ``{"hosts": [...], "hosts_links": [...]}``.
+    Iterating yields the items of the first list as soon as each one has
+    been read off the wire, so the whole body is never held in memory.
+    ``*_links`` lists are skipped, as is any other top-level member; those
+    are collected into ``members``.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = stdlib_json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+        self.key = None
+        self.members = {}
+
+    def __iter__(self):
+        self._expect("{")
+        while True:
+            char = self._peek()
+            if char == "}":
+                self._pos += 1
+                return
+            if char == ",":
+                self._pos += 1
+                continue
+
+            key = self._decode_value()
+            self._expect(":")
+            if (
+                self.key is None
+                and not key.endswith("_links")
+                and self._peek() == "["
+            ):
+                self.key = key
+                self._pos += 1
+                yield from self._iter_list()
+            else:
+                self.members[key] = self._decode_value()
+
+    def _iter_list(self):
+        while True:
+            char = self._peek()
+            if char == "]":
+                self._pos += 1
+                return
+            if char == ",":
+                self._pos += 1
+                continue
+            yield self._decode_value()
+
+    def _read_more(self):
+        if self._eof:
+            return False
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self._eof = True
+            chunk = b""
+        # drop everything already consumed before growing the buffer
+        self._buf = self._buf[self._pos:] + self._text.decode(chunk, final=self._eof)
+        self._pos = 0
+        return True
+
+    def _peek(self):
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos].isspace():
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._read_more():
+                raise ValueError("Unexpected end of JSON list response")
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise ValueError(
+                "Expected %r at position %d of JSON list response" % (char, self._pos)
+            )
+        self._pos += 1
+
+    def _decode_value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except stdlib_json.JSONDecodeError:
+                if not self._read_more():
+                    raise
+                continue
+            # a value ending right at the buffer end may be a truncated number
+            if end == len(self._buf) and self._read_more():
+                continue
+            self._pos = end
+            return value
+
+
+class _Call(object):
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """Share one in-flight call between concurrent callers with the same key.
+
+    The first caller for a key runs the call, and every caller that arrives
+    while it is in flight blocks until it finishes, then gets the same result
+    or exception. ``do`` is for threads, and ``do_async`` for coroutines;
+    coroutines are only coalesced with others on the same event loop.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._async_calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as ex:
+            call.error = ex
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key, coro_fn):
+        loop_key = (asyncio.get_running_loop(), key)
+        with self._lock:
+            future = self._async_calls.get(loop_key)
+            leader = future is None
+            if leader:
+                future = self._async_calls[loop_key] = loop_key[0].create_future()
+
+        if not leader:
+            # don't let one cancelled waiter cancel the shared call
+            return await asyncio.shield(future)
+
+        try:
+            result = await coro_fn()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as ex:
+            future.set_exception(ex)
+            # mark as retrieved, the leader re-raises it anyway
+            future.exception()
+            raise
+        finally:
+            with self._lock:
+                del self._async_calls[loop_key]
+
+
+# shared by every client in the process, keys include the auth token
+_single_flight = SingleFlight()
+
+
+def _item_marker(item):
+    """Return the value blazar expects as pagination marker for an item."""
+    for key in ("id", "resource_id", "property"):
+        if key in item:
+            return item[key]
+    return None
+
+
+def _next_link_marker(members):
+    """Return the marker from a ``<resource>_links`` "next" link, if any."""
+    for key, links in members.items():
+        if not key.endswith("_links"):
+            continue
+        for link in links:
+            if link.get("rel") == "next":
+                query = urllib.parse_qs(urllib.urlparse(link["href"]).query)
+                if "marker" in query:
+                    return query["marker"][0]
+    return None
+
+
+def _set_response_attributes(span, resp, body):
+    """Record status, size and request id of a response on a span."""
+    if resp is None:
+        return
+    headers = getattr(resp, "headers", resp)
+    length = len(body) if body else headers.get("content-length")
+    span.set(
+        **{
+            "http.status_code": resp.status,
+            "http.response_content_length": int(length or 0),
+            "openstack.request_id": headers.get("x-openstack-request-id"),
+        }
+    )
+
 
 class BaseReservableResourceClient(rest_client.RestClient):
     """Base class for Tempest REST clients for Blazar.
@@ -16,18 +254,341 @@ class BaseReservableResourceClient(rest_client.RestClient):
     # added as prefix to endpoint
     api_version = "v1"
 
+    # default page size for iter_resources, 0 disables pagination
+    page_limit = 1000
+
+    # URI template -> TTL in seconds for the optional response cache.
+    # Only read-only, slow changing resources should be listed here.
+    cache_ttls = {}
+
+    def __init__(
+        self,
+        auth_provider,
+        service,
+        region,
+        response_cache=False,
+        response_cache_size=256,
+        response_cache_ttls=None,
+        connection_keepalive=False,
+        connection_pool_size=10,
+        connection_pool_block=False,
+        retry_attempts=1,
+        retry_base_delay=1,
+        retry_max_delay=30,
+        retry_statuses=(500, 502, 503, 504),
+        retry_put=False,
+        circuit_breaker_threshold=0,
+        circuit_breaker_reset_timeout=60,
+        rate_limit=0,
+        rate_limit_burst=None,
+        rate_limits=None,
+        rate_limit_lock_dir=None,
+        trace_file=None,
+        trace_format="jsonl",
+        **kwargs,
+    ):
+        super(BaseReservableResourceClient, self).__init__(
+            auth_provider, service, region, **kwargs
+        )
+
+        # share keep-alive connections with every other reservation client,
+        # tempest's default http object closes them after each request
+        if connection_keepalive and not kwargs.get("proxy_url"):
+            self.http_obj = pool.get_shared_http(
+                disable_ssl_certificate_validation=self.dscv,
+                ca_certs=kwargs.get("ca_certs"),
+                timeout=kwargs.get("http_timeout"),
+                follow_redirects=kwargs.get("follow_redirects", True),
+                maxsize=connection_pool_size,
+                block=connection_pool_block,
+            )
+
+        self.response_cache = None
+        if response_cache:
+            ttls = dict(self.cache_ttls)
+            ttls.update(response_cache_ttls or {})
+            self.response_cache = cache.ResponseCache(
+                max_size=response_cache_size, ttls=ttls
+            )
+
+        self.retry_policy = retry.RetryPolicy(
+            max_attempts=retry_attempts,
+            base_delay=retry_base_delay,
+            max_delay=retry_max_delay,
+            statuses=retry_statuses,
+            retry_put=retry_put,
+        )
+        self.circuit_breaker_threshold = circuit_breaker_threshold
+        self.circuit_breaker_reset_timeout = circuit_breaker_reset_timeout
+
+        self.rate_limit = rate_limit
+        self.rate_limit_burst = rate_limit_burst
+        self.rate_limits = rate_limits
+        self.rate_limit_lock_dir = rate_limit_lock_dir
+
+        if trace_file:
+            tracing.configure(trace_file, trace_format)
+
+    @property
+    def circuit_breaker(self):
+        """The circuit breaker shared by every client of this endpoint."""
+        if not self.circuit_breaker_threshold:
+            return None
+        return retry.get_circuit_breaker(
+            self.base_url,
+            failure_threshold=self.circuit_breaker_threshold,
+            reset_timeout=self.circuit_breaker_reset_timeout,
+        )
+
+    @property
+    def rate_limiter(self):
+        """The rate limiter of this endpoint, None without limits."""
+        return ratelimit.get_rate_limiter(
+            self.base_url,
+            rate=self.rate_limit,
+            burst=self.rate_limit_burst,
+            limits=self.rate_limits,
+            lock_dir=self.rate_limit_lock_dir,
+        )
+
+    def _retry_delay(self, resp, previous_delay):
+        retry_after = None
+        if isinstance(resp, dict) and "retry-after" in resp:
+            try:
+                retry_after = self._get_retry_after_delay(resp)
+            except ValueError:
+                pass
+        return self.retry_policy.next_delay(previous_delay, retry_after)
+
+    def _after_failure(self, breaker, method, url, attempt, error, delay):
+        """Record a failed attempt, and return how long to wait to retry.
+
+        Returns None if the request should not be retried.
+        """
+        resp = getattr(error, "resp", None)
+        status = getattr(resp, "status", None)
+        if breaker is not None:
+            if retry.is_breaker_failure(method, status, self.retry_policy.methods):
+                breaker.record_failure()
+            elif status < 500:
+                breaker.record_success()
+
+        if not self.retry_policy.should_retry(method, attempt, status):
+            return None
+
+        delay = self._retry_delay(resp, delay)
+        LOG.warning(
+            "Retrying %s %s in %.1f seconds, attempt %d of %d failed: %s",
+            method,
+            url,
+            delay,
+            attempt,
+            self.retry_policy.max_attempts,
+            error,
+        )
+        retry.record(retries=1, retry_wait=delay)
+        return delay
+
+    def request(
+        self, method, url, extra_headers=False, headers=None, body=None, chunked=False
+    ):
+        """Send a request, retrying transient failures of idempotent verbs.
+
+        See RetryPolicy for which requests are retried. Requests to an
+        endpoint whose circuit breaker is open fail with
+        CircuitOpenException without being sent. Every attempt waits for
+        the rate limiter, if limits are configured. The request, retries
+        included, is recorded as a tracing span when tracing is enabled.
+        """
+        breaker = self.circuit_breaker
+        limiter = self.rate_limiter
+        attempt = 0
+        delay = None
+        with self._request_span(method, url, body) as span:
+            while True:
+                attempt += 1
+                span.set(retries=attempt - 1)
+                if breaker is not None:
+                    breaker.before_request()
+                if limiter is not None:
+                    time.sleep(limiter.reserve(method, url))
+                try:
+                    resp, resp_body = super(BaseReservableResourceClient, self).request(
+                        method,
+                        url,
+                        extra_headers=extra_headers,
+                        headers=headers,
+                        body=body,
+                        chunked=chunked,
+                    )
+                except (
+                    lib_exc.RestClientException,
+                    urllib3.exceptions.HTTPError,
+                    ConnectionError,
+                ) as ex:
+                    _set_response_attributes(span, getattr(ex, "resp", None), None)
+                    delay = self._after_failure(breaker, method, url, attempt, ex, delay)
+                    if delay is None:
+                        raise
+                    # streamed error responses still hold their connection
+                    if hasattr(getattr(ex, "resp", None), "release_conn"):
+                        ex.resp.release_conn()
+                    time.sleep(delay)
+                    continue
+
+                _set_response_attributes(span, resp, resp_body)
+                if breaker is not None:
+                    breaker.record_success()
+                return resp, resp_body
+
+    def _request_span(self, method, url, body=None):
+        template = self.uri_template(url)
+        return tracing.span(
+            "%s %s" % (method, template),
+            kind=tracing.KIND_CLIENT,
+            **{
+                "http.method": method,
+                "http.route": template,
+                "http.target": url,
+                "http.request_content_length": len(body) if body else 0,
+                "service": self.service,
+            },
+        )
+
+    @classmethod
+    def _uri_templates(cls):
+        templates = cls.__dict__.get("_compiled_uri_templates")
+        if templates is None:
+            uris = {
+                getattr(cls, name)
+                for name in dir(cls)
+                if name.endswith("_uri") and isinstance(getattr(cls, name), str)
+            }
+            # literal segments win over placeholders, as in the response cache
+            templates = [
+                (re.compile("^%s$" % re.escape(uri).replace("%s", "[^/]+")), uri)
+                for uri in sorted(uris, key=lambda uri: (uri.count("%s"), uri))
+            ]
+            cls._compiled_uri_templates = templates
+        return templates
+
+    def uri_template(self, url):
+        """Return the ``*_uri`` template a request URL was built from."""
+        path = url.split("?", 1)[0]
+        for pattern, template in self._uri_templates():
+            if pattern.match(path):
+                return template
+        return path
+
+    def _get_resource(self, req_uri):
+        """GET and decode a resource, going through the cache if enabled.
+
+        Concurrent identical GETs made with the same token share a single
+        request, and all callers get the same ResponseBody.
+        """
+        entry = None
+        if self.response_cache is not None:
+            entry, fresh = self.response_cache.lookup(req_uri)
+            if fresh:
+                return entry.body
+
+        key = ("GET", self.base_url, req_uri, self.token)
+        return _single_flight.do(
+            key, functools.partial(self._fetch_resource, req_uri, entry)
+        )
+
+    def _fetch_resource(self, req_uri, entry=None):
+        if self.response_cache is None:
+            resp, body = self.get(req_uri)
+            body = json.loads(body)
+            self.expected_success(200, resp.status)
+            return rest_client.ResponseBody(resp, body)
+
+        if entry is not None:
+            resp, body = self.get(
+                req_uri, headers=entry.validators(), extra_headers=True
+            )
+            if resp.status == 304:
+                return self.response_cache.revalidated(req_uri, entry)
+        else:
+            resp, body = self.get(req_uri)
+        body = json.loads(body)
+        self.expected_success(200, resp.status)
+
+        result = rest_client.ResponseBody(resp, body)
+        self.response_cache.store(req_uri, result)
+        return result
+
+    def _invalidate_cache(self, uri):
+        if self.response_cache is not None:
+            self.response_cache.invalidate(uri)
+
     def list_resources(self, uri, **filters):
         req_uri = uri
         if filters:
             req_uri += "?" + urllib.urlencode(filters, doseq=1)
-        resp, body = self.get(req_uri)
-        body = json.loads(body)
-        self.expected_success(200, resp.status)
-        return rest_client.ResponseBody(resp, body)
+        return self._get_resource(req_uri)
+
+    def iter_resources(self, uri, limit=None, **filters):
+        """Yield the items of a list resource one at a time.
+
+        Follows blazar ``marker``/``limit`` pagination, using the "next" link
+        if the server returns one and the last item of a full page otherwise.
+        Each page is streamed and parsed incrementally, so memory use and time
+        to first item do not grow with the size of the page. Servers that
+        ignore the pagination parameters are handled as a single page.
+        """
+        if limit is None:
+            limit = self.page_limit
+
+        marker = None
+        previous_page = set()
+        while True:
+            page_filters = dict(filters)
+            if limit:
+                page_filters["limit"] = limit
+            if marker is not None:
+                page_filters["marker"] = marker
+
+            req_uri = uri
+            if page_filters:
+                req_uri += "?" + urllib.urlencode(page_filters, doseq=1)
+
+            resp, _ = self.get(req_uri, chunked=True)
+            finished = False
+            try:
+                self.expected_success(200, resp.status)
+                stream = _JsonListStream(resp.stream(STREAM_CHUNK_SIZE))
+                page = set()
+                count = 0
+                last_item = None
+                for item in stream:
+                    item_marker = _item_marker(item)
+                    if item_marker is not None and item_marker in previous_page:
+                        # the server ignored our marker, and started over
+                        return
+                    page.add(item_marker)
+                    count += 1
+                    last_item = item
+                    yield item
+                finished = True
+            finally:
+                if not finished:
+                    # don't hand a connection with unread data back to the pool
+                    resp.close()
+                resp.release_conn()
+
+            marker = _next_link_marker(stream.members)
+            if marker is None and limit and count == limit:
+                marker = _item_marker(last_item)
+            if marker is None:
+                return
+            previous_page = page
 
     def delete_resource(self, uri, expect_empty_body=False, expect_response_code=200):
         req_uri = uri
         resp, body = self.delete(req_uri)
+        self._invalidate_cache(req_uri)
 
         # what we're *supposed* to see is a a body if 200 or 202, and no body if 204
         self.expected_success(expect_response_code, resp.status)
@@ -41,10 +602,7 @@ class BaseReservableResourceClient(rest_client.RestClient):
 
     def show_resource(self, uri):
         req_uri = uri
-        resp, body = self.get(req_uri)
-        body = json.loads(body)
-        self.expected_success(200, resp.status)
-        return rest_client.ResponseBody(resp, body)
+        return self._get_resource(req_uri)
 
     def create_resource(
         self, uri, post_data, expect_empty_body=False, expect_response_code=201
@@ -52,6 +610,7 @@ class BaseReservableResourceClient(rest_client.RestClient):
         req_uri = uri
         req_post_data = json.dumps(post_data)
         resp, body = self.post(req_uri, req_post_data)
+        self._invalidate_cache(req_uri)
         # NOTE: RFC allows both a valid non-empty body and an empty body for
         # response of POST API. If a body is expected not empty, we decode the
         # body. Otherwise we returns the body as it is.
@@ -68,6 +627,7 @@ class BaseReservableResourceClient(rest_client.RestClient):
         req_uri = uri
         req_post_data = json.dumps(post_data)
         resp, body = self.put(req_uri, req_post_data)
+        self._invalidate_cache(req_uri)
         # NOTE: RFC allows both a valid non-empty body and an empty body for
         # response of PUT API. If a body is expected not empty, we decode the
         # body. Otherwise we returns the body as it is.
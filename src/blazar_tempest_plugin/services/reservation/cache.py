@@ -0,0 +1,136 @@
+"""Client side cache for read-only reservation API responses."""
+
+import collections
+import re
+import threading
+import time
+
+# hit/miss counters summed over every cache in the process
+TOTAL_STATS = collections.Counter()
+_total_stats_lock = threading.Lock()
+
+
+def get_total_stats():
+    """Return the cache counters summed over every client in the process."""
+    with _total_stats_lock:
+        return dict(TOTAL_STATS)
+
+
+def _uri_path(uri):
+    return uri.split("?", 1)[0]
+
+
+def _uri_root(uri):
+    return _uri_path(uri).strip("/").split("/", 1)[0]
+
+
+class _CacheEntry(object):
+    def __init__(self, body, expires_at):
+        self.body = body
+        self.expires_at = expires_at
+        self.etag = body.response.get("etag")
+        self.last_modified = body.response.get("last-modified")
+
+    def validators(self):
+        """Return the conditional request headers for revalidation."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache(object):
+    """Bounded LRU cache of decoded GET responses, with per-URI TTLs.
+
+    ``ttls`` maps URI templates, like the ``*_uri`` attributes of the
+    clients, to a TTL in seconds. Templates without a ``%s`` take priority
+    over ones with, so ``/os-hosts/properties`` wins over ``/os-hosts/%s``.
+    Responses for URIs without a TTL are not cached.
+
+    Entries past their TTL are kept around while they carry an ETag or
+    Last-Modified header, so that the client can revalidate them with a
+    conditional request instead of downloading the body again.
+    """
+
+    def __init__(self, max_size=256, ttls=None, clock=time.monotonic):
+        self.max_size = max_size
+        self.clock = clock
+        self.stats = collections.Counter()
+
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._ttls = [
+            (re.compile("^%s$" % re.escape(template).replace("%s", "[^/]+")), ttl)
+            for template, ttl in sorted(
+                (ttls or {}).items(), key=lambda item: item[0].count("%s")
+            )
+        ]
+
+    def ttl_for(self, uri):
+        path = _uri_path(uri)
+        for pattern, ttl in self._ttls:
+            if pattern.match(path):
+                return float(ttl)
+        return 0
+
+    def lookup(self, uri):
+        """Return (entry, fresh) for a URI.
+
+        entry is None on a miss, and a stale entry worth revalidating
+        otherwise.
+        """
+        with self._lock:
+            entry = self._entries.get(uri)
+            if entry is None:
+                if self.ttl_for(uri) > 0:
+                    self._count("misses")
+                return None, False
+
+            self._entries.move_to_end(uri)
+            if self.clock() < entry.expires_at:
+                self._count("hits")
+                return entry, True
+
+            self._count("misses")
+            if not entry.validators():
+                del self._entries[uri]
+                return None, False
+            return entry, False
+
+    def store(self, uri, body):
+        """Cache a decoded response body, if the URI has a TTL."""
+        ttl = self.ttl_for(uri)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[uri] = _CacheEntry(body, self.clock() + ttl)
+            self._entries.move_to_end(uri)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._count("evictions")
+
+    def revalidated(self, uri, entry):
+        """Mark a stale entry as still valid after a 304 response."""
+        with self._lock:
+            entry.expires_at = self.clock() + self.ttl_for(uri)
+            self._count("revalidations")
+        return entry.body
+
+    def invalidate(self, uri):
+        """Drop every entry that overlaps with a modified URI."""
+        root = _uri_root(uri)
+        with self._lock:
+            for key in [k for k in self._entries if _uri_root(k) == root]:
+                del self._entries[key]
+                self._count("invalidations")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _count(self, name):
+        self.stats[name] += 1
+        with _total_stats_lock:
+            TOTAL_STATS[name] += 1
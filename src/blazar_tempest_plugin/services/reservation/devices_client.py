@@ -13,9 +13,20 @@ class ReservableDevicesClient(base.BaseReservableResourceClient):
     device_properties_uri = "/devices/properties"
     device_properties_path_uri = "/devices/properties/%s"
 
+    cache_ttls = {
+        device_uri: 60,
+        device_path_uri: 60,
+        device_properties_uri: 300,
+        # allocations follow leases, and would otherwise match device_path_uri
+        device_allocations_uri: 0,
+    }
+
     def list_devices(self):
         return self.list_resources(self.device_uri)
 
+    def iter_devices(self, **filters):
+        return self.iter_resources(self.device_uri, **filters)
+
     def show_device(self, device_id):
         uri = self.device_path_uri % device_id
         return self.show_resource(uri)
@@ -35,6 +46,9 @@ class ReservableDevicesClient(base.BaseReservableResourceClient):
     def list_device_allocations(self):
         return self.list_resources(self.device_allocations_uri)
 
+    def iter_device_allocations(self, **filters):
+        return self.iter_resources(self.device_allocations_uri, **filters)
+
     def show_device_allocation(self, device_id):
         uri = self.device_allocations_path_uri % device_id
         return self.show_resource(uri)
@@ -48,5 +62,14 @@ class ReservableDevicesClient(base.BaseReservableResourceClient):
 
         return self.list_resources(self.device_properties_uri, **kwargs)
 
+    def iter_device_properties(self, detail=None, all=None):
+        kwargs = {}
+        if detail:
+            kwargs["detail"] = True
+        if all:
+            kwargs["all"] = True
+
+        return self.iter_resources(self.device_properties_uri, **kwargs)
+
     def update_device_property(self):
         raise lib_exc.NotImplemented
@@ -10,6 +10,9 @@ class ReservableFloatingIPsClient(base.BaseReservableResourceClient):
     def list_floatingips(self):
         return self.list_resources(self.floatingip_uri)
 
+    def iter_floatingips(self, **filters):
+        return self.iter_resources(self.floatingip_uri, **filters)
+
     def show_floatingip(self, floatingip_id):
         uri = self.floatingip_path_uri % floatingip_id
         return self.show_resource(uri)
@@ -13,9 +13,20 @@ class ReservableHostsClient(base.BaseReservableResourceClient):
     host_properties_uri = "/os-hosts/properties"
     host_properties_path_uri = "/os-hosts/properties/%s"
 
+    cache_ttls = {
+        host_uri: 60,
+        host_path_uri: 60,
+        host_properties_uri: 300,
+        # allocations follow leases, and would otherwise match host_path_uri
+        host_allocations_uri: 0,
+    }
+
     def list_hosts(self):
         return self.list_resources(self.host_uri)
 
+    def iter_hosts(self, **filters):
+        return self.iter_resources(self.host_uri, **filters)
+
     def show_host(self, host_id):
         uri = self.host_path_uri % host_id
         return self.show_resource(uri)
@@ -35,6 +46,9 @@ class ReservableHostsClient(base.BaseReservableResourceClient):
     def list_host_allocations(self):
         return self.list_resources(self.host_allocations_uri)
 
+    def iter_host_allocations(self, **filters):
+        return self.iter_resources(self.host_allocations_uri, **filters)
+
     def show_host_allocation(self, host_id):
         uri = self.host_allocations_path_uri % host_id
         return self.show_resource(uri)
@@ -48,5 +62,14 @@ class ReservableHostsClient(base.BaseReservableResourceClient):
 
         return self.list_resources(self.host_properties_uri, **kwargs)
 
+    def iter_host_properties(self, detail=None, all=None):
+        kwargs = {}
+        if detail:
+            kwargs["detail"] = True
+        if all:
+            kwargs["all"] = True
+
+        return self.iter_resources(self.host_properties_uri, **kwargs)
+
     def update_host_property(self):
         raise lib_exc.NotImplemented
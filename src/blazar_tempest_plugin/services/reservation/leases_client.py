@@ -11,6 +11,9 @@ class LeasesClient(base.BaseReservableResourceClient):
     def list_leases(self):
         return self.list_resources(self.lease_uri)
 
+    def iter_leases(self, **filters):
+        return self.iter_resources(self.lease_uri, **filters)
+
     def show_lease(self, lease_id):
         uri = self.lease_path_uri % lease_id
         return self.show_resource(uri)
@@ -13,9 +13,20 @@ class ReservableNetworksClient(base.BaseReservableResourceClient):
     network_properties_uri = "/networks/properties"
     network_properties_path_uri = "/networks/properties/%s"
 
+    cache_ttls = {
+        network_uri: 60,
+        network_path_uri: 60,
+        network_properties_uri: 300,
+        # allocations follow leases, and would otherwise match network_path_uri
+        network_allocations_uri: 0,
+    }
+
     def list_networks(self):
         return self.list_resources(self.network_uri)
 
+    def iter_networks(self, **filters):
+        return self.iter_resources(self.network_uri, **filters)
+
     def show_network(self, network_id):
         uri = self.network_path_uri % network_id
         return self.show_resource(uri)
@@ -32,6 +43,9 @@ class ReservableNetworksClient(base.BaseReservableResourceClient):
     def list_network_allocations(self):
         return self.list_resources(self.network_allocations_uri)
 
+    def iter_network_allocations(self, **filters):
+        return self.iter_resources(self.network_allocations_uri, **filters)
+
     def show_network_allocation(self, network_id):
         uri = self.network_allocations_path_uri % network_id
         return self.show_resource(uri)
@@ -45,5 +59,14 @@ class ReservableNetworksClient(base.BaseReservableResourceClient):
 
         return self.list_resources(self.network_properties_uri, **kwargs)
 
+    def iter_network_properties(self, detail=None, all=None):
+        kwargs = {}
+        if detail:
+            kwargs["detail"] = True
+        if all:
+            kwargs["all"] = True
+
+        return self.iter_resources(self.network_properties_uri, **kwargs)
+
     def update_network_property(self):
         raise lib_exc.NotImplemented
@@ -0,0 +1,167 @@
+"""Process-wide keep-alive connection pools for the reservation clients.
+
+tempest's http objects send ``connection: close`` and drop their pools after
+every request, so every call to blazar pays for a new TCP and TLS
+handshake. ``get_shared_http`` returns an http object with the same
+``request`` interface that keeps connections open, and is shared by every
+client created with the same TLS and timeout settings. Connections are
+pooled per endpoint (scheme, host and port).
+"""
+
+import collections
+import threading
+import time
+
+import urllib3
+
+from urllib3 import connectionpool
+
+_stats = collections.defaultdict(collections.Counter)
+_stats_lock = threading.Lock()
+
+
+def _record(pool, **counts):
+    key = "%s://%s:%s" % (pool.scheme, pool.host, pool.port)
+    with _stats_lock:
+        _stats[key].update(counts)
+
+
+def get_pool_stats():
+    """Return connection pool statistics for each endpoint.
+
+    For every endpoint this reports the number of requests, new connections
+    (each one a TCP and, for https, TLS handshake), the share of requests
+    that reused a connection, and the total and number of waits for a free
+    connection when the pool is full.
+    """
+    with _stats_lock:
+        stats = {endpoint: dict(counts) for endpoint, counts in _stats.items()}
+
+    for counts in stats.values():
+        requests = counts.get("requests", 0)
+        connections = counts.get("connections", 0)
+        counts["reuse_ratio"] = (
+            (requests - connections) / requests if requests else 0.0
+        )
+        counts.setdefault("wait_time", 0.0)
+        counts.setdefault("waits", 0)
+    return stats
+
+
+def reset_pool_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+class _StatsPoolMixin(object):
+    def _new_conn(self):
+        _record(self, connections=1)
+        return super(_StatsPoolMixin, self)._new_conn()
+
+    def _get_conn(self, timeout=None):
+        # the queue is empty when every connection is checked out
+        if not (self.block and self.pool is not None and self.pool.empty()):
+            return super(_StatsPoolMixin, self)._get_conn(timeout=timeout)
+
+        start = time.perf_counter()
+        try:
+            return super(_StatsPoolMixin, self)._get_conn(timeout=timeout)
+        finally:
+            _record(self, wait_time=time.perf_counter() - start, waits=1)
+
+    def urlopen(self, method, url, *args, **kwargs):
+        _record(self, requests=1)
+        return super(_StatsPoolMixin, self).urlopen(method, url, *args, **kwargs)
+
+
+class _HTTPConnectionPool(_StatsPoolMixin, connectionpool.HTTPConnectionPool):
+    pass
+
+
+class _HTTPSConnectionPool(_StatsPoolMixin, connectionpool.HTTPSConnectionPool):
+    pass
+
+
+class SharedPoolHttp(urllib3.PoolManager):
+    """Keep-alive counterpart of tempest's ``ClosingHttp``."""
+
+    def __init__(
+        self,
+        disable_ssl_certificate_validation=False,
+        ca_certs=None,
+        timeout=None,
+        follow_redirects=True,
+        maxsize=10,
+        block=False,
+    ):
+        self.follow_redirects = follow_redirects
+        kwargs = {"maxsize": maxsize, "block": block}
+
+        if disable_ssl_certificate_validation:
+            urllib3.disable_warnings()
+            kwargs["cert_reqs"] = "CERT_NONE"
+        elif ca_certs:
+            kwargs["cert_reqs"] = "CERT_REQUIRED"
+            kwargs["ca_certs"] = ca_certs
+
+        if timeout:
+            kwargs["timeout"] = timeout
+
+        super(SharedPoolHttp, self).__init__(**kwargs)
+        self.pool_classes_by_scheme = {
+            "http": _HTTPConnectionPool,
+            "https": _HTTPSConnectionPool,
+        }
+
+    def request(self, url, method, *args, **kwargs):
+        class Response(dict):
+            def __init__(self, info):
+                for key, value in info.getheaders().items():
+                    self[str(key).lower()] = value
+                self.status = info.status
+                self["status"] = str(self.status)
+                self.reason = info.reason
+                self.version = info.version
+                self["content-location"] = url
+
+        if self.follow_redirects:
+            retry = urllib3.util.Retry(raise_on_redirect=False, redirect=5)
+        else:
+            retry = urllib3.util.Retry(redirect=False)
+        r = super(SharedPoolHttp, self).request(
+            method, url, retries=retry, *args, **kwargs
+        )
+
+        if not kwargs.get("preload_content", True):
+            # streamed response, the caller has to release_conn() it
+            return r, b""
+        else:
+            return Response(r), r.data
+
+
+_shared_http = {}
+_shared_http_lock = threading.Lock()
+
+
+def get_shared_http(
+    disable_ssl_certificate_validation=False,
+    ca_certs=None,
+    timeout=None,
+    follow_redirects=True,
+    maxsize=10,
+    block=False,
+):
+    """Return the process-wide SharedPoolHttp for these settings."""
+    key = (
+        disable_ssl_certificate_validation,
+        ca_certs,
+        timeout,
+        follow_redirects,
+        maxsize,
+        block,
+    )
+    with _shared_http_lock:
+        http = _shared_http.get(key)
+        if http is None:
+            http = _shared_http[key] = SharedPoolHttp(*key)
+        return http
@@ -0,0 +1,155 @@
+"""Client side rate limiting of reservation API requests.
+
+Token buckets are kept in small state files, locked with ``fcntl.flock``
+while they are updated, so every worker process on a host draws from the
+same buckets. This keeps the total request rate of a parallel tempest run
+under a ceiling, however many workers stestr starts.
+
+A request takes a token from the bucket of its endpoint, and from the
+bucket of each more specific limit that applies to it. Specific limits are
+keyed by verb (``POST``), by resource (``/leases``) or by both
+(``POST /leases``).
+"""
+
+import hashlib
+import os
+import struct
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from blazar_tempest_plugin.services.reservation import retry
+
+DEFAULT_LOCK_DIR = os.path.join(tempfile.gettempdir(), "blazar-tempest-ratelimit")
+
+# tokens and time of the last update, as doubles
+_STATE = struct.Struct("=dd")
+
+
+class FileTokenBucket(object):
+    """Token bucket shared by every process that uses the same path.
+
+    ``rate`` tokens are added per second, up to ``burst``. Tokens are
+    reserved up front: the count may go negative, and ``reserve`` returns
+    how long the caller has to wait before its token is due. This needs a
+    single locked read-modify-write per request, and serves waiting
+    callers in order.
+    """
+
+    def __init__(self, path, rate, burst=None, clock=time.time):
+        self.path = path
+        self.rate = float(rate)
+        self.burst = float(burst or max(1, rate))
+        self.clock = clock
+        # flock only excludes other open files, not threads sharing one
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token, and return the seconds to wait before using it."""
+        with self._lock:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                return self._reserve(fd)
+            finally:
+                os.close(fd)
+
+    def _reserve(self, fd):
+        now = self.clock()
+        data = os.pread(fd, _STATE.size, 0)
+        if len(data) == _STATE.size:
+            tokens, updated_at = _STATE.unpack(data)
+            # a clock that went backwards leaves the bucket as it was
+            elapsed = max(0.0, now - updated_at)
+            tokens = min(self.burst, tokens + elapsed * self.rate)
+        else:
+            tokens = self.burst
+
+        tokens -= 1
+        os.pwrite(fd, _STATE.pack(tokens, now), 0)
+        return max(0.0, -tokens / self.rate)
+
+
+class RateLimiter(object):
+    """Rate limits for the requests a client sends to one endpoint.
+
+    ``rate`` is the ceiling for all requests to the endpoint, in requests
+    per second, and ``limits`` maps verbs and/or resources to lower ones.
+    A rate of 0 means no limit.
+    """
+
+    def __init__(self, endpoint, rate=0, burst=None, limits=None, lock_dir=None):
+        self.endpoint = endpoint
+        self.burst = burst
+        self.lock_dir = lock_dir or DEFAULT_LOCK_DIR
+        os.makedirs(self.lock_dir, exist_ok=True)
+
+        self._buckets = {}
+        if rate:
+            self._buckets[None] = self._bucket(None, rate)
+        for key, key_rate in (limits or {}).items():
+            if float(key_rate):
+                key = self._normalize_key(key)
+                self._buckets[key] = self._bucket(key, key_rate)
+
+    @staticmethod
+    def _normalize_key(key):
+        parts = key.split()
+        verb = next((p.upper() for p in parts if not p.startswith("/")), None)
+        resource = next((p.rstrip("/") for p in parts if p.startswith("/")), None)
+        return verb, resource
+
+    def _bucket(self, key, rate):
+        name = "%s %s" % (self.endpoint, key)
+        digest = hashlib.sha1(name.encode("utf-8")).hexdigest()
+        return FileTokenBucket(
+            os.path.join(self.lock_dir, digest), float(rate), self.burst
+        )
+
+    def _matches(self, key, method, url):
+        if key is None:
+            return True
+        verb, resource = key
+        if verb is not None and verb != method.upper():
+            return False
+        if resource is not None:
+            path = url.split("?", 1)[0]
+            return path == resource or path.startswith(resource + "/")
+        return True
+
+    def reserve(self, method, url):
+        """Take a token from every matching bucket, return the wait."""
+        wait = 0.0
+        for key, bucket in self._buckets.items():
+            if self._matches(key, method, url):
+                wait = max(wait, bucket.reserve())
+        if wait:
+            retry.record(rate_limited=1, rate_limit_wait=wait)
+        return wait
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(endpoint, rate=0, burst=None, limits=None, lock_dir=None):
+    """Return the process-wide rate limiter of an endpoint, or None.
+
+    None is returned when no limit is configured.
+    """
+    if not rate and not any(float(r) for r in (limits or {}).values()):
+        return None
+    key = (endpoint, rate, burst, tuple(sorted((limits or {}).items())), lock_dir)
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = _limiters[key] = RateLimiter(
+                endpoint, rate, burst, limits, lock_dir
+            )
+        return limiter
@@ -0,0 +1,207 @@
+"""Retry and circuit breaker policy for the reservation clients.
+
+Blazar answers with transient 5xx responses while it is busy.
+``RetryPolicy`` decides which failed requests can safely be sent again and
+how long to wait in between, and a ``CircuitBreaker`` per endpoint stops
+sending requests to an API that keeps failing. Both are off by default.
+
+Retries and breaker activity are recorded against the running test, see
+``get_retry_stats``.
+"""
+
+import collections
+import random
+import threading
+import time
+
+from oslo_log import log as logging
+
+from blazar_tempest_plugin.common import context
+from blazar_tempest_plugin.common import exceptions
+
+LOG = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "OPTIONS", "DELETE"])
+
+_stats = collections.defaultdict(collections.Counter)
+_stats_lock = threading.Lock()
+
+
+def record(**counts):
+    """Add to the retry counters of the running test."""
+    with _stats_lock:
+        _stats[context.get_current_test()].update(counts)
+
+
+def get_retry_stats(test_id=None):
+    """Return the retry counters of one test, or of every test by id.
+
+    Counters are ``retries``, ``retry_wait`` (seconds spent sleeping before
+    retries), ``breaker_trips`` and ``breaker_rejections`` (requests failed
+    without being sent because a breaker was open), and ``rate_limited``
+    and ``rate_limit_wait`` for requests held back by the rate limiter.
+    Requests made by a test class's fixtures are recorded under the class's
+    id, and requests made outside of any test class under the None id.
+    """
+    with _stats_lock:
+        if test_id is not None:
+            return dict(_stats.get(test_id, {}))
+        return {test: dict(counts) for test, counts in _stats.items()}
+
+
+def reset_retry_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+class RetryPolicy(object):
+    """Which requests to retry, and how long to wait before each retry.
+
+    Delays follow exponential backoff with decorrelated jitter: each delay
+    is drawn between ``base_delay`` and three times the previous one, capped
+    at ``max_delay``. A ``Retry-After`` delay from the server is used
+    instead when it is longer.
+    """
+
+    def __init__(
+        self,
+        max_attempts=1,
+        base_delay=1,
+        max_delay=30,
+        statuses=(500, 502, 503, 504),
+        retry_put=False,
+    ):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.statuses = frozenset(int(status) for status in statuses)
+        self.methods = IDEMPOTENT_METHODS | (
+            frozenset(["PUT"]) if retry_put else frozenset()
+        )
+
+    def should_retry(self, method, attempt, status=None):
+        """Whether to retry after attempt number ``attempt`` failed.
+
+        ``status`` is the response status, or None if no response was
+        received at all.
+        """
+        if attempt >= self.max_attempts or method.upper() not in self.methods:
+            return False
+        return status is None or status in self.statuses
+
+    def next_delay(self, previous_delay=None, retry_after=None):
+        previous_delay = previous_delay or self.base_delay
+        delay = min(
+            self.max_delay, random.uniform(self.base_delay, previous_delay * 3)
+        )
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+
+class CircuitBreaker(object):
+    """Fail fast while an endpoint keeps failing.
+
+    After ``failure_threshold`` consecutive failures the breaker opens, and
+    requests are rejected without being sent. Once ``reset_timeout`` seconds
+    have passed a single trial request is let through: the breaker closes
+    again if it succeeds, and re-opens if it fails.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, endpoint, failure_threshold=5, reset_timeout=60,
+                 clock=time.monotonic):
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_request(self):
+        """Raise CircuitOpenException unless a request may be sent."""
+        if not self.failure_threshold:
+            return
+        with self._lock:
+            if self.state == self.OPEN:
+                if self.clock() - self.opened_at >= self.reset_timeout:
+                    self.state = self.HALF_OPEN
+                    self._trial_in_flight = False
+
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            if self.state == self.CLOSED:
+                return
+
+            retry_in = max(0, self.opened_at + self.reset_timeout - self.clock())
+        record(breaker_rejections=1)
+        raise exceptions.CircuitOpenException(
+            endpoint=self.endpoint, failures=self.failures, retry_in=retry_in
+        )
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        if not self.failure_threshold:
+            return
+        with self._lock:
+            self.failures += 1
+            tripped = self.state == self.HALF_OPEN or (
+                self.state == self.CLOSED
+                and self.failures >= self.failure_threshold
+            )
+            if tripped:
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+                self._trial_in_flight = False
+        if tripped:
+            LOG.warning(
+                "Circuit breaker for %s opened after %d failures",
+                self.endpoint,
+                self.failures,
+            )
+            record(breaker_trips=1)
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(endpoint, failure_threshold=5, reset_timeout=60):
+    """Return the process-wide circuit breaker of an endpoint."""
+    with _breakers_lock:
+        breaker = _breakers.get(endpoint)
+        if breaker is None:
+            breaker = _breakers[endpoint] = CircuitBreaker(
+                endpoint, failure_threshold, reset_timeout
+            )
+        return breaker
+
+
+# statuses of a gateway or service that is down or overloaded
+BREAKER_STATUSES = frozenset([502, 503, 504])
+
+
+def is_breaker_failure(method, status, methods=IDEMPOTENT_METHODS):
+    """Whether a failed request counts as a failure of the endpoint.
+
+    Only connection failures, with a None ``status``, and gateway errors
+    of the retryable ``methods`` count. Blazar also answers a lease that
+    cannot get its hardware with a 500, which says nothing about the
+    health of the endpoint.
+    """
+    if status is None:
+        return True
+    return method.upper() in methods and status in BREAKER_STATUSES
@@ -1,8 +1,12 @@
+import time
+
 from oslo_log import log as logging
 from tempest import config, test
+from tempest.lib import exceptions as lib_exc
 from tempest.lib.common.utils import data_utils, test_utils
 
-from blazar_tempest_plugin.common import utils, waiters
+from blazar_tempest_plugin.common import admission, context, history, utils, waiters
+from blazar_tempest_plugin.services.reservation import retry
 
 from zun_tempest_plugin.tests.tempest.api.clients import (
     ZunClient,
@@ -17,6 +21,9 @@ LOG = logging.getLogger(__name__)
 
 class ReservationApiTest(test.BaseTestCase):
     credentials = ["primary"]
+    # reservable hardware held while the class runs, e.g.
+    # {"device:raspberrypi4-64": 1}; see common.admission
+    resource_demand = {}
 
     @classmethod
     def skip_checks(cls):
@@ -25,6 +32,26 @@ class ReservationApiTest(test.BaseTestCase):
             skip_msg = "Blazar is disabled"
             raise cls.skipException(skip_msg)
 
+    @classmethod
+    def setUpClass(cls):
+        cls._class_started = time.time()
+        context.set_current_test(context.class_id(cls))
+        super(ReservationApiTest, cls).setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        context.set_current_test(context.class_id(cls))
+        try:
+            super(ReservationApiTest, cls).tearDownClass()
+        finally:
+            context.set_current_test(None)
+            history.record(
+                CONF.reservation.duration_history,
+                history.CLASS,
+                context.class_id(cls),
+                time.time() - cls._class_started,
+            )
+
     @classmethod
     def setup_credentials(cls):
         cls.set_network_resources()
@@ -35,6 +62,40 @@ class ReservationApiTest(test.BaseTestCase):
         super(ReservationApiTest, cls).setup_clients()
         cls.leases_client = cls.os_primary.reservation.LeasesClient()
 
+    @classmethod
+    def resource_setup(cls):
+        super(ReservationApiTest, cls).resource_setup()
+        if cls.resource_demand and CONF.reservation.admission_control:
+            admission.admit_test_class(
+                cls,
+                cls.os_primary,
+                lock_dir=CONF.reservation.admission_lock_dir,
+                poll_interval=CONF.reservation.admission_poll_interval,
+                timeout=CONF.reservation.admission_timeout,
+                refresh_interval=CONF.reservation.admission_refresh_interval,
+            )
+
+    def setUp(self):
+        super(ReservationApiTest, self).setUp()
+        context.set_current_test(self.id())
+        # runs last, once the test's own cleanups are done
+        self.addCleanup(context.set_current_test, context.class_id(type(self)))
+        self.addCleanup(self._record_duration, time.time())
+        self.addCleanup(self._log_retry_stats)
+
+    def _log_retry_stats(self):
+        stats = retry.get_retry_stats(self.id())
+        if stats:
+            LOG.info("Reservation API retries for %s: %s", self.id(), stats)
+
+    def _record_duration(self, started):
+        history.record(
+            CONF.reservation.duration_history,
+            history.TEST,
+            self.id(),
+            time.time() - started,
+        )
+
     def create_test_lease(self, lease_name=None, **kwargs):
         """Create a test lease with sane defaults for name and dates."""
 
@@ -50,6 +111,7 @@ class ReservationApiTest(test.BaseTestCase):
 
         lease_body = self.leases_client.create_lease(**kwargs)
         lease = lease_body["lease"]
+        admission.note_lease(type(self), lease["id"])
 
         self.addCleanup(
             test_utils.call_and_ignore_notfound_exc,
@@ -66,8 +128,33 @@ class ReservationApiTest(test.BaseTestCase):
         )
 
 
+def dedicated_container(test):
+    """Give a test of a share_container class its own lease and container.
+
+    For tests that delete or change their container or lease, so the tests
+    sharing the class's container never see the change.
+    """
+    test.dedicated_container = True
+    return test
+
+
 class ContainerApiBase(ReservationApiTest):
-    """Base class for container API tests."""
+    """Base class for container API tests.
+
+    Classes setting ``share_container`` run their tests against one device
+    lease and container, created by resource_setup and deleted by class
+    resource cleanups. Tests marked with dedicated_container still get
+    their own, so such a class can hold two devices at once.
+    """
+
+    resource_demand = {"device:raspberrypi4-64": 1}
+    share_container = False
+    shared_container_name = "reservation-container"
+    # how long the shared container runs, which must cover the class's tests
+    shared_container_sleep = 3600
+    # the shared device lease ends this many seconds after its container
+    shared_lease_margin = 600
+    _shared_container = None
 
     @classmethod
     def skip_checks(cls):
@@ -83,6 +170,68 @@ class ContainerApiBase(ReservationApiTest):
         cls.request_microversion = CONF.container_service.min_microversion
         set_container_service_api_microversion(cls.request_microversion)
 
+    @classmethod
+    def resource_setup(cls):
+        super(ContainerApiBase, cls).resource_setup()
+        if cls.share_container:
+            cls.addClassResourceCleanup(setattr, cls, "_shared_container", None)
+            lease = cls._reserve_shared_device()
+            hints = {"reservation": utils.get_device_reservation_from_lease(lease)}
+            container = cls._create_shared_container(hints)
+            cls._shared_container = (lease, hints, container)
+
+    @classmethod
+    def _reserve_shared_device(cls):
+        """Reserve the device of the shared container, outliving it."""
+        lease = cls.leases_client.create_lease(
+            name=cls.get_resource_name("-shared-lease"),
+            start_date="now",
+            end_date=utils.time_offset_to_blazar_string(
+                seconds=cls.shared_container_sleep + cls.shared_lease_margin
+            ),
+            reservations=[cls._device_reservation_request()],
+        )["lease"]
+        admission.note_lease(cls, lease["id"])
+        cls.addClassResourceCleanup(
+            test_utils.call_and_ignore_notfound_exc,
+            cls.leases_client.delete_lease,
+            lease["id"],
+        )
+        active_lease = waiters.get_lease_watcher(cls.leases_client).wait_for_lease_status(
+            lease["id"], "ACTIVE"
+        )
+        if active_lease is None:
+            raise lib_exc.TimeoutException(
+                "Lease %s did not become ACTIVE" % lease["id"]
+            )
+        return active_lease
+
+    @classmethod
+    def _create_shared_container(cls, hints):
+        gen_model = datagen.container_data(
+            default_data={},
+            name=data_utils.rand_name(cls.shared_container_name),
+            hints=hints,
+            image="busybox",
+            command="/bin/sh -c 'echo hello-from-container && "
+            f"sleep {cls.shared_container_sleep}'",
+        )
+        resp, container = cls.container_client.post_container(gen_model)
+        cls.addClassResourceCleanup(
+            test_utils.call_and_ignore_notfound_exc,
+            cls.container_client.delete_container,
+            container.uuid,
+            {"stop": True},
+        )
+        if resp.status != 202:
+            raise lib_exc.UnexpectedResponseCode(
+                "Creating the shared container returned %s" % resp.status
+            )
+        cls.container_client.ensure_container_in_desired_state(
+            container.uuid, "Running"
+        )
+        return container
+
     def _create_container(self, desired_state="Running", **kwargs):
         gen_model = datagen.container_data(default_data={}, **kwargs)
         resp, model = self.container_client.post_container(gen_model)
@@ -111,25 +260,42 @@ class ContainerApiBase(ReservationApiTest):
         if end_date is None:
             end_date = utils.time_offset_to_blazar_string(hours=1)
 
-        device_reservation_request = {
-            "resource_type": "device",
-            "min": "1",
-            "max": "1",
-            "resource_properties": '["==", "$machine_name", "raspberrypi4-64"]',
-        }
-
         lease = self.create_test_lease(
             start_date=start_date,
             end_date=end_date,
-            reservations=[device_reservation_request],
+            reservations=[self._device_reservation_request()],
         )
 
-        final_lease = waiters.wait_for_lease_status(
-            leases_client, lease["id"], lease_status
+        final_lease = waiters.get_lease_watcher(leases_client).wait_for_lease_status(
+            lease["id"], lease_status
         )
 
         return final_lease
 
+    @staticmethod
+    def _device_reservation_request():
+        return {
+            "resource_type": "device",
+            "min": "1",
+            "max": "1",
+            "resource_properties": '["==", "$machine_name", "raspberrypi4-64"]',
+        }
+
+    def _setup_container(self, name="reservation-container", sleep=60):
+        """Set self.lease, self.hints and self.container for the test."""
+        dedicated = getattr(
+            getattr(self, self._testMethodName), "dedicated_container", False
+        )
+        if not self.share_container or dedicated:
+            self.lease = self._reserve_device()
+            self.hints = {
+                "reservation": utils.get_device_reservation_from_lease(self.lease)
+            }
+            self.container = self._create_reserved_container(name, self.hints, sleep=sleep)
+            return
+
+        self.lease, self.hints, self.container = type(self)._shared_container
+
     def _create_reserved_container(
         self, name, hints, desired_state="Running", sleep=60
     ):
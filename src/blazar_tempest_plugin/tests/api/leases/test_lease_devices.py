@@ -7,20 +7,24 @@ from tempest.lib import decorators
 from blazar_tempest_plugin.common import utils
 from blazar_tempest_plugin.common import waiters
 from blazar_tempest_plugin.tests.api.base import ContainerApiBase
+from blazar_tempest_plugin.tests.api.base import dedicated_container
 
 
 class TestLeaseContainers(ContainerApiBase):
     """Test leases for containers on chi@edge."""
 
+    share_container = True
+    # the shared container, and one for a test changing its lease
+    resource_demand = {"device:raspberrypi4-64": 2}
+
     def setUp(self):
         super(TestLeaseContainers, self).setUp()
-        self.lease = self._reserve_device()
-        self.hints = {"reservation": utils.get_device_reservation_from_lease(self.lease)}
-        self.container = self._create_reserved_container("reservation-container", self.hints)
+        self._setup_container()
         _, container = self.container_client.get_container(self.container.uuid)
         self.assertEqual("Running", container.status)
 
     @decorators.attr(type="smoke")
+    @dedicated_container
     def test_extend_lease_for_reserved_container(self):
         """Test extending a lease that has a reserved container."""
 
@@ -45,6 +49,7 @@ class TestLeaseContainers(ContainerApiBase):
         )
 
     @decorators.attr(type="smoke")
+    @dedicated_container
     def test_delete_lease_with_container(self):
         """Test deleting a lease with an associated container also deletes the container."""
 
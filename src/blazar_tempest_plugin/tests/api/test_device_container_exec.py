@@ -14,7 +14,6 @@ import websocket
 
 from tempest.lib import decorators
 
-from blazar_tempest_plugin.common import utils
 from blazar_tempest_plugin.tests.api.base import ContainerApiBase
 
 
@@ -31,15 +30,15 @@ WS_READ_TIMEOUT = 30
 class TestReservationContainerExecInteractive(ContainerApiBase):
     """Assert the interactive exec websocket stream is cleanly demultiplexed."""
 
+    # the exec probes only read from the container
+    share_container = True
+    shared_container_name = "exec-ws-container"
+
     def setUp(self):
         super(TestReservationContainerExecInteractive, self).setUp()
-        self.lease = self._reserve_device()
-        hints = {"reservation": utils.get_device_reservation_from_lease(self.lease)}
-        # Long sleep so the container outlives the exec session plus the
-        # ~330 KB large-output probe.
-        self.container = self._create_reserved_container(
-            "exec-ws-container", hints, sleep=600
-        )
+        # The shared container sleeps long enough to outlive the exec
+        # sessions plus the ~330 KB large-output probe.
+        self._setup_container("exec-ws-container")
 
     def _run_exec_probe(self, command):
         """Handshake, connect to the proxy websocket, drain and return bytes."""
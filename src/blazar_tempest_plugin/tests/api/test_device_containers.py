@@ -7,19 +7,21 @@ import urllib.parse
 from tempest.lib import exceptions
 from tempest.lib import decorators
 
-from blazar_tempest_plugin.common import utils
 from blazar_tempest_plugin.tests.api.base import ContainerApiBase
+from blazar_tempest_plugin.tests.api.base import dedicated_container
 from zun_tempest_plugin.tests.tempest.api.clients import set_container_service_api_microversion
 
 
 class TestReservationContainerApi(ContainerApiBase):
     """Test containers API on CHI@Edge."""
 
+    share_container = True
+    # the shared container, and one for test_delete_container
+    resource_demand = {"device:raspberrypi4-64": 2}
+
     def setUp(self):
         super(TestReservationContainerApi, self).setUp()
-        self.lease = self._reserve_device()
-        self.hints = {"reservation": utils.get_device_reservation_from_lease(self.lease)}
-        self.container = self._create_reserved_container("reservation-container", self.hints)
+        self._setup_container()
         self.minimum_archive_api_microversion = "1.25"
 
     @decorators.attr(type="smoke")
@@ -43,6 +45,7 @@ class TestReservationContainerApi(ContainerApiBase):
         self.assertIn(self.container.uuid, uuids)
 
     @decorators.attr(type="smoke")
+    @dedicated_container
     def test_delete_container(self):
         """Test deleting a container."""
         del_resp = self.container_client.delete_container(
@@ -3,20 +3,38 @@ import time
 from oslo_log import log as logging
 from tempest import config
 from tempest.common import waiters as lib_waiters
+from tempest.common.utils.linux import remote_client
 from tempest.lib import exceptions as lib_exc
 from tempest.lib.common.utils import data_utils, test_utils
 from tempest.scenario import manager
 
-from blazar_tempest_plugin.common import utils, waiters
+from blazar_tempest_plugin.common import (
+    admission,
+    context,
+    history,
+    lease_pool,
+    ssh_cache,
+    timeline,
+    utils,
+    waiters,
+)
+from blazar_tempest_plugin.services.reservation import retry
 
 CONF = config.CONF
 LOG = logging.getLogger(__name__)
 
 
+def _project_id(client):
+    return client.auth_provider.credentials.project_id
+
+
 class ReservationScenarioTest(manager.ScenarioTest):
     """Base class for scenario tests focused on reservable resources."""
 
     credentials = ["primary"]
+    # reservable hardware held while the class runs, e.g.
+    # {"device:raspberrypi4-64": 1}; see common.admission
+    resource_demand = {}
 
     @classmethod
     def skip_checks(cls):
@@ -29,6 +47,26 @@ class ReservationScenarioTest(manager.ScenarioTest):
                     f"Invalid reservation_type: {CONF.reservation.reservation_type}"
                 )
 
+    @classmethod
+    def setUpClass(cls):
+        cls._class_started = time.time()
+        context.set_current_test(context.class_id(cls))
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        context.set_current_test(context.class_id(cls))
+        try:
+            super().tearDownClass()
+        finally:
+            context.set_current_test(None)
+            history.record(
+                CONF.reservation.duration_history,
+                history.CLASS,
+                context.class_id(cls),
+                time.time() - cls._class_started,
+            )
+
     @classmethod
     def setup_credentials(cls):
         cls.set_network_resources()
@@ -40,12 +78,139 @@ class ReservationScenarioTest(manager.ScenarioTest):
         cls.leases_client = cls.os_primary.reservation.LeasesClient()
         cls.flavors_client = cls.os_primary.compute.FlavorsClient()
 
+    @classmethod
+    def resource_setup(cls):
+        super().resource_setup()
+        if CONF.reservation.lease_pool_size and CONF.auth.use_dynamic_credentials:
+            # pooled leases cannot outlive the projects they belong to
+            for name in ("os_primary", "os_alt"):
+                clients = getattr(cls, name, None)
+                if clients is not None:
+                    cls.addClassResourceCleanup(
+                        cls._lease_pool().drain, clients.credentials.project_id
+                    )
+        if cls.resource_demand and CONF.reservation.admission_control:
+            admission.admit_test_class(
+                cls,
+                cls.os_primary,
+                lock_dir=CONF.reservation.admission_lock_dir,
+                poll_interval=CONF.reservation.admission_poll_interval,
+                timeout=CONF.reservation.admission_timeout,
+                refresh_interval=CONF.reservation.admission_refresh_interval,
+            )
+
     def get_resource_name(self, prefix):
         return data_utils.rand_name(
             prefix=CONF.resource_name_prefix,
             name=self.__class__.__name__ + prefix,
         )
 
+    def setUp(self):
+        super().setUp()
+        context.set_current_test(self.id())
+        # runs last, once the test's own cleanups are done
+        self.addCleanup(context.set_current_test, context.class_id(type(self)))
+        self.addCleanup(self._record_duration, time.time())
+        self.addCleanup(self._log_retry_stats)
+
+    def _log_retry_stats(self):
+        stats = retry.get_retry_stats(self.id())
+        if stats:
+            LOG.info("Reservation API retries for %s: %s", self.id(), stats)
+
+    def _record_duration(self, started):
+        history.record(
+            CONF.reservation.duration_history,
+            history.TEST,
+            self.id(),
+            time.time() - started,
+        )
+
+    @property
+    def timeline(self):
+        """The provisioning timeline of this test, see common.timeline.
+
+        It is written out when the test's cleanups run.
+        """
+        if getattr(self, "_timeline", None) is None:
+            self._timeline = timeline.Timeline(self.id())
+            self.addCleanup(self._timeline.finish, CONF.reservation.timeline_file)
+        return self._timeline
+
+    def create_server(self, name=None, wait_until="ACTIVE", clients=None, **kwargs):
+        """Create a server, recording its provisioning on the timeline."""
+        if not CONF.reservation.provisioning_timeline:
+            return super().create_server(
+                name=name, wait_until=wait_until, clients=clients, **kwargs
+            )
+
+        # the observer finds the server by name while create_server blocks
+        if name is None:
+            name = data_utils.rand_name(
+                prefix=CONF.resource_name_prefix,
+                name=self.__class__.__name__ + "-server",
+            )
+        self.timeline.mark("server_created", name=name)
+        if not wait_until:
+            return super().create_server(
+                name=name, wait_until=wait_until, clients=clients, **kwargs
+            )
+
+        clients = clients or self.os_primary
+        observer = timeline.ProvisioningObserver(
+            self.timeline,
+            clients,
+            name,
+            interval=clients.servers_client.build_interval,
+        )
+        with observer:
+            return super().create_server(
+                name=name, wait_until=wait_until, clients=clients, **kwargs
+            )
+
+    def _mark_ssh_login(self, linux_client):
+        # get_remote_client only returns once a login succeeded
+        if CONF.reservation.provisioning_timeline:
+            self.timeline.mark("ssh_login", host=linux_client.ssh_client.host)
+        return linux_client
+
+    def get_remote_client(self, ip_address, username=None, private_key=None,
+                          server=None):
+        """Get an SSH client to a server, sharing its connection.
+
+        With [reservation] ssh_connection_cache, remote clients for the
+        same server, user and key share one connection, see
+        common.ssh_cache. The first login is marked on the timeline.
+        """
+        if not CONF.reservation.ssh_connection_cache:
+            return self._mark_ssh_login(super().get_remote_client(
+                ip_address, username=username, private_key=private_key,
+                server=server,
+            ))
+
+        if username is None:
+            username = CONF.validation.image_ssh_user
+        if CONF.validation.auth_method == "keypair":
+            password = None
+            if private_key is None:
+                private_key = self.keypair["private_key"]
+        else:
+            password = CONF.validation.image_ssh_password
+            private_key = None
+        linux_client = remote_client.RemoteClient(
+            ip_address, username, pkey=private_key, password=password,
+            server=server, servers_client=self.servers_client,
+        )
+        cache = ssh_cache.get_connection_cache(CONF.reservation.ssh_keepalive_interval)
+        linux_client.ssh_client = ssh_cache.CachedSSHClient.from_client(
+            linux_client.ssh_client, cache
+        )
+        # registered after the server's deletion, so it runs first: the
+        # floating IP may go to another server once this one is deleted
+        self.addCleanup(cache.discard, ip_address)
+        linux_client.validate_authentication()
+        return self._mark_ssh_login(linux_client)
+
     def create_test_lease(self, leases_client=None, lease_name=None, **kwargs):
         """Create a test lease with sane defaults for name and dates.
         Lease will be in the far future to ensure no conflicts."""
@@ -66,8 +231,9 @@ class ReservationScenarioTest(manager.ScenarioTest):
 
         lease_body = leases_client.create_lease(**kwargs)
         lease = lease_body["lease"]
+        admission.note_lease(type(self), lease["id"])
 
-        self.addCleanup(waiters.wait_for_lease_termination, leases_client, lease["id"])
+        self._track_lease_termination(leases_client, lease["id"])
 
         self.addCleanup(
             test_utils.call_and_ignore_notfound_exc,
@@ -76,6 +242,20 @@ class ReservationScenarioTest(manager.ScenarioTest):
         )
         return lease
 
+    def _track_lease_termination(self, leases_client, lease_id):
+        """Wait for all of this test's leases to terminate in one cleanup.
+
+        The cleanup is registered with the first lease for each client, so it
+        runs after every lease delete registered later on.
+        """
+        if not hasattr(self, "_leases_to_terminate"):
+            self._leases_to_terminate = {}
+
+        if leases_client not in self._leases_to_terminate:
+            lease_ids = self._leases_to_terminate[leases_client] = set()
+            self.addCleanup(waiters.wait_for_leases_termination, leases_client, lease_ids)
+        self._leases_to_terminate[leases_client].add(lease_id)
+
     def _reserve_physical_host(self, leases_client=None, node_type=None):
         """Create a lease for a physical host and wait for it to become active.
         Returns the reservation to be used for scheduling.
@@ -85,32 +265,94 @@ class ReservationScenarioTest(manager.ScenarioTest):
         if not leases_client:
             leases_client = self.leases_client
 
+        return self._reserve_active_lease(
+            leases_client, self._host_reservation_request(node_type), node_type
+        )
+
+    @staticmethod
+    def _host_reservation_request(node_type=None, count=1):
+        """Return a physical:host reservation for ``count`` hosts."""
         resource_properties = ""
         if node_type:
             resource_properties = f'[ "==", "$node_type", "{node_type}" ]'
 
-        host_reservation_request = {
-            "min": "1",
-            "max": "1",
+        return {
+            "min": str(count),
+            "max": str(count),
             "resource_type": "physical:host",
             "hypervisor_properties": "",
             "resource_properties": resource_properties,
         }
 
-        end_date = utils.time_offset_to_blazar_string(hours=1)
-        lease = self.create_test_lease(
-            leases_client=leases_client,
-            start_date="now",
-            end_date=end_date,
-            reservations=[host_reservation_request],
-        )
+    def _reserve_active_lease(self, leases_client, reservation, pool_key=None):
+        """Create a lease starting now for one reservation, and wait for ACTIVE.
 
-        active_lease = waiters.wait_for_lease_status(
-            leases_client, lease["id"], "ACTIVE"
-        )
+        With [reservation] lease_pool_size set, a lease of a pooled resource
+        type is borrowed from the process's pool of ACTIVE leases for the
+        same project, resource type and ``pool_key`` instead, and given back
+        after the test's servers are deleted.
+        """
+        if (
+            not CONF.reservation.lease_pool_size
+            or reservation["resource_type"] not in lease_pool.POOLED_RESOURCE_TYPES
+        ):
+            lease = self.create_test_lease(
+                leases_client=leases_client,
+                start_date="now",
+                end_date=utils.time_offset_to_blazar_string(hours=1),
+                reservations=[reservation],
+            )
+            return self._wait_for_active_lease(leases_client, lease)
+
+        def create():
+            lease = leases_client.create_lease(
+                name=self.get_resource_name("-pooled-lease"),
+                start_date="now",
+                end_date=utils.time_offset_to_blazar_string(
+                    seconds=CONF.reservation.lease_pool_lease_duration
+                ),
+                reservations=[reservation],
+            )["lease"]
+            try:
+                return self._wait_for_active_lease(leases_client, lease)
+            except Exception:
+                test_utils.call_and_ignore_notfound_exc(
+                    leases_client.delete_lease, lease["id"]
+                )
+                raise
+
+        pool = self._lease_pool()
+        key = (_project_id(leases_client), reservation["resource_type"], pool_key)
+        lease = pool.borrow(key, leases_client, create)
+        admission.note_lease(type(self), lease["id"])
+        self.timeline.note("lease_borrowed", lease_id=lease["id"])
+        # registered before any server is created, so it runs after their
+        # deletion has completed
+        self.addCleanup(pool.give_back, lease["id"])
+        return lease
 
+    def _wait_for_active_lease(self, leases_client, lease):
+        self.timeline.mark("lease_created", lease_id=lease["id"])
+        active_lease = waiters.get_lease_watcher(leases_client).wait_for_lease_status(
+            lease["id"], "ACTIVE"
+        )
+        if active_lease is None:
+            # the waiters return None on timeout, but there is nothing to
+            # boot on without an active lease
+            raise lib_exc.TimeoutException(
+                "Lease %s did not become ACTIVE" % lease["id"]
+            )
+        self.timeline.mark("lease_active", lease_id=lease["id"])
         return active_lease
 
+    @staticmethod
+    def _lease_pool():
+        return lease_pool.get_lease_pool(
+            CONF.reservation.lease_pool_size,
+            min_remaining=CONF.reservation.lease_pool_min_remaining,
+            duration=CONF.reservation.lease_pool_lease_duration,
+        )
+
     def _get_host_reservation(self, lease):
         for res in lease["reservations"]:
             if res["resource_type"] == "physical:host":
@@ -133,20 +375,10 @@ class ReservationScenarioTest(manager.ScenarioTest):
             "flavor_id": flavor_id,
         }
 
-        end_date = utils.time_offset_to_blazar_string(hours=1)
-        lease = self.create_test_lease(
-            leases_client=leases_client,
-            start_date="now",
-            end_date=end_date,
-            reservations=[flavor_reservation_request],
-        )
-
-        active_lease = waiters.wait_for_lease_status(
-            leases_client, lease["id"], "ACTIVE"
+        return self._reserve_active_lease(
+            leases_client, flavor_reservation_request, flavor_id
         )
 
-        return active_lease
-
     def _get_flavor_reservation(self, lease):
         """Get the reservation ID for a flavor reservation from a lease."""
         for res in lease["reservations"]:
@@ -21,6 +21,7 @@ class ReservationZunTest(ReservationScenarioTest):
 
     # override so as to not use admin credentials
     credentials = ["primary"]
+    resource_demand = {"device:raspberrypi4-64": 1}
 
     @classmethod
     def skip_checks(cls):
@@ -1,5 +1,8 @@
+import collections
 import sys
+import threading
 
+from concurrent import futures
 from enum import Enum
 
 from oslo_log import log as logging
@@ -9,10 +12,12 @@ from tempest.lib import decorators
 from tempest.lib import exceptions as tempest_exc
 from tempest.lib.common.utils import test_utils
 
+from blazar_tempest_plugin.common import remote_checks
+from blazar_tempest_plugin.common import ssh_cache
+from blazar_tempest_plugin.common import utils
 from blazar_tempest_plugin.common import waiters
 from blazar_tempest_plugin.common.utils import get_server_floating_ip
 from blazar_tempest_plugin.common.utils import should_skip
-from blazar_tempest_plugin.common.utils import wait_for_remote_file
 from blazar_tempest_plugin.tests.scenario.base import ReservationScenarioTest
 
 
@@ -27,66 +32,505 @@ class AlertLevel(Enum):
 
 ### Tests ###
 
-def verify_cloud_init(self, remote):
-    output = remote.exec_command('cloud-init status --wait')
-    if "status: done" not in output:
-        self.fail(f"cloud-init did not finish properly.\nOutput:\n{output}")
+# Each test asserts on the results of its remote checks, which are run for
+# every test of a class at once, see common.remote_checks: each blocking
+# wait in its own exec, then the quick checks in one batch.
 
-    output = remote.exec_command('cloud-init status --long')
-    if "status: done" not in output:
-        self.fail(f"cloud-init did not finish properly.\nOutput:\n{output}")
+# seconds left to tempest's SSH exec timeout by waits on the server, so
+# theirs expire first and report why
+SSH_TIMEOUT_MARGIN = 30
 
 
-def verify_openrc_exists(self, remote):
-    self.assertTrue(
-        wait_for_remote_file(remote, CONF.image.cc_image_tests_openrc_path),
-        f"{CONF.image.cc_image_tests_openrc_path} did not appear within timeout"
+def remote_wait_timeout():
+    """Return how long a wait on the server may take within one SSH exec."""
+    return max(CONF.validation.ssh_timeout - SSH_TIMEOUT_MARGIN, 1)
+
+
+def openrc_exists_check():
+    return remote_checks.Check(
+        "openrc_exists",
+        remote_checks.wait_for_file(
+            CONF.image.cc_image_tests_openrc_path,
+            timeout=min(30, remote_wait_timeout()),
+        ),
+        blocking=True,
     )
 
 
-def verify_openrc(self, remote):
+def cloud_init_checks():
+    return [
+        remote_checks.Check(
+            "cloud_init_wait",
+            remote_checks.wait_for_command(
+                "cloud-init status --wait", timeout=remote_wait_timeout()
+            ),
+            blocking=True,
+        ),
+        remote_checks.Check("cloud_init_long", "cloud-init status --long"),
+    ]
+
+
+def verify_cloud_init(self, results):
+    for name in ("cloud_init_wait", "cloud_init_long"):
+        output = self.check_result(results, name).stdout
+        if "status: done" not in output:
+            self.fail(f"cloud-init did not finish properly.\nOutput:\n{output}")
+
+
+def openrc_checks():
+    return [openrc_exists_check()]
+
+
+def verify_openrc_exists(self, results):
     self.assertTrue(
-        wait_for_remote_file(remote, CONF.image.cc_image_tests_openrc_path),
+        self.check_result(results, "openrc_exists").ok,
         f"{CONF.image.cc_image_tests_openrc_path} did not appear within timeout"
     )
-    output = remote.exec_command(
-        f'bash -c "source {CONF.image.cc_image_tests_openrc_path} && openstack token issue -f value -c id" || echo FAILED'
-    )
-    self.assertNotIn("FAILED", output, f"Failed to source {CONF.image.cc_image_tests_openrc_path} or run OpenStack command.")
-    self.assertTrue(output.strip(), "OpenStack command produced no output — openrc may not have been sourced correctly.")
 
 
-def verify_ssh_key_injection(self, remote, public_key):
-    output = remote.exec_command('cat /home/cc/.ssh/authorized_keys || echo MISSING')
-    self.assertNotIn("MISSING", output, "Could not read /home/cc/.ssh/authorized_keys")
+def openrc_token_checks():
+    return [
+        openrc_exists_check(),
+        remote_checks.Check(
+            "openrc_token",
+            f'bash -c "source {CONF.image.cc_image_tests_openrc_path} && '
+            f'openstack token issue -f value -c id"',
+        ),
+    ]
+
+
+def verify_openrc(self, results):
+    verify_openrc_exists(self, results)
+    result = self.check_result(results, "openrc_token")
+    self.assertTrue(result.ok, f"Failed to source {CONF.image.cc_image_tests_openrc_path} or run OpenStack command.\nOutput:\n{result.stdout}")
+    self.assertTrue(result.stdout.strip(), "OpenStack command produced no output — openrc may not have been sourced correctly.")
+
+
+def ssh_key_checks():
+    return [
+        remote_checks.Check("authorized_keys", "cat /home/cc/.ssh/authorized_keys"),
+    ]
+
+
+def verify_ssh_key_injection(self, results):
+    result = self.check_result(results, "authorized_keys")
+    self.assertTrue(result.ok, "Could not read /home/cc/.ssh/authorized_keys")
+
+    pubkey_str = type(self).public_key.strip()
+    auth_keys = result.stdout.strip().splitlines()
+    self.assertIn(pubkey_str, auth_keys, f"Expected pubkey not found.\nGot:\n{result.stdout}")
 
-    pubkey_str = public_key.strip()
-    auth_keys = output.strip().splitlines()
-    self.assertIn(pubkey_str, auth_keys, f"Expected pubkey not found.\nGot:\n{output}")
 
+def object_store_checks():
+    return [
+        remote_checks.Check("which_rclone", "which rclone"),
+        remote_checks.Check("which_cc_mount_object_store", "which cc-mount-object-store"),
+        remote_checks.Check("cc_mount_object_store_list", "cc-mount-object-store list"),
+    ]
 
-def verify_rclone_and_object_store(self, remote):
-    output = remote.exec_command('which rclone || echo MISSING')
-    self.assertNotIn("MISSING", output, "'rclone' was not found on the instance.")
 
-    output = remote.exec_command('which cc-mount-object-store || echo MISSING')
-    self.assertNotIn("MISSING", output, "'cc-mount-object-store' not found.")
+def verify_rclone_and_object_store(self, results):
+    self.assertTrue(self.check_result(results, "which_rclone").ok,
+                    "'rclone' was not found on the instance.")
+    self.assertTrue(self.check_result(results, "which_cc_mount_object_store").ok,
+                    "'cc-mount-object-store' not found.")
 
-    output = remote.exec_command('cc-mount-object-store list || echo ERROR')
-    self.assertNotIn("ERROR", output, "cc-mount-object-store list returned error.")
-    self.assertTrue(output.strip() and not all(c == '.' for c in output.strip()),
+    result = self.check_result(results, "cc_mount_object_store_list")
+    self.assertTrue(result.ok, "cc-mount-object-store list returned error.")
+    output = result.stdout.strip()
+    self.assertTrue(output and not all(c == '.' for c in output),
                     "'cc-mount-object-store list' output is invalid.")
 
 
 TESTS = [
-    (AlertLevel.CRITICAL, "verify_ssh_key_injection", verify_ssh_key_injection),
-    (AlertLevel.CRITICAL, "verify_rclone_and_object_store", verify_rclone_and_object_store),
-    (AlertLevel.NONCRITICAL, "verify_cloud_init", verify_cloud_init),
-    (AlertLevel.NONCRITICAL, "verify_openrc_exists", verify_openrc_exists),
-    (AlertLevel.NONCRITICAL, "verify_openrc", verify_openrc),
+    (AlertLevel.CRITICAL, "verify_ssh_key_injection", ssh_key_checks, verify_ssh_key_injection),
+    (AlertLevel.CRITICAL, "verify_rclone_and_object_store", object_store_checks, verify_rclone_and_object_store),
+    (AlertLevel.NONCRITICAL, "verify_cloud_init", cloud_init_checks, verify_cloud_init),
+    (AlertLevel.NONCRITICAL, "verify_openrc_exists", openrc_checks, verify_openrc_exists),
+    (AlertLevel.NONCRITICAL, "verify_openrc", openrc_token_checks, verify_openrc),
 ]
 
 
+def batch_checks(test_names):
+    """Return the remote checks of ``test_names``, without duplicates.
+
+    They are ordered as the tests used to run, alphabetically, so e.g.
+    cloud-init is waited for before its files are looked at.
+    """
+    checks = {}
+    for _, test_name, make_checks, _ in sorted(TESTS, key=lambda test: test[1]):
+        if test_name in test_names:
+            for check in make_checks():
+                checks.setdefault(check.name, check)
+    return list(checks.values())
+
+
+def run_batched_checks(remote, checks):
+    """Run each blocking check in its own exec, then the others in one.
+
+    Returns check name -> CheckResult, or the exception raised running it.
+    """
+    results = {}
+    for check in checks:
+        if check.blocking:
+            try:
+                results[check.name] = remote_checks.wait(
+                    remote, check.name, check.command
+                )
+            except Exception as ex:
+                LOG.error("Remote check %s failed: %s", check.name, ex)
+                results[check.name] = ex
+
+    quick = [check for check in checks if not check.blocking]
+    try:
+        results.update(remote_checks.run_checks(remote, quick))
+    except Exception as ex:
+        LOG.error("Remote checks %s failed: %s", [c.name for c in quick], ex)
+        results.update((check.name, ex) for check in quick)
+    return results
+
+
+### Provisioning ###
+
+def image_names():
+    """Return the configured image names, without duplicates."""
+    names = []
+    for image_name in getattr(CONF.image, "cc_image_tests_image_names", []):
+        image_name = image_name.strip()
+        if image_name in names:
+            LOG.warning(f"Skipping duplicate image_name in config: {image_name}")
+            continue
+        names.append(image_name)
+    return names
+
+
+def image_node_type(image_name):
+    """Return the node type to reserve for an image, None for any."""
+    if "ARM64" in image_name:
+        return CONF.reservation.reservable_arm_node_type
+    return None
+
+
+def image_demand(names):
+    """Return the bare metal hosts needed to boot ``names``, see common.admission."""
+    demand = collections.Counter()
+    if CONF.reservation.reservation_type == "bare_metal":
+        for image_name in names:
+            key = "physical:host"
+            node_type = image_node_type(image_name)
+            if node_type:
+                key += ":" + node_type
+            demand[key] += 1
+    return dict(demand)
+
+
+def find_image(image_client, image_name):
+    resp = image_client.list_images(params={
+        'name': image_name,
+        'visibility': 'public',
+    })
+    matching = resp.get('images', [])
+
+    if not matching:
+        raise Exception(f"No image found with name: {image_name}")
+    if len(matching) > 1:
+        raise Exception(f"Multiple images found with name: {image_name}")
+    return matching[0]
+
+
+class SharedImageServers(ReservationScenarioTest):
+    """Servers shared by the TestImage classes of a worker.
+
+    The first TestImage class to run sets this class up, from ``acquire``.
+    Each class takes its image's ready server with ``acquire`` and hands
+    it back with ``release``. The lease, keypair and credentials are
+    deleted once every image is released, or by tearDownModule once the
+    last image class this worker runs has finished, whichever comes
+    first; servers nobody took are deleted then. An image class running
+    after that sets the class up again, for the images not released yet.
+
+    It has no tests of its own, so test loaders do not run it.
+    """
+
+    _lock = threading.Lock()
+    _set_up = False
+    _torn_down = False
+    _error = None
+    # image name -> server for the image, or the exception that prevented it
+    _provisioned = {}
+    # images whose class has finished with them
+    _released = set()
+
+    @classmethod
+    def _pending_image_names(cls):
+        return [name for name in image_names() if name not in cls._released]
+
+    @classmethod
+    def _reserve(cls, inst, names):
+        """Reserve a host per image of ``names`` in one lease.
+
+        Returns image name -> (flavor, scheduler hints) to boot it with.
+        """
+        reservation_type = CONF.reservation.reservation_type
+        if reservation_type == "bare_metal":
+            node_types = collections.Counter(
+                image_node_type(image_name) for image_name in names
+            )
+            reservations = [
+                inst._host_reservation_request(node_type, count)
+                for node_type, count in node_types.items()
+            ]
+        elif reservation_type == "kvm":
+            flavor_id = inst._get_flavor_id(CONF.reservation.reservable_flavor_ref)
+            reservations = [{
+                "resource_type": "flavor:instance",
+                "affinity": None,
+                "amount": len(names),
+                "flavor_id": flavor_id,
+            }]
+        else:
+            return {image_name: (CONF.compute.flavor_ref, {}) for image_name in names}
+
+        lease = inst.create_test_lease(
+            start_date="now",
+            end_date=utils.time_offset_to_blazar_string(hours=1),
+            reservations=reservations,
+        )
+        lease = inst._wait_for_active_lease(cls.leases_client, lease)
+
+        boot_args = {}
+        for image_name in names:
+            if reservation_type == "kvm":
+                reservation_id = inst._get_flavor_reservation(lease)
+                boot_args[image_name] = (f"reservation:{reservation_id}", {})
+                continue
+            properties = inst._host_reservation_request(
+                image_node_type(image_name)
+            )["resource_properties"]
+            reservation_id = next(
+                res["id"] for res in lease["reservations"]
+                if res["resource_type"] == "physical:host"
+                and (res.get("resource_properties") or "") == properties
+            )
+            boot_args[image_name] = (
+                CONF.reservation.reservable_flavor_ref,
+                {"reservation": reservation_id},
+            )
+        return boot_args
+
+    @classmethod
+    def _boot_all(cls, boot_args):
+        """Boot images at once. Returns image name -> server or exception."""
+        with futures.ThreadPoolExecutor(max_workers=len(boot_args)) as pool:
+            booting = {
+                image_name: pool.submit(cls._boot, image_name, *args)
+                for image_name, args in boot_args.items()
+            }
+        servers = {}
+        for image_name, future in booting.items():
+            try:
+                servers[image_name] = future.result()
+            except Exception as ex:
+                LOG.error("Could not provision image %s: %s", image_name, ex)
+                servers[image_name] = ex
+        return servers
+
+    @classmethod
+    def _boot(cls, image_name, flavor, scheduler_hints):
+        """Boot one image and log in, from a pool thread."""
+        # the server, its validation resources and floating IP are cleaned
+        # up with this fixture
+        inst = cls()
+        try:
+            image = find_image(cls.image_client, image_name)
+            boot_kwargs = {
+                "image_id": image["id"],
+                "keypair": cls.keypair,
+                "wait_until": "SSHABLE",
+            }
+            if scheduler_hints:
+                boot_kwargs["scheduler_hints"] = scheduler_hints
+            server = inst.create_server(flavor=flavor, **boot_kwargs)
+            server = cls.servers_client.show_server(server["id"])["server"]
+            fip = get_server_floating_ip(server)
+            remote = inst.get_remote_client(fip, server=server)
+        except Exception:
+            inst.doCleanups()
+            raise
+        return {
+            "image": image,
+            "server": server,
+            "fip": fip,
+            "remote": remote,
+            "fixture": inst,
+        }
+
+    @classmethod
+    def acquire(cls, image_name):
+        """Return the server of an image, setting up every server first.
+
+        Raises what prevented the image from being provisioned.
+        """
+        with cls._lock:
+            if not cls._set_up:
+                cls._set_up = True
+                cls._torn_down = False
+                cls._error = None
+                try:
+                    cls.setUpClass()
+                except Exception as ex:
+                    # setUpClass has already torn the class down
+                    cls._error = ex
+                    cls._torn_down = True
+            if cls._error is not None:
+                raise cls._error
+            provisioned = cls._provisioned[image_name]
+        if isinstance(provisioned, Exception):
+            raise provisioned
+        return cls._take(image_name, provisioned)
+
+    @classmethod
+    def _take(cls, image_name, provisioned):
+        return provisioned
+
+    @classmethod
+    def release(cls, image_name):
+        """Hand back the server of an image; the last release tears down the rest."""
+        with cls._lock:
+            cls._released.add(image_name)
+            provisioned = cls._provisioned.pop(image_name, None)
+            last = not cls._provisioned
+        if isinstance(provisioned, dict):
+            cls._give_back(provisioned)
+        if last:
+            cls._tear_down()
+
+    @classmethod
+    def _give_back(cls, provisioned):
+        pass
+
+    @classmethod
+    def _tear_down(cls):
+        """Delete the servers nobody took, then the lease and the rest."""
+        with cls._lock:
+            if cls._torn_down or not cls._set_up:
+                return
+            cls._torn_down = True
+            unclaimed = list(cls._provisioned.values())
+            cls._provisioned.clear()
+        try:
+            for provisioned in unclaimed:
+                if isinstance(provisioned, dict):
+                    cls._give_back(provisioned)
+        finally:
+            try:
+                cls.tearDownClass()
+            finally:
+                with cls._lock:
+                    # a later image class sets up what it needs again
+                    cls._set_up = False
+
+
+class ImageProvisioner(SharedImageServers):
+    """Provisioning stage booting every configured image at once.
+
+    It reserves a host for every image with one lease, boots all the
+    images in parallel and waits until each server is SSHABLE. Releasing
+    an image deletes its server.
+    """
+
+    _set_up = False
+    _torn_down = False
+    _error = None
+    _provisioned = {}
+    _released = set()
+
+    @classmethod
+    def resource_setup(cls):
+        cls.image_names = cls._pending_image_names()
+        cls.resource_demand = image_demand(cls.image_names)
+        super(ImageProvisioner, cls).resource_setup()
+        inst = cls()
+        cls.addClassResourceCleanup(inst.doCleanups)
+
+        cls.keypair = inst.create_keypair()
+        cls._provisioned.update(
+            cls._boot_all(cls._reserve(inst, cls.image_names))
+        )
+
+    @classmethod
+    def _give_back(cls, provisioned):
+        provisioned["fixture"].doCleanups()
+
+
+class ImageRebuilder(SharedImageServers):
+    """One reserved server per node type, rebuilt with each image in turn.
+
+    The first image of each node type is booted as usual; every other
+    image is tested by rebuilding that server with it, which keeps its
+    floating IP and keypair, and logging in again. An image then costs a
+    rebuild rather than a lease, a create and a delete.
+    """
+
+    _set_up = False
+    _torn_down = False
+    _error = None
+    _provisioned = {}
+    _released = set()
+
+    @staticmethod
+    def _server_key(image_name):
+        if CONF.reservation.reservation_type == "bare_metal":
+            return image_node_type(image_name)
+        return None
+
+    @classmethod
+    def resource_setup(cls):
+        cls.image_names = cls._pending_image_names()
+        # the first image of each node type is booted, the others rebuilt
+        first = {}
+        for image_name in cls.image_names:
+            first.setdefault(cls._server_key(image_name), image_name)
+        cls.resource_demand = image_demand(first.values())
+        super(ImageRebuilder, cls).resource_setup()
+        inst = cls()
+        cls.addClassResourceCleanup(inst.doCleanups)
+
+        cls.keypair = inst.create_keypair()
+        booted = cls._boot_all(cls._reserve(inst, list(first.values())))
+        servers = {}
+        for key, image_name in first.items():
+            server = servers[key] = booted[image_name]
+            if isinstance(server, dict):
+                cls.addClassResourceCleanup(server["fixture"].doCleanups)
+        for image_name in cls.image_names:
+            cls._provisioned[image_name] = servers[cls._server_key(image_name)]
+
+    @classmethod
+    def _take(cls, image_name, shared):
+        """Rebuild the shared server with ``image_name`` unless it runs it."""
+        if shared["image"]["name"] == image_name:
+            return shared
+
+        image = find_image(cls.image_client, image_name)
+        server_id = shared["server"]["id"]
+        LOG.info("Rebuilding server %s with image %s", server_id, image_name)
+        timeline = shared["fixture"].timeline
+        timeline.note("server_rebuild", image=image_name)
+        cls.servers_client.rebuild_server(server_id, image["id"])
+        tempest_waiters.wait_for_server_status(
+            cls.servers_client, server_id, "ACTIVE"
+        )
+        timeline.note("server_rebuilt", image=image_name)
+        server = cls.servers_client.show_server(server_id)["server"]
+        # the host key changed with the disk, so log in from scratch
+        if CONF.reservation.ssh_connection_cache:
+            ssh_cache.get_connection_cache().discard(shared["fip"])
+        remote = shared["fixture"].get_remote_client(shared["fip"], server=server)
+        shared.update(image=image, server=server, remote=remote)
+        return shared
+
+
 ### Dynamic Test Class Creation ###
 
 def make_image_test_class(image_name):
@@ -111,32 +555,50 @@ def make_image_test_class(image_name):
 
     The class will also include a setup method that creates a server
     using the specified image, and a teardown method that cleans up
-    the server and any associated resources.
+    the server and any associated resources. With
+    `cc_image_tests_parallel_provisioning`, the server is taken from the
+    `ImageProvisioner` instead, which boots every image at once, and with
+    `cc_image_tests_rebuild_in_place` from the `ImageRebuilder`, which
+    rebuilds one server per node type with each image.
     """
     safe_name = image_name.replace(":", "_").replace("-", "_").replace(".", "_")
     class_name = f"TestImage_{safe_name}"
 
+    shared = None
+    if CONF.image.cc_image_tests_rebuild_in_place:
+        shared = ImageRebuilder
+    elif CONF.image.cc_image_tests_parallel_provisioning:
+        shared = ImageProvisioner
+    # the bare metal host reserved by resource_setup, unless the shared
+    # servers' hosts are reserved for all images at once
+    demand = {} if shared else image_demand([image_name])
+
     class TestImage(ReservationScenarioTest):
+        resource_demand = demand
+        # check name -> CheckResult, or the exception running it raised
+        _check_results = None
+
         @classmethod
         def resource_setup(cls):
             super(TestImage, cls).resource_setup()
+            cls.image_name = image_name
+            if shared:
+                cls.addClassResourceCleanup(shared.release, image_name)
+                provisioned = shared.acquire(image_name)
+                # the shared servers own the server, keypair and floating
+                # IP, so none of them is set for resource_cleanup to delete
+                cls.image = provisioned["image"]
+                cls.image_id = cls.image["id"]
+                cls.server = provisioned["server"]
+                cls.public_key = shared.keypair["public_key"]
+                cls.remote = provisioned["remote"]
+                return
+
             inst = cls()
             cls.addClassResourceCleanup(inst.doCleanups)
 
-            resp = cls.image_client.list_images(params={
-                'name': image_name,
-                'visibility': 'public',
-            })
-            matching = resp.get('images', [])
-
-            if not matching:
-                raise Exception(f"No image found with name: {image_name}")
-            if len(matching) > 1:
-                raise Exception(f"Multiple images found with name: {image_name}")
-
-            cls.image = matching[0]
+            cls.image = find_image(cls.image_client, image_name)
             cls.image_id = cls.image['id']
-            cls.image_name = image_name
 
             cls.keypair = inst.create_keypair()
             cls.public_key = cls.keypair["public_key"]
@@ -145,10 +607,9 @@ def make_image_test_class(image_name):
             flavor = CONF.compute.flavor_ref
             scheduler_hints = {}
             if CONF.reservation.reservation_type == "bare_metal":
-                node_type = None
-                if "ARM64" in cls.image_name:
-                    node_type = CONF.reservation.reservable_arm_node_type
-                lease = inst._reserve_physical_host(node_type=node_type)
+                lease = inst._reserve_physical_host(
+                    node_type=image_node_type(cls.image_name)
+                )
                 cls.lease_id = lease["id"]
                 reservation_id = inst._get_host_reservation(lease)
                 flavor = CONF.reservation.reservable_flavor_ref
@@ -178,7 +639,33 @@ def make_image_test_class(image_name):
                 if name != "default":
                     cls._created_sg_names.append(name)
             cls.fip = get_server_floating_ip(server)
-            cls.remote = cls.get_remote_client(cls, cls.fip)
+            cls.remote = inst.get_remote_client(cls.fip, server=server)
+
+        @classmethod
+        def check_results(cls):
+            """Run the remote checks of every test not skipped, once.
+
+            Returns check name -> CheckResult, or the exception that kept
+            the check from running, so a test only fails on its own checks.
+            """
+            if cls._check_results is None:
+                test_names = [
+                    test_name for _, test_name, _, _ in TESTS
+                    if not should_skip(
+                        test_name, CONF.image.cc_image_tests_skip_test_regex
+                    )
+                ]
+                cls._check_results = run_batched_checks(
+                    cls.remote, batch_checks(test_names)
+                )
+            return cls._check_results
+
+        def check_result(self, results, name):
+            if name not in results:
+                self.fail(f"Remote check {name} did not run")
+            if isinstance(results[name], Exception):
+                raise results[name]
+            return results[name]
 
         @classmethod
         def resource_cleanup(cls):
@@ -192,8 +679,8 @@ def make_image_test_class(image_name):
                         test_utils.call_and_ignore_notfound_exc(
                             cls.leases_client.delete_lease, cls.lease_id
                         )
-                        waiters.wait_for_lease_status(
-                            cls.leases_client, cls.lease_id, "TERMINATED"
+                        waiters.wait_for_lease_termination(
+                            cls.leases_client, cls.lease_id
                         )
                     except tempest_exc.NotFound:
                         pass
@@ -226,15 +713,12 @@ def make_image_test_class(image_name):
             finally:
                 super(TestImage, cls).resource_cleanup()
 
-    for alert_level, test_name, test_func in TESTS:
+    for alert_level, test_name, _, test_func in TESTS:
         def make_test(alert_level, test_name, test_func):
             def test_fn(self):
                 if should_skip(test_name, CONF.image.cc_image_tests_skip_test_regex):
                     self.skipTest(f"{test_name} skipped")
-                if test_name == "verify_ssh_key_injection":
-                    test_func(self, type(self).remote, type(self).public_key)
-                else:
-                    test_func(self, type(self).remote)
+                test_func(self, type(self).check_results())
             test_fn.__name__ = f"test_{test_name}"
             test_fn.__qualname__ = f"{class_name}.{test_fn.__name__}"
             test_fn.__module__ = __name__
@@ -255,21 +739,31 @@ def make_image_test_class(image_name):
     return TestImage
 
 
+def tearDownModule():
+    """Free the shared servers' hosts after this worker's last image class.
+
+    unittest calls it once the tests of this module are done, whichever
+    image classes were filtered out, skipped or run by other workers.
+    """
+    errors = []
+    for shared in (ImageProvisioner, ImageRebuilder):
+        try:
+            shared._tear_down()
+        except Exception as ex:
+            LOG.exception("Could not tear down %s", shared.__name__)
+            errors.append(ex)
+    if errors:
+        raise errors[0]
+
+
 def generate_tests():
     """Dynamically generate test classes for images listed in the config."""
 
-    created_classes = set()
     module = sys.modules[__name__]
 
-    for image_name in getattr(CONF.image, "cc_image_tests_image_names", []):
-        image_name = image_name.strip()
-        if image_name in created_classes:
-            LOG.warning(f"Skipping duplicate image_name in config: {image_name}")
-            continue
-
+    for image_name in image_names():
         test_cls = make_image_test_class(image_name)
         setattr(module, test_cls.__name__, test_cls)
-        created_classes.add(image_name)
 
 
 if not globals().get("__image_tests_generated__"):
@@ -29,6 +29,8 @@ class TestReservableBaremetalNode(ReservationScenarioTest):
     Much of the logic is copied from tempest.scenario.test_server_basic_ops
     """
 
+    resource_demand = {"physical:host": 1}
+
     @classmethod
     def skip_checks(cls):
         super().skip_checks()
@@ -57,6 +59,7 @@ class TestReservableBaremetalNode(ReservationScenarioTest):
 
 class TestReservableBaremetalNodeNegative(ReservationScenarioTest):
     credentials = ["primary", "alt"]
+    resource_demand = {"physical:host": 1}
 
     CHI_NO_VALID_HOST_MSG = "No valid host was found. There are not enough hosts available. To troubleshoot, please see bit.ly/faq-instance-failure"
     UPSTREAM_NO_VALID_HOST_MSG = "No valid host was found. "
@@ -96,7 +99,7 @@ class TestReservableBaremetalNodeNegative(ReservationScenarioTest):
 
         # wait for the server to either schedule, or move to an error state
         server_wait = waiters._wait_for_server_scheduling(
-            self.servers_client, server["id"]
+            self.servers_client, server["id"], timeline=self.timeline
         )
         self.assertIn("status", server_wait)
         self.assertEqual("ERROR", server_wait["status"])
@@ -127,7 +130,7 @@ class TestReservableBaremetalNodeNegative(ReservationScenarioTest):
 
         # wait for the server to either schedule, or move to an error state
         server_wait = waiters._wait_for_server_scheduling(
-            self.servers_client, server["id"]
+            self.servers_client, server["id"], timeline=self.timeline
         )
         self.assertIn("status", server_wait)
         self.assertEqual("ERROR", server_wait["status"])
@@ -159,7 +162,7 @@ class TestReservableBaremetalNodeNegative(ReservationScenarioTest):
 
         # wait for the server to either schedule, or move to an error state
         server_wait = waiters._wait_for_server_scheduling(
-            self.servers_client, server["id"]
+            self.servers_client, server["id"], timeline=self.timeline
         )
         self.assertIn("status", server_wait)
         self.assertEqual("ERROR", server_wait["status"])
@@ -187,7 +190,7 @@ class TestReservableBaremetalNodeNegative(ReservationScenarioTest):
 
         # should succeed, since we have a reservation
         spawning_server = waiters._wait_for_server_scheduling(
-            self.servers_client, server1["id"]
+            self.servers_client, server1["id"], timeline=self.timeline
         )
         self.assertIn("status", spawning_server)
 
@@ -0,0 +1,800 @@
+"""A local fake of the Blazar reservation API.
+
+``FakeBlazar`` models a site: a fleet of hosts, networks, devices and
+floating IPs with their properties, and leases that reserve them. Lease
+statuses follow the blazar state machine, driven by a ``FakeClock`` that
+tests can advance at will. ``FakeBlazarServer`` serves the model over HTTP
+on a local port, so the plugin's clients and waiters run against it
+unchanged::
+
+    site = fake_blazar.FakeBlazar(hosts=1000, clock=fake_blazar.FakeClock(speed=0))
+    with fake_blazar.FakeBlazarServer(site) as server:
+        leases = server.make_client(leases_client.LeasesClient)
+        lease = leases.create_lease(name="l", start_date="now", end_date=...)
+        site.clock.advance(60)
+
+Latency and errors can be injected for every request, or for the next few
+requests matching a method and path, to exercise retries and timeouts.
+
+The server can also be run on its own::
+
+    python -m blazar_tempest_plugin.tools.fake_blazar --port 8778 --hosts 500
+"""
+
+import argparse
+import collections
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+
+from datetime import datetime, timedelta, timezone
+from http import server as http_server
+from urllib import parse as urllib
+
+DATE_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+
+# blazar resource type of a reservation -> fleet collection it draws from
+RESERVATION_RESOURCES = {
+    "physical:host": "hosts",
+    "network": "networks",
+    "device": "devices",
+    "virtual:floatingip": "floatingips",
+}
+
+# URI prefix of each fleet collection
+COLLECTION_URIS = {
+    "hosts": "os-hosts",
+    "networks": "networks",
+    "devices": "devices",
+    "floatingips": "floatingips",
+}
+
+
+class FakeClock(object):
+    """A clock that runs at ``speed`` times real time, and can be moved.
+
+    With ``speed=0`` time only moves when ``advance`` is called. The
+    default of real time, starting now, keeps the fake site in step with
+    waiters that sleep on the real clock.
+    """
+
+    def __init__(self, start=None, speed=1.0):
+        self.speed = speed
+        self._start = time.time() if start is None else start
+        self._started_at = time.monotonic()
+        self._offset = 0.0
+        self._lock = threading.Lock()
+
+    def time(self):
+        with self._lock:
+            elapsed = (time.monotonic() - self._started_at) * self.speed
+            return self._start + elapsed + self._offset
+
+    def now(self):
+        return datetime.fromtimestamp(self.time(), timezone.utc).replace(tzinfo=None)
+
+    def advance(self, seconds):
+        with self._lock:
+            self._offset += seconds
+
+
+class FakeAuthProvider(object):
+    """Stand-in for a tempest auth provider, pointing at a fake server."""
+
+    def __init__(self, base_url, token="fake-token"):
+        self._base_url = base_url
+        self.token = token
+
+    def auth_request(self, method, url, headers=None, body=None, filters=None):
+        headers = dict(headers or {})
+        headers["X-Auth-Token"] = self.token
+        return self._base_url + url, headers, body
+
+    def base_url(self, filters, auth_data=None):
+        return self._base_url
+
+    def get_token(self):
+        return self.token
+
+
+class FakeBlazarError(Exception):
+    def __init__(self, status, message):
+        super(FakeBlazarError, self).__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _format_date(date):
+    return date.strftime(DATE_FORMAT) if date is not None else None
+
+
+def _parse_date(value, now):
+    if value == "now":
+        return now
+    for date_format in ("%Y-%m-%d %H:%M", DATE_FORMAT, "%Y-%m-%dT%H:%M:%S"):
+        try:
+            return datetime.strptime(value, date_format)
+        except (TypeError, ValueError):
+            pass
+    raise FakeBlazarError(400, "Invalid date %r" % (value,))
+
+
+def _parse_duration(value):
+    match = re.match(r"^(\d+)([smhd])$", str(value))
+    if not match:
+        raise FakeBlazarError(400, "Invalid duration %r" % (value,))
+    unit = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days"}[match.group(2)]
+    return timedelta(**{unit: int(match.group(1))})
+
+
+def _match_properties(query, resource):
+    """Evaluate a blazar resource_properties query against a resource."""
+    if not query:
+        return True
+    if isinstance(query, str):
+        query = json.loads(query)
+    if not query:
+        return True
+
+    operator, args = query[0], query[1:]
+    if operator == "and":
+        return all(_match_properties(arg, resource) for arg in args)
+    if operator == "or":
+        return any(_match_properties(arg, resource) for arg in args)
+
+    name, expected = args
+    actual = resource.get(name.lstrip("$"))
+    if actual is None:
+        return False
+    if isinstance(expected, (int, float)):
+        try:
+            actual = float(actual)
+        except (TypeError, ValueError):
+            return False
+    comparisons = {
+        "==": lambda a, b: str(a) == str(b) if not isinstance(b, float) else a == b,
+        "!=": lambda a, b: str(a) != str(b) if not isinstance(b, float) else a != b,
+        "<": lambda a, b: a < b,
+        "<=": lambda a, b: a <= b,
+        ">": lambda a, b: a > b,
+        ">=": lambda a, b: a >= b,
+    }
+    if operator not in comparisons:
+        raise FakeBlazarError(400, "Unsupported operator %r" % operator)
+    return comparisons[operator](actual, expected)
+
+
+def _make_fleet(hosts, networks, devices, floatingips, node_types):
+    fleet = collections.OrderedDict()
+    fleet["hosts"] = collections.OrderedDict()
+    for i in range(hosts):
+        host_id = str(i + 1)
+        fleet["hosts"][host_id] = {
+            "id": host_id,
+            "hypervisor_hostname": "node-%05d" % (i + 1),
+            "node_type": node_types[i % len(node_types)],
+            "vcpus": 48,
+            "memory_mb": 196608,
+            "local_gb": 240,
+            "reservable": True,
+        }
+
+    fleet["networks"] = collections.OrderedDict()
+    for i in range(networks):
+        network_id = str(uuid.uuid5(uuid.NAMESPACE_OID, "network-%d" % i))
+        fleet["networks"][network_id] = {
+            "id": network_id,
+            "network_type": "vlan",
+            "physical_network": "physnet1",
+            "segment_id": 3000 + i,
+            "reservable": True,
+        }
+
+    fleet["devices"] = collections.OrderedDict()
+    for i in range(devices):
+        device_id = str(uuid.uuid5(uuid.NAMESPACE_OID, "device-%d" % i))
+        fleet["devices"][device_id] = {
+            "id": device_id,
+            "name": "device-%04d" % i,
+            "device_type": "container",
+            "device_driver": "k8s",
+            "machine_name": "raspberrypi4-64",
+            "uid": device_id,
+            "reservable": True,
+        }
+
+    fleet["floatingips"] = collections.OrderedDict()
+    for i in range(floatingips):
+        fip_id = str(uuid.uuid5(uuid.NAMESPACE_OID, "floatingip-%d" % i))
+        fleet["floatingips"][fip_id] = {
+            "id": fip_id,
+            "floating_network_id": "public",
+            "floating_ip_address": "10.%d.%d.%d"
+            % (i >> 16 & 255, i >> 8 & 255, i & 255),
+            "reservable": True,
+        }
+    return fleet
+
+
+class FakeBlazar(object):
+    """In-memory model of a blazar site.
+
+    Leases move PENDING -> STARTING -> ACTIVE at their start date, and
+    ACTIVE -> TERMINATING -> TERMINATED at their end date. ``start_lag``
+    and ``end_lag`` control how long they stay in STARTING and TERMINATING,
+    like the manager's event loop does. A ``lease_error_rate`` share of
+    leases goes to ERROR instead of ACTIVE.
+    """
+
+    def __init__(
+        self,
+        hosts=10,
+        networks=10,
+        devices=10,
+        floatingips=10,
+        node_types=("compute_skylake", "compute_cascadelake", "gpu_rtx_6000"),
+        clock=None,
+        start_lag=0.0,
+        end_lag=0.0,
+        lease_error_rate=0.0,
+        latency=0.0,
+        latency_jitter=0.0,
+        error_rate=0.0,
+        error_status=503,
+        retry_after=None,
+        project_id="fake-project",
+        user_id="fake-user",
+        seed=None,
+    ):
+        self.clock = clock or FakeClock()
+        self.start_lag = start_lag
+        self.end_lag = end_lag
+        self.lease_error_rate = lease_error_rate
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.project_id = project_id
+        self.user_id = user_id
+
+        self.fleet = _make_fleet(hosts, networks, devices, floatingips, list(node_types))
+        self.leases = collections.OrderedDict()
+        self.requests = collections.Counter()
+
+        self._random = random.Random(seed)
+        self._faults = []
+        self._lock = threading.RLock()
+
+    # fault injection
+
+    def fail_next(self, count=1, status=503, method=None, path=None, retry_after=None):
+        """Fail the next ``count`` requests matching a method and path prefix."""
+        with self._lock:
+            self._faults.append(
+                {
+                    "count": count,
+                    "status": status,
+                    "method": method and method.upper(),
+                    "path": path,
+                    "retry_after": retry_after,
+                }
+            )
+
+    def injected_fault(self, method, path):
+        """Return (status, retry_after) if this request should fail."""
+        with self._lock:
+            for fault in self._faults:
+                if fault["method"] not in (None, method):
+                    continue
+                if fault["path"] is not None and not path.startswith(fault["path"]):
+                    continue
+                fault["count"] -= 1
+                if fault["count"] <= 0:
+                    self._faults.remove(fault)
+                return fault["status"], fault["retry_after"]
+
+            if self.error_rate and self._random.random() < self.error_rate:
+                return self.error_status, self.retry_after
+        return None
+
+    def request_latency(self):
+        if not self.latency and not self.latency_jitter:
+            return 0.0
+        with self._lock:
+            return max(0.0, self.latency + self._random.uniform(0, self.latency_jitter))
+
+    # leases
+
+    def _lease_view(self, lease):
+        view = {k: v for k, v in lease.items() if not k.startswith("_")}
+        for key in ("start_date", "end_date", "created_at", "updated_at"):
+            view[key] = _format_date(lease[key])
+        view["reservations"] = [dict(r) for r in lease["reservations"]]
+        view["events"] = [dict(e, time=_format_date(e["time"])) for e in lease["events"]]
+        return view
+
+    def _set_status(self, lease, status, now):
+        lease["status"] = status
+        lease["updated_at"] = now
+        reservation_status = {
+            "ACTIVE": "active",
+            "TERMINATED": "deleted",
+            "ERROR": "error",
+        }.get(status)
+        if reservation_status:
+            for reservation in lease["reservations"]:
+                reservation["status"] = reservation_status
+
+        events = {event["event_type"]: event for event in lease["events"]}
+        if status == "STARTING":
+            events["start_lease"]["status"] = "IN_PROGRESS"
+        elif status in ("ACTIVE", "ERROR"):
+            events["start_lease"]["status"] = "DONE"
+        elif status == "TERMINATING":
+            events["end_lease"]["status"] = "IN_PROGRESS"
+        elif status == "TERMINATED":
+            events["end_lease"]["status"] = "DONE"
+
+    def _advance_lease(self, lease, now):
+        start_lag = timedelta(seconds=self.start_lag)
+        end_lag = timedelta(seconds=self.end_lag)
+        while True:
+            status = lease["status"]
+            if status == "PENDING" and now >= lease["start_date"]:
+                self._set_status(lease, "STARTING", lease["start_date"])
+            elif status == "STARTING" and now >= lease["start_date"] + start_lag:
+                failed = lease.pop("_fails_to_start", False)
+                self._set_status(lease, "ERROR" if failed else "ACTIVE", now)
+            elif status == "ACTIVE" and now >= lease["end_date"]:
+                self._set_status(lease, "TERMINATING", lease["end_date"])
+            elif status == "TERMINATING" and now >= lease["end_date"] + end_lag:
+                self._set_status(lease, "TERMINATED", now)
+            else:
+                return
+
+    def _advance_leases(self):
+        now = self.clock.now()
+        for lease in self.leases.values():
+            self._advance_lease(lease, now)
+
+    def _busy(self, start, end, exclude_lease=None):
+        """Return the ids of resources reserved at any time in [start, end)."""
+        busy = set()
+        for lease in self.leases.values():
+            if lease is exclude_lease or lease["status"] in ("TERMINATED", "ERROR"):
+                continue
+            if lease["start_date"] < end and start < lease["end_date"]:
+                for reservation in lease["reservations"]:
+                    busy.update(reservation["_resources"])
+        return busy
+
+    def _allocate(self, reservation, start, end):
+        collection = RESERVATION_RESOURCES.get(reservation["resource_type"])
+        if collection is None:
+            # e.g. flavor:instance, accepted without tracking capacity
+            return []
+
+        if collection == "floatingips":
+            count = int(reservation.get("amount", 1))
+        else:
+            count = int(reservation.get("min", 1))
+
+        busy = self._busy(start, end)
+        queries = [
+            reservation.get("resource_properties"),
+            reservation.get("hypervisor_properties"),
+            reservation.get("network_properties"),
+        ]
+        free = [
+            resource_id
+            for resource_id, resource in self.fleet[collection].items()
+            if resource_id not in busy
+            and all(_match_properties(query, resource) for query in queries)
+        ]
+        if len(free) < count:
+            raise FakeBlazarError(
+                500,
+                "Not enough resources available with query %s"
+                % (reservation.get("resource_properties") or "[]"),
+            )
+        return free[:count]
+
+    def create_lease(self, body):
+        now = self.clock.now()
+        start = _parse_date(body.get("start_date", "now"), now)
+        end = _parse_date(body.get("end_date"), now)
+        if end <= start:
+            raise FakeBlazarError(400, "End date must be later than the start date")
+
+        lease_id = str(uuid.uuid4())
+        lease = {
+            "id": lease_id,
+            "name": body.get("name", lease_id),
+            "start_date": start,
+            "end_date": end,
+            "status": "PENDING",
+            "degraded": False,
+            "user_id": self.user_id,
+            "project_id": self.project_id,
+            "trust_id": uuid.uuid4().hex,
+            "created_at": now,
+            "updated_at": None,
+            "reservations": [],
+            "events": [
+                {"id": str(uuid.uuid4()), "lease_id": lease_id,
+                 "event_type": "start_lease", "time": start, "status": "UNDONE"},
+                {"id": str(uuid.uuid4()), "lease_id": lease_id,
+                 "event_type": "end_lease", "time": end, "status": "UNDONE"},
+            ],
+        }
+
+        for request in body.get("reservations", []):
+            reservation = dict(request)
+            reservation.update(
+                id=str(uuid.uuid4()),
+                lease_id=lease_id,
+                status="pending",
+                missing_resources=False,
+                resources_changed=False,
+                created_at=_format_date(now),
+            )
+            reservation["_resources"] = self._allocate(reservation, start, end)
+            lease["reservations"].append(reservation)
+
+        if self.lease_error_rate and self._random.random() < self.lease_error_rate:
+            lease["_fails_to_start"] = True
+        self.leases[lease_id] = lease
+        self._advance_lease(lease, now)
+        return lease
+
+    def update_lease(self, lease, body):
+        now = self.clock.now()
+        start, end = lease["start_date"], lease["end_date"]
+        if "start_date" in body:
+            if lease["status"] != "PENDING":
+                raise FakeBlazarError(409, "Cannot modify the start date of a started lease")
+            start = _parse_date(body["start_date"], now)
+        if "end_date" in body:
+            end = _parse_date(body["end_date"], now)
+        if "prolong_for" in body:
+            end += _parse_duration(body["prolong_for"])
+        if "reduce_by" in body:
+            end -= _parse_duration(body["reduce_by"])
+        if end <= start:
+            raise FakeBlazarError(400, "End date must be later than the start date")
+        if lease["status"] in ("TERMINATING", "TERMINATED"):
+            raise FakeBlazarError(409, "Lease %s has already ended" % lease["id"])
+
+        if (start, end) != (lease["start_date"], lease["end_date"]):
+            busy = self._busy(start, end, exclude_lease=lease)
+            for reservation in lease["reservations"]:
+                if busy.intersection(reservation["_resources"]):
+                    raise FakeBlazarError(
+                        409, "Not enough resources available to update the lease"
+                    )
+
+        lease["start_date"], lease["end_date"] = start, end
+        lease["name"] = body.get("name", lease["name"])
+        lease["updated_at"] = now
+        for event in lease["events"]:
+            if event["event_type"] == "start_lease":
+                event["time"] = start
+            elif event["event_type"] == "end_lease":
+                event["time"] = end
+        self._advance_lease(lease, now)
+        return lease
+
+    def get_lease(self, lease_id):
+        lease = self.leases.get(lease_id)
+        if lease is None:
+            raise FakeBlazarError(404, "Object with {'id': '%s'} not found" % lease_id)
+        return lease
+
+    # allocations and properties
+
+    def allocation(self, collection, resource_id):
+        reservations = []
+        for lease in self.leases.values():
+            if lease["status"] in ("TERMINATED", "ERROR"):
+                continue
+            for reservation in lease["reservations"]:
+                if resource_id in reservation["_resources"]:
+                    reservations.append(
+                        {
+                            "id": reservation["id"],
+                            "lease_id": lease["id"],
+                            "start_date": _format_date(lease["start_date"]),
+                            "end_date": _format_date(lease["end_date"]),
+                        }
+                    )
+        return {"resource_id": resource_id, "reservations": reservations}
+
+    def allocations(self, collection):
+        by_resource = collections.defaultdict(list)
+        for lease in self.leases.values():
+            if lease["status"] in ("TERMINATED", "ERROR"):
+                continue
+            for reservation in lease["reservations"]:
+                for resource_id in reservation["_resources"]:
+                    by_resource[resource_id].append(
+                        {
+                            "id": reservation["id"],
+                            "lease_id": lease["id"],
+                            "start_date": _format_date(lease["start_date"]),
+                            "end_date": _format_date(lease["end_date"]),
+                        }
+                    )
+        return [
+            {"resource_id": resource_id, "reservations": by_resource.get(resource_id, [])}
+            for resource_id in self.fleet[collection]
+        ]
+
+    def properties(self, collection, detail=False):
+        values = collections.OrderedDict()
+        for resource in self.fleet[collection].values():
+            for key, value in resource.items():
+                if key != "id":
+                    values.setdefault(key, set()).add(str(value))
+
+        properties = []
+        for name, seen in values.items():
+            prop = {"property": name}
+            if detail:
+                prop.update(private=False, is_unique=False, values=sorted(seen))
+            properties.append(prop)
+        return properties
+
+    # request handling
+
+    @staticmethod
+    def _path_parts(path):
+        parts = [p for p in path.split("/") if p]
+        if parts and re.match(r"^v\d+$", parts[0]):
+            parts = parts[1:]
+        return parts
+
+    def record_request(self, method, path):
+        """Count a request, by method and resource, in ``requests``."""
+        parts = self._path_parts(path)
+        with self._lock:
+            self.requests["%s /%s" % (method, parts[0] if parts else "")] += 1
+
+    def handle(self, method, path, query, body):
+        """Dispatch an API request, and return (status, body)."""
+        parts = self._path_parts(path)
+        if not parts:
+            raise FakeBlazarError(404, "Not found")
+
+        with self._lock:
+            self._advance_leases()
+
+            if parts[0] == "leases":
+                return self._handle_leases(method, parts[1:], query, body)
+
+            for collection, root in COLLECTION_URIS.items():
+                if parts[0] == root:
+                    return self._handle_collection(method, collection, parts[1:], query)
+        raise FakeBlazarError(404, "Resource /%s not found" % "/".join(parts))
+
+    def _handle_leases(self, method, parts, query, body):
+        if not parts:
+            if method == "GET":
+                leases = [self._lease_view(lease) for lease in self.leases.values()]
+                return 200, self._page("leases", leases, query)
+            if method == "POST":
+                return 201, {"lease": self._lease_view(self.create_lease(body or {}))}
+        elif len(parts) == 1:
+            lease = self.get_lease(parts[0])
+            if method == "GET":
+                return 200, {"lease": self._lease_view(lease)}
+            if method == "PUT":
+                return 200, {"lease": self._lease_view(self.update_lease(lease, body or {}))}
+            if method == "DELETE":
+                del self.leases[lease["id"]]
+                return 200, {}
+        elif len(parts) == 2 and parts[1] == "hosts" and method == "GET":
+            lease = self.get_lease(parts[0])
+            hosts = [
+                self.fleet["hosts"][host_id]
+                for reservation in lease["reservations"]
+                if reservation["resource_type"] == "physical:host"
+                for host_id in reservation["_resources"]
+            ]
+            return 200, {"hosts": hosts}
+        raise FakeBlazarError(405, "Method %s not allowed" % method)
+
+    def _handle_collection(self, method, collection, parts, query):
+        if method == "DELETE" and collection == "floatingips" and len(parts) == 1:
+            if self.fleet[collection].pop(parts[0], None) is None:
+                raise FakeBlazarError(404, "Floating IP %s not found" % parts[0])
+            return 200, {}
+        if method != "GET":
+            raise FakeBlazarError(405, "Method %s not allowed" % method)
+
+        resources = self.fleet[collection]
+        if not parts:
+            return 200, self._page(collection, list(resources.values()), query)
+        if parts == ["allocations"]:
+            return 200, self._page("allocations", self.allocations(collection), query)
+        if parts == ["properties"]:
+            detail = query.get("detail", ["false"])[0].lower() == "true"
+            properties = self.properties(collection, detail=detail)
+            return 200, self._page("resource_properties", properties, query)
+        if len(parts) == 2 and parts[1] == "allocation":
+            if parts[0] not in resources:
+                raise FakeBlazarError(404, "Resource %s not found" % parts[0])
+            return 200, {"allocation": self.allocation(collection, parts[0])}
+        if len(parts) == 1:
+            if parts[0] not in resources:
+                raise FakeBlazarError(404, "Resource %s not found" % parts[0])
+            return 200, {collection.rstrip("s"): resources[parts[0]]}
+        raise FakeBlazarError(404, "Not found")
+
+    def _page(self, key, items, query):
+        """Apply marker/limit pagination, adding a "next" link if needed."""
+        marker = query.get("marker", [None])[0]
+        limit = query.get("limit", [None])[0]
+
+        start = 0
+        if marker is not None:
+            for i, item in enumerate(items):
+                if str(item.get("id", item.get("resource_id", item.get("property")))) == marker:
+                    start = i + 1
+                    break
+            else:
+                raise FakeBlazarError(400, "Marker %s not found" % marker)
+
+        if not limit:
+            return {key: items[start:]}
+
+        page = items[start:start + int(limit)]
+        body = {key: page}
+        if start + int(limit) < len(items) and page:
+            last = page[-1]
+            next_marker = last.get("id", last.get("resource_id", last.get("property")))
+            body["%s_links" % key] = [
+                {"rel": "next", "href": "?limit=%s&marker=%s" % (limit, next_marker)}
+            ]
+        return body
+
+
+class _Handler(http_server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _handle(self):
+        site = self.server.site
+        url = urllib.urlparse(self.path)
+        query = urllib.parse_qs(url.query)
+
+        body = None
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            body = json.loads(self.rfile.read(length))
+
+        delay = site.request_latency()
+        if delay:
+            time.sleep(delay)
+
+        site.record_request(self.command, url.path)
+        headers = {}
+        fault = site.injected_fault(self.command, url.path)
+        if fault is not None:
+            status, retry_after = fault
+            payload = {"error_code": status, "error_message": "Injected fault",
+                       "error_name": status}
+            if retry_after is not None:
+                headers["Retry-After"] = str(retry_after)
+        else:
+            try:
+                status, payload = site.handle(self.command, url.path, query, body)
+            except FakeBlazarError as ex:
+                status = ex.status
+                payload = {"error_code": ex.status, "error_message": ex.message,
+                           "error_name": ex.status}
+
+        data = json.dumps(payload).encode("utf-8")
+        if self.command == "GET" and status == 200:
+            etag = '"%s"' % hashlib.sha1(data).hexdigest()
+            headers["ETag"] = etag
+            if self.headers.get("If-None-Match") == etag:
+                status, data = 304, b""
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeBlazarServer(object):
+    """Serve a FakeBlazar on a local port, from a background thread."""
+
+    def __init__(self, site=None, host="127.0.0.1", port=0):
+        self.site = site or FakeBlazar()
+        self._httpd = http_server.ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.site = self.site
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return "http://%s:%d" % (host, port)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def auth_provider(self, token="fake-token"):
+        return FakeAuthProvider(self.url, token=token)
+
+    def make_client(self, client_class, **kwargs):
+        """Create a reservation client talking to this server."""
+        kwargs.setdefault("build_interval", 1)
+        kwargs.setdefault("build_timeout", 300)
+        return client_class(self.auth_provider(), "reservation", "regionOne", **kwargs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8778)
+    parser.add_argument("--hosts", type=int, default=100)
+    parser.add_argument("--networks", type=int, default=100)
+    parser.add_argument("--devices", type=int, default=100)
+    parser.add_argument("--floatingips", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--latency-jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--start-lag", type=float, default=0.0)
+    parser.add_argument("--end-lag", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    site = FakeBlazar(
+        hosts=args.hosts,
+        networks=args.networks,
+        devices=args.devices,
+        floatingips=args.floatingips,
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        error_rate=args.error_rate,
+        start_lag=args.start_lag,
+        end_lag=args.end_lag,
+    )
+    server = FakeBlazarServer(site, host=args.host, port=args.port)
+    print("Fake blazar API listening on %s" % server.url)
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
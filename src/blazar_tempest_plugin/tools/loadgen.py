@@ -0,0 +1,587 @@
+"""Load generator for the Blazar API.
+
+Sends an open-loop stream of lease creates, updates and deletes, and
+resource listings, to a site: requests arrive as a Poisson process at the
+configured rate whether or not earlier ones have finished, so a slow
+service shows up as growing latency rather than as a lower request rate.
+Latency is measured from the time a request was scheduled, and includes
+any time it spent queued for one of the ``--concurrency`` workers.
+
+Leases are created without reservations and far in the future, so no
+hardware is consumed, and whatever is left of them is deleted at the end.
+
+Run against a local fake site::
+
+    blazar-loadgen run --fake --rate 50 --duration 60
+
+or against a real one, authenticating from the usual OS_* variables of a
+password, OIDC or application credential openrc::
+
+    source openrc && blazar-loadgen run --rate 5 --duration 300
+
+The ``lag`` command measures instead how long after their scheduled start
+and end the manager's event loop actually moves leases to ACTIVE and
+TERMINATED, for batches of leases of increasing size::
+
+    blazar-loadgen lag --batch-sizes 1,10,50
+"""
+
+import argparse
+import collections
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+
+from concurrent import futures
+from datetime import datetime, timedelta, timezone
+
+from tempest.lib import auth
+
+from blazar_tempest_plugin.auth import application_credential_provider
+from blazar_tempest_plugin.auth import oidc_provider
+from blazar_tempest_plugin.common import polling
+from blazar_tempest_plugin.common import utils
+from blazar_tempest_plugin.common import waiters
+from blazar_tempest_plugin.services.reservation import hosts_client
+from blazar_tempest_plugin.services.reservation import leases_client
+from blazar_tempest_plugin.tools import fake_blazar
+
+# operation -> relative weight in the default mix
+DEFAULT_MIX = {
+    "create_lease": 4,
+    "update_lease": 2,
+    "delete_lease": 3,
+    "list_leases": 2,
+    "list_hosts": 1,
+    "list_host_allocations": 1,
+}
+
+FAR_FUTURE = datetime(2050, 1, 1, tzinfo=timezone.utc)
+
+
+class Histogram(object):
+    """Log-linear latency histogram, with about 2% relative precision."""
+
+    def __init__(self, min_value=1e-5, precision=0.02):
+        self.min_value = min_value
+        self._log_base = math.log1p(precision)
+        self.counts = collections.Counter()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value):
+        bucket = 0
+        if value > self.min_value:
+            bucket = int(math.log(value / self.min_value) / self._log_base) + 1
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def _bucket_value(self, bucket):
+        if bucket == 0:
+            return self.min_value
+        return self.min_value * math.exp(bucket * self._log_base)
+
+    def percentile(self, percent):
+        if not self.count:
+            return 0.0
+        rank = percent / 100.0 * self.count
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return min(self.max, self._bucket_value(bucket))
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+class OperationStats(object):
+    def __init__(self):
+        self.latency = Histogram()
+        self.service_time = Histogram()
+        self.errors = collections.Counter()
+
+    def summary(self, elapsed):
+        requests = self.latency.count + sum(self.errors.values())
+        return {
+            "requests": requests,
+            "throughput": requests / elapsed if elapsed else 0.0,
+            "error_rate": sum(self.errors.values()) / requests if requests else 0.0,
+            "errors": dict(self.errors),
+            "latency": self.latency.summary(),
+            "service_time": self.service_time.summary(),
+        }
+
+
+def _error_name(ex):
+    resp = getattr(ex, "resp", None)
+    status = getattr(resp, "status", None)
+    if status is not None:
+        return "%s %s" % (status, type(ex).__name__)
+    return type(ex).__name__
+
+
+class LoadGenerator(object):
+    """Drive a weighted mix of lease and listing operations at a fixed rate."""
+
+    def __init__(self, leases, hosts, rate, concurrency=10, mix=None, seed=None):
+        self.leases_client = leases
+        self.hosts_client = hosts
+        self.rate = rate
+        self.concurrency = concurrency
+        self.mix = dict(mix or DEFAULT_MIX)
+
+        self.stats = collections.defaultdict(OperationStats)
+        self.created = []
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._lease_number = 0
+
+    # operations
+
+    def create_lease(self):
+        with self._lock:
+            self._lease_number += 1
+            number = self._lease_number
+        start = FAR_FUTURE + timedelta(days=self._random.randrange(3650))
+        lease = self.leases_client.create_lease(
+            name="loadgen-%d-%d" % (os.getpid(), number),
+            start_date=utils.time_offset_to_blazar_string(start),
+            end_date=utils.time_offset_to_blazar_string(start, hours=1),
+            reservations=[],
+        )["lease"]
+        with self._lock:
+            self.created.append(lease["id"])
+
+    def _pick_lease(self, remove=False):
+        with self._lock:
+            if not self.created:
+                return None
+            index = self._random.randrange(len(self.created))
+            if remove:
+                return self.created.pop(index)
+            return self.created[index]
+
+    def update_lease(self):
+        lease_id = self._pick_lease()
+        if lease_id is None:
+            return self.create_lease()
+        self.leases_client.update_lease(lease_id, name="loadgen-updated-%s" % lease_id)
+
+    def delete_lease(self):
+        lease_id = self._pick_lease(remove=True)
+        if lease_id is None:
+            return self.create_lease()
+        self.leases_client.delete_lease(lease_id)
+
+    def list_leases(self):
+        self.leases_client.list_leases()
+
+    def list_hosts(self):
+        self.hosts_client.list_hosts()
+
+    def list_host_allocations(self):
+        self.hosts_client.list_host_allocations()
+
+    # driver
+
+    def _run_one(self, operation, scheduled):
+        started = time.monotonic()
+        try:
+            getattr(self, operation)()
+        except Exception as ex:
+            with self._lock:
+                self.stats[operation].errors[_error_name(ex)] += 1
+            return
+        finished = time.monotonic()
+        with self._lock:
+            self.stats[operation].latency.record(finished - scheduled)
+            self.stats[operation].service_time.record(finished - started)
+
+    def run(self, duration):
+        """Send requests for ``duration`` seconds, and return a report."""
+        operations = list(self.mix)
+        weights = [self.mix[op] for op in operations]
+
+        pool = futures.ThreadPoolExecutor(max_workers=self.concurrency)
+        pending = []
+        started = time.monotonic()
+        next_arrival = started
+        late = 0
+        try:
+            while next_arrival - started < duration:
+                delay = next_arrival - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                elif delay < -0.1:
+                    late += 1
+                operation = self._random.choices(operations, weights)[0]
+                pending.append(pool.submit(self._run_one, operation, next_arrival))
+                next_arrival += self._random.expovariate(self.rate)
+            futures.wait(pending)
+        finally:
+            pool.shutdown(wait=True)
+        elapsed = time.monotonic() - started
+
+        return {
+            "rate": self.rate,
+            "concurrency": self.concurrency,
+            "duration": elapsed,
+            "late_arrivals": late,
+            "operations": {
+                operation: stats.summary(elapsed)
+                for operation, stats in sorted(self.stats.items())
+            },
+        }
+
+    def cleanup(self):
+        """Delete every lease this run created and did not delete."""
+        while True:
+            lease_id = self._pick_lease(remove=True)
+            if lease_id is None:
+                return
+            try:
+                self.leases_client.delete_lease(lease_id)
+            except Exception:
+                pass
+
+
+def _event_time(lease, event_type, date_key):
+    for event in lease.get("events", []):
+        if event["event_type"] == event_type:
+            return polling.parse_lease_date(event["time"])
+    return polling.parse_lease_date(lease[date_key])
+
+
+def measure_event_lag(
+    client,
+    batch_size,
+    spread=1,
+    duration=1,
+    poll_interval=1.0,
+    timeout=600,
+    clock=time.time,
+):
+    """Measure start and end event lag for a batch of leases.
+
+    ``batch_size`` leases without reservations are created, starting at
+    staggered minutes over the next ``spread`` minutes (blazar dates have
+    minute precision) and lasting ``duration`` minutes. One LeaseWatcher
+    polls them all every ``poll_interval`` seconds. The lag of a lease is
+    the time between its start_lease/end_lease event and the poll that saw
+    it ACTIVE/TERMINATED, so it is accurate to within ``poll_interval``.
+    """
+    now = datetime.fromtimestamp(clock(), timezone.utc)
+    watcher = waiters.LeaseWatcher(client, interval=poll_interval)
+    start_lag = Histogram()
+    end_lag = Histogram()
+    errors = collections.Counter()
+    leases = []
+    observed = {}
+
+    def observe(lease_id, kind, future):
+        if not future.cancelled() and future.exception() is None:
+            observed[(lease_id, kind)] = (clock(), future.result()["status"])
+
+    try:
+        for i in range(batch_size):
+            offset = 1 + i * spread // batch_size
+            try:
+                lease = client.create_lease(
+                    name="loadgen-lag-%d-%d" % (os.getpid(), i),
+                    start_date=utils.time_offset_to_blazar_string(now, minutes=offset),
+                    end_date=utils.time_offset_to_blazar_string(
+                        now, minutes=offset + duration
+                    ),
+                    reservations=[],
+                )["lease"]
+            except Exception as ex:
+                errors["create: %s" % _error_name(ex)] += 1
+                continue
+            leases.append(lease)
+
+            lease_id = lease["id"]
+            started = watcher.watch(lease_id, ["ACTIVE", "TERMINATING", "TERMINATED"])
+            started.add_done_callback(
+                lambda future, lease_id=lease_id: observe(lease_id, "start", future)
+            )
+            ended = watcher.watch(lease_id, "TERMINATED")
+            ended.add_done_callback(
+                lambda future, lease_id=lease_id: observe(lease_id, "end", future)
+            )
+
+        deadline = time.monotonic() + timeout
+        for lease in leases:
+            for kind in ("start", "end"):
+                while (lease["id"], kind) not in observed and time.monotonic() < deadline:
+                    time.sleep(min(poll_interval, 1.0))
+
+        for lease in leases:
+            start = observed.get((lease["id"], "start"))
+            if start is None:
+                errors["start not observed"] += 1
+            elif start[1] != "ACTIVE":
+                errors["ACTIVE not observed, saw %s" % start[1]] += 1
+            else:
+                start_lag.record(
+                    max(0.0, start[0] - _event_time(lease, "start_lease", "start_date"))
+                )
+
+            end = observed.get((lease["id"], "end"))
+            if end is None:
+                errors["end not observed"] += 1
+            else:
+                end_lag.record(
+                    max(0.0, end[0] - _event_time(lease, "end_lease", "end_date"))
+                )
+    finally:
+        for lease in leases:
+            try:
+                client.delete_lease(lease["id"])
+            except Exception:
+                pass
+
+    return {
+        "batch_size": batch_size,
+        "poll_interval": poll_interval,
+        "start_lag": start_lag.summary(),
+        "end_lag": end_lag.summary(),
+        "errors": dict(errors),
+    }
+
+
+def print_lag_report(report, out=sys.stdout):
+    out.write("%-6s %-6s %9s %9s %9s %9s %9s\n" % (
+        "batch", "event", "leases", "p50 s", "p90 s", "p99 s", "max s"))
+    for level in report["levels"]:
+        for event in ("start", "end"):
+            lag = level["%s_lag" % event]
+            out.write("%-6d %-6s %9d %9.1f %9.1f %9.1f %9.1f\n" % (
+                level["batch_size"], event, lag["count"], lag["p50"], lag["p90"],
+                lag["p99"], lag["max"]))
+        for error, count in sorted(level["errors"].items()):
+            out.write("    %6d x %s\n" % (count, error))
+
+
+def print_report(report, out=sys.stdout):
+    out.write(
+        "rate %.1f/s, concurrency %d, %.1f seconds, %d late arrivals\n"
+        % (report["rate"], report["concurrency"], report["duration"],
+           report["late_arrivals"])
+    )
+    out.write("%-24s %9s %9s %8s %10s %10s %10s %10s\n" % (
+        "operation", "requests", "req/s", "errors", "p50 ms", "p90 ms", "p99 ms", "max ms"))
+    for operation, stats in report["operations"].items():
+        latency = stats["latency"]
+        out.write("%-24s %9d %9.2f %7.1f%% %10.1f %10.1f %10.1f %10.1f\n" % (
+            operation, stats["requests"], stats["throughput"],
+            stats["error_rate"] * 100, latency["p50"] * 1000, latency["p90"] * 1000,
+            latency["p99"] * 1000, latency["max"] * 1000))
+        for error, count in sorted(stats["errors"].items()):
+            out.write("    %6d x %s\n" % (count, error))
+
+
+_AUTH_TYPES = (
+    "password",
+    "v3password",
+    "v3oidcpassword",
+    "applicationcredential",
+    "v3applicationcredential",
+)
+
+
+def _site_auth_provider(environ=os.environ):
+    """Build a tempest auth provider from the OS_* environment variables.
+
+    OS_AUTH_TYPE selects the flow, as in the openrc files of a site:
+    ``password`` (the default), ``v3oidcpassword`` through the plugin's
+    OIDC provider, or ``v3applicationcredential``.
+    """
+    auth_type = environ.get("OS_AUTH_TYPE", "password")
+    if auth_type not in _AUTH_TYPES:
+        raise SystemExit("Unsupported OS_AUTH_TYPE: %s" % auth_type)
+    auth_url = environ["OS_AUTH_URL"]
+    if auth_type in ("v3applicationcredential", "applicationcredential"):
+        credentials = application_credential_provider.KeystoneV3ApplicationCredentials(
+            application_credential_id=environ.get("OS_APPLICATION_CREDENTIAL_ID"),
+            application_credential_name=environ.get("OS_APPLICATION_CREDENTIAL_NAME"),
+            application_credential_secret=environ.get(
+                "OS_APPLICATION_CREDENTIAL_SECRET"
+            ),
+            username=environ.get("OS_USERNAME"),
+            user_id=environ.get("OS_USER_ID"),
+            user_domain_name=environ.get("OS_USER_DOMAIN_NAME", "Default"),
+        )
+        return application_credential_provider.KeystoneV3ApplicationCredentialAuthProvider(
+            credentials, auth_url
+        )
+
+    password_credentials = dict(
+        username=environ["OS_USERNAME"],
+        password=environ["OS_PASSWORD"],
+        project_name=environ.get("OS_PROJECT_NAME"),
+        project_id=environ.get("OS_PROJECT_ID"),
+        user_domain_name=environ.get("OS_USER_DOMAIN_NAME", "Default"),
+        project_domain_name=environ.get("OS_PROJECT_DOMAIN_NAME", "Default"),
+    )
+    if auth_type == "v3oidcpassword":
+        credentials = oidc_provider.KeystoneV3OidcCredentials(
+            identity_provider=environ["OS_IDENTITY_PROVIDER"],
+            protocol=environ["OS_PROTOCOL"],
+            client_id=environ["OS_CLIENT_ID"],
+            client_secret=environ.get("OS_CLIENT_SECRET"),
+            discovery_endpoint=environ.get("OS_DISCOVERY_ENDPOINT"),
+            access_token_type=environ.get("OS_ACCESS_TOKEN_TYPE", "access_token"),
+            **password_credentials
+        )
+        return oidc_provider.KeystoneV3OidcAuthProvider(credentials, auth_url)
+    return auth.KeystoneV3AuthProvider(
+        auth.KeystoneV3Credentials(**password_credentials), auth_url
+    )
+
+
+def make_clients(args, site=None):
+    """Return (leases client, hosts client) for the fake or real site."""
+    kwargs = {"connection_keepalive": args.keepalive}
+    if site is not None:
+        return (
+            site.make_client(leases_client.LeasesClient, **kwargs),
+            site.make_client(hosts_client.ReservableHostsClient, **kwargs),
+        )
+
+    auth_provider = _site_auth_provider()
+    region = os.environ.get("OS_REGION_NAME", "")
+    kwargs["endpoint_type"] = args.endpoint_type
+    return (
+        leases_client.LeasesClient(auth_provider, "reservation", region, **kwargs),
+        hosts_client.ReservableHostsClient(auth_provider, "reservation", region, **kwargs),
+    )
+
+
+def _add_site_arguments(parser):
+    parser.add_argument("--fake", action="store_true",
+                        help="run against an in-process fake blazar")
+    parser.add_argument("--fake-hosts", type=int, default=100)
+    parser.add_argument("--fake-latency", type=float, default=0.0,
+                        help="added latency in seconds of the fake site")
+    parser.add_argument("--fake-error-rate", type=float, default=0.0)
+    parser.add_argument("--endpoint-type", default="publicURL")
+    parser.add_argument("--keepalive", action="store_true",
+                        help="reuse connections between requests")
+    parser.add_argument("--output", help="write the report as JSON to this file")
+
+
+def _run(args, site):
+    mix = DEFAULT_MIX
+    if args.mix:
+        mix = {op: float(weight) for op, weight in
+               (item.split(":") for item in args.mix.split(","))}
+        unknown = set(mix) - set(DEFAULT_MIX)
+        if unknown:
+            raise SystemExit("Unknown operations: %s" % ", ".join(sorted(unknown)))
+
+    leases, hosts = make_clients(args, site)
+    generator = LoadGenerator(
+        leases, hosts, args.rate, concurrency=args.concurrency, mix=mix, seed=args.seed
+    )
+    try:
+        report = generator.run(args.duration)
+    finally:
+        generator.cleanup()
+    print_report(report)
+    return report
+
+
+def _lag(args, site):
+    leases, _ = make_clients(args, site)
+    levels = []
+    for batch_size in (int(size) for size in args.batch_sizes.split(",")):
+        levels.append(
+            measure_event_lag(
+                leases,
+                batch_size,
+                spread=args.spread,
+                duration=args.lease_duration,
+                poll_interval=args.poll_interval,
+                timeout=args.timeout,
+            )
+        )
+    report = {"levels": levels}
+    print_lag_report(report)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="blazar-loadgen", description=__doc__.split("\n")[0]
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run = subparsers.add_parser("run", help="open-loop lease and listing load")
+    _add_site_arguments(run)
+    run.add_argument("--rate", type=float, default=5.0,
+                     help="mean request arrivals per second")
+    run.add_argument("--duration", type=float, default=60.0, help="seconds to run")
+    run.add_argument("--concurrency", type=int, default=10)
+    run.add_argument("--mix", help="operation weights, e.g. create_lease:1,list_leases:4")
+    run.add_argument("--seed", type=int)
+    run.set_defaults(func=_run)
+
+    lag = subparsers.add_parser(
+        "lag", help="lease start/end event lag for increasing batch sizes"
+    )
+    _add_site_arguments(lag)
+    lag.add_argument("--batch-sizes", default="1,10,50",
+                     help="comma separated numbers of leases per batch")
+    lag.add_argument("--spread", type=int, default=1,
+                     help="minutes over which the lease starts of a batch are staggered")
+    lag.add_argument("--lease-duration", type=int, default=1, help="minutes")
+    lag.add_argument("--poll-interval", type=float, default=1.0)
+    lag.add_argument("--timeout", type=float, default=900,
+                     help="seconds to wait for the leases of a batch to end")
+    lag.add_argument("--fake-start-lag", type=float, default=0.0)
+    lag.add_argument("--fake-end-lag", type=float, default=0.0)
+    lag.set_defaults(func=_lag)
+
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.fake:
+        server = fake_blazar.FakeBlazarServer(
+            fake_blazar.FakeBlazar(
+                hosts=args.fake_hosts,
+                latency=args.fake_latency,
+                error_rate=args.fake_error_rate,
+                start_lag=getattr(args, "fake_start_lag", 0.0),
+                end_lag=getattr(args, "fake_end_lag", 0.0),
+            )
+        ).start()
+    try:
+        report = args.func(args, server)
+    finally:
+        if server is not None:
+            server.stop()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
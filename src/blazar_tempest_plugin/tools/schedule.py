@@ -0,0 +1,79 @@
+"""Plan stestr workers from the recorded test durations.
+
+Reads the ``[reservation] duration_history`` database and writes an stestr
+worker file that spreads the test classes over the workers longest first,
+keeping each class on one worker::
+
+    stestr list > tests.txt
+    blazar-schedule --history durations.sqlite --workers 4 \\
+        --tests tests.txt --output workers.yaml
+    stestr run --worker-file workers.yaml
+
+Tests missing from the history are estimated at the median test duration.
+"""
+
+import argparse
+import sys
+
+from blazar_tempest_plugin.common import history
+
+
+def _naive_makespan(estimates, workers):
+    """Makespan of dealing the classes out in listing order."""
+    loads = [0.0] * workers
+    for i, class_id in enumerate(sorted(estimates)):
+        loads[i % workers] += estimates[class_id]
+    return max(loads) if loads else 0.0
+
+
+def _worker_count(value):
+    workers = int(value)
+    if workers < 1:
+        raise argparse.ArgumentTypeError("must be at least 1")
+    return workers
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="blazar-schedule", description=__doc__.split("\n")[0]
+    )
+    parser.add_argument("--history", required=True,
+                        help="duration history database")
+    parser.add_argument("--workers", type=_worker_count, required=True)
+    parser.add_argument("--tests", type=argparse.FileType("r"),
+                        help="test ids to schedule, one per line, e.g. the "
+                        "output of 'stestr list' ('-' for stdin). Defaults "
+                        "to every test in the history.")
+    parser.add_argument("--default", type=float,
+                        help="estimate in seconds for tests never seen")
+    parser.add_argument("--output", type=argparse.FileType("w"), default=sys.stdout,
+                        help="worker file to write (default: stdout)")
+    args = parser.parse_args(argv)
+
+    test_ids = None
+    if args.tests:
+        test_ids = [line.strip() for line in args.tests if line.strip()]
+
+    durations = history.DurationHistory(args.history)
+    try:
+        estimates = durations.class_estimates(test_ids, default=args.default)
+    finally:
+        durations.close()
+    groups = history.schedule(estimates, args.workers)
+    args.output.write(history.worker_file(groups))
+    if args.output is not sys.stdout:
+        args.output.close()
+
+    for worker, (load, classes) in enumerate(groups):
+        print("worker %d: %d classes, %.0fs" % (worker, len(classes), load),
+              file=sys.stderr)
+    print(
+        "expected makespan %.0fs (%.0fs dealing classes out in order)"
+        % (max(load for load, _ in groups), _naive_makespan(estimates, args.workers)),
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+"""Summarize the provisioning timelines written by a tempest run.
+
+Scenario tests append their timeline to ``[reservation] timeline_file``;
+this prints, for each provisioning phase, how long it took across the
+tests of the run and which test was slowest::
+
+    blazar-timeline /opt/stack/tempest/timeline.jsonl
+"""
+
+import argparse
+import json
+import sys
+
+from blazar_tempest_plugin.common import timeline
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="blazar-timeline", description=__doc__.split("\n")[0]
+    )
+    parser.add_argument("files", nargs="+", help="timeline files to summarize")
+    parser.add_argument(
+        "--json", action="store_true", help="print the summary as JSON"
+    )
+    args = parser.parse_args(argv)
+
+    records = []
+    for path in args.files:
+        records.extend(timeline.load(path))
+    summary = timeline.summarize(records)
+
+    if args.json:
+        json.dump(summary, sys.stdout, indent=2, sort_keys=True)
+        print()
+    elif summary:
+        print("%d tests" % len(records))
+        print(timeline.format_summary(summary))
+    else:
+        print("no provisioning phases recorded")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""Decoding and paging costs of the reservation clients."""
+
+import json
+from unittest import mock
+
+from harness import benchmark
+
+from blazar_tempest_plugin.services.reservation import hosts_client
+
+
+class _Response(dict):
+    status = 200
+
+
+class _StreamedResponse(object):
+    status = 200
+
+    def __init__(self, data):
+        self.data = data
+
+    def stream(self, amt):
+        for i in range(0, len(self.data), amt):
+            yield self.data[i:i + amt]
+
+    def release_conn(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def _hosts(size):
+    return [
+        {
+            "id": str(i),
+            "hypervisor_hostname": "node-%05d" % i,
+            "node_type": "compute_skylake",
+            "vcpus": 48,
+            "memory_mb": 196608,
+            "local_gb": 240,
+            "reservable": True,
+        }
+        for i in range(size)
+    ]
+
+
+def _allocations(size):
+    return [
+        {
+            "resource_id": str(i),
+            "reservations": [
+                {
+                    "id": "reservation-%d-%d" % (i, j),
+                    "lease_id": "lease-%d-%d" % (i, j),
+                    "start_date": "2050-12-26T12:00:00.000000",
+                    "end_date": "2050-12-27T12:00:00.000000",
+                }
+                for j in range(2)
+            ],
+        }
+        for i in range(size)
+    ]
+
+
+def _client(**kwargs):
+    return hosts_client.ReservableHostsClient(
+        mock.Mock(), "reservation", "regionOne", **kwargs
+    )
+
+
+@benchmark()
+def list_hosts(size):
+    client = _client()
+    body = json.dumps({"hosts": _hosts(size)})
+    with mock.patch.object(client, "get", return_value=(_Response(), body)):
+        yield client.list_hosts
+
+
+@benchmark()
+def list_host_allocations(size):
+    client = _client()
+    body = json.dumps({"allocations": _allocations(size)})
+    with mock.patch.object(client, "get", return_value=(_Response(), body)):
+        yield client.list_host_allocations
+
+
+@benchmark()
+def iter_hosts(size):
+    client = _client()
+    data = json.dumps({"hosts": _hosts(size)}).encode("utf-8")
+
+    def get(url, chunked=False):
+        return _StreamedResponse(data), b""
+
+    with mock.patch.object(client, "get", side_effect=get):
+        yield lambda: sum(1 for _ in client.iter_hosts(limit=0))
+
+
+@benchmark()
+def show_host_cached(size):
+    client = _client(response_cache=True)
+    body = json.dumps({"host": _hosts(1)[0]})
+    with mock.patch.object(client, "get", return_value=(_Response(), body)):
+        client.show_host("0")
+
+        def op():
+            for _ in range(size):
+                client.show_host("0")
+
+        yield op
@@ -0,0 +1,74 @@
+"""Utility and auth helpers on realistic input sizes."""
+
+from unittest import mock
+
+from harness import benchmark
+
+from blazar_tempest_plugin.auth import oidc_provider
+from blazar_tempest_plugin.common import utils
+
+
+@benchmark()
+def get_server_floating_ip(size):
+    """Floating IP lookup on a server with ``size`` fixed addresses."""
+    addresses = {
+        "net-%d" % i: [{"addr": "10.0.%d.%d" % (i >> 8 & 255, i & 255),
+                        "OS-EXT-IPS:type": "fixed"}]
+        for i in range(size)
+    }
+    addresses["public"] = [{"addr": "192.0.2.10", "OS-EXT-IPS:type": "floating"}]
+    server = {"addresses": addresses}
+    yield lambda: utils.get_server_floating_ip(server)
+
+
+@benchmark()
+def oidc_get_auth(size):
+    """Token flattening in the OIDC provider, with ``size`` catalog entries."""
+    catalog = [
+        {
+            "id": "service-%d" % i,
+            "type": "type-%d" % i,
+            "endpoints": [
+                {"interface": "public", "region": "regionOne",
+                 "url": "https://example.com:%d" % i}
+            ],
+        }
+        for i in range(size)
+    ]
+    token = {
+        "expires_at": "2050-12-27T12:00:00.000000Z",
+        "catalog": catalog,
+        "user": {"id": "user", "name": "user"},
+        "project": {"id": "project", "name": "project"},
+    }
+
+    plugin = mock.Mock()
+    plugin.get_access.return_value.to_dict.return_value = {"token": token}
+    loader = mock.Mock()
+    loader.load_from_options.return_value = plugin
+
+    provider = oidc_provider.KeystoneV3OidcAuthProvider.__new__(
+        oidc_provider.KeystoneV3OidcAuthProvider
+    )
+    provider.credentials = oidc_provider.KeystoneV3OidcCredentials(
+        username="user",
+        password="password",
+        project_name="project",
+        user_domain_name="Default",
+        project_domain_name="Default",
+        protocol="openid",
+        identity_provider="chameleon",
+        client_id="client",
+        client_secret="secret",
+        access_token_type="access_token",
+        discovery_endpoint="https://auth.example.com/.well-known/openid-configuration",
+    )
+    provider.auth_url = "https://keystone.example.com/v3"
+    provider.dscv = False
+    provider.ca_certs = None
+    provider.http_timeout = None
+
+    with mock.patch.object(
+        oidc_provider.loading, "get_plugin_loader", return_value=loader
+    ), mock.patch.object(oidc_provider.session, "Session"):
+        yield provider._get_auth
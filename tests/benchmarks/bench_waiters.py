@@ -0,0 +1,63 @@
+"""Per-poll overhead of the lease waiters."""
+
+import threading
+from unittest import mock
+
+from harness import benchmark
+
+from blazar_tempest_plugin.common import waiters
+
+
+class _LeasesClient(object):
+    build_interval = 0
+    build_timeout = 3600
+
+    def __init__(self, leases, active_after=0):
+        self.leases = leases
+        self.active_after = active_after
+        self.calls = 0
+
+    def show_lease(self, lease_id):
+        self.calls += 1
+        status = "ACTIVE" if self.calls > self.active_after else "PENDING"
+        return {"lease": dict(self.leases[0], status=status)}
+
+    def list_leases(self):
+        return {"leases": self.leases}
+
+
+def _leases(size, status="PENDING"):
+    return [
+        {
+            "id": "lease-%d" % i,
+            "status": status,
+            "start_date": "2050-12-26T12:00:00.000000",
+            "end_date": "2050-12-27T12:00:00.000000",
+        }
+        for i in range(size)
+    ]
+
+
+@benchmark(sizes=(10, 1000))
+def wait_for_lease_status(size):
+    """One wait that polls ``size`` times before the lease is ACTIVE."""
+    client = _LeasesClient(_leases(1), active_after=size)
+
+    def op():
+        client.calls = 0
+        waiters.wait_for_lease_status(client, "lease-0", "ACTIVE")
+
+    with mock.patch.object(waiters.time, "sleep"):
+        yield op
+
+
+@benchmark()
+def lease_watcher_poll(size):
+    """One watcher tick with ``size`` leases listed and watched."""
+    leases = _leases(size)
+    watcher = waiters.LeaseWatcher(_LeasesClient(leases), interval=3600)
+    # pretend the background thread runs, the benchmark drives poll() itself
+    watcher._thread = threading.current_thread()
+    for lease in leases:
+        watcher.watch(lease["id"], "ACTIVE")
+    yield watcher.poll
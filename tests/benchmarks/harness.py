@@ -0,0 +1,89 @@
+"""Minimal benchmark harness.
+
+A benchmark is a generator function registered with ``@benchmark``. It is
+called once per size with that size, and yields the operation to time, a
+zero-argument callable. Building fixture data and patching happen around
+the yield, outside of the timed region.
+"""
+
+import contextlib
+import gc
+import statistics
+import time
+import tracemalloc
+
+BENCHMARKS = []
+
+DEFAULT_SIZES = (10, 1000, 50000)
+
+
+def benchmark(name=None, sizes=DEFAULT_SIZES):
+    def register(fn):
+        BENCHMARKS.append(
+            (name or fn.__name__, contextlib.contextmanager(fn), tuple(sizes))
+        )
+        return fn
+
+    return register
+
+
+def _percentile(samples, percent):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(percent / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(op, min_time=0.5, min_rounds=5, max_rounds=10000):
+    """Time op repeatedly, and return ops/sec, latency percentiles and memory.
+
+    op runs at least ``min_rounds`` times and for at least ``min_time``
+    seconds. Peak memory is taken from one extra, separately traced run,
+    so tracing does not slow the timed runs down.
+    """
+    op()  # warm up caches and lazy imports
+
+    samples = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        while len(samples) < max_rounds and (
+            len(samples) < min_rounds or time.perf_counter() - started < min_time
+        ):
+            start = time.perf_counter()
+            op()
+            samples.append(time.perf_counter() - start)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        op()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "rounds": len(samples),
+        "ops_per_sec": len(samples) / sum(samples),
+        "p50": statistics.median(samples),
+        "p99": _percentile(samples, 99),
+        "peak_memory": peak,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Return regressions: entries slower or bigger than baseline x tolerance."""
+    regressions = []
+    for key, result in sorted(results.items()):
+        base = baseline.get(key)
+        if base is None:
+            continue
+        for metric in ("p50", "peak_memory"):
+            if base[metric] and result[metric] > base[metric] * tolerance:
+                regressions.append(
+                    (key, metric, base[metric], result[metric], result[metric] / base[metric])
+                )
+    return regressions
@@ -0,0 +1,96 @@
+"""Run the benchmark suite, and compare the results against a baseline.
+
+    python tests/benchmarks/run.py [--sizes 10,1000] [--filter list_]
+        [--output results.json] [--baseline baseline.json] [--save-baseline]
+        [--allow-missing-baseline]
+
+Results are written as JSON keyed by "<benchmark>[<size>]". The run exits
+with status 1 if the median latency or peak memory of any benchmark grew
+by more than --tolerance against the baseline, and with status 2 if there
+is no baseline, unless --allow-missing-baseline is given. Baselines are
+machine specific: record one with --save-baseline on the machine that
+runs the comparison.
+"""
+
+import argparse
+import glob
+import importlib
+import json
+import os
+import sys
+
+import harness
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(HERE, "baseline.json")
+
+
+def _load_benchmarks():
+    for path in sorted(glob.glob(os.path.join(HERE, "bench_*.py"))):
+        importlib.import_module(os.path.splitext(os.path.basename(path))[0])
+    return harness.BENCHMARKS
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sizes", help="comma separated sizes to run")
+    parser.add_argument("--filter", help="only run benchmarks containing this")
+    parser.add_argument("--min-time", type=float, default=0.5,
+                        help="minimum seconds to run each benchmark for")
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store the results as the new baseline")
+    parser.add_argument("--allow-missing-baseline", action="store_true",
+                        help="exit with 0 instead of 2 when there is no baseline "
+                        "to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.25,
+                        help="allowed slowdown/growth factor against the baseline")
+    args = parser.parse_args(argv)
+
+    sizes = None
+    if args.sizes:
+        sizes = {int(size) for size in args.sizes.split(",")}
+
+    results = {}
+    print("%-40s %12s %12s %12s %12s" % ("benchmark", "ops/sec", "p50 ms", "p99 ms", "peak KiB"))
+    for name, bench, bench_sizes in _load_benchmarks():
+        if args.filter and args.filter not in name:
+            continue
+        for size in bench_sizes:
+            if sizes is not None and size not in sizes:
+                continue
+            key = "%s[%d]" % (name, size)
+            with bench(size) as op:
+                result = harness.measure(op, min_time=args.min_time)
+            results[key] = result
+            print("%-40s %12.1f %12.3f %12.3f %12.1f" % (
+                key, result["ops_per_sec"], result["p50"] * 1000,
+                result["p99"] * 1000, result["peak_memory"] / 1024.0))
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(
+            "WARNING: no baseline at %s, nothing was compared. Record one on "
+            "this machine with --save-baseline." % args.baseline,
+            file=sys.stderr,
+        )
+        return 0 if args.allow_missing_baseline else 2
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    regressions = harness.compare(results, baseline, args.tolerance)
+    for key, metric, before, after, ratio in regressions:
+        print("REGRESSION %s %s: %.6g -> %.6g (x%.2f)" % (key, metric, before, after, ratio))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
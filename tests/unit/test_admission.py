@@ -0,0 +1,126 @@
+import multiprocessing
+from datetime import datetime
+
+import fixtures
+from tempest.lib import exceptions as lib_exc
+from tempest.tests import base
+
+from blazar_tempest_plugin.common import admission
+from blazar_tempest_plugin.common import exceptions
+from blazar_tempest_plugin.services.reservation import devices_client
+from blazar_tempest_plugin.services.reservation import hosts_client
+from blazar_tempest_plugin.services.reservation import leases_client
+from blazar_tempest_plugin.tools import fake_blazar
+
+
+class TestAdmission(base.TestCase):
+    def setUp(self):
+        super(TestAdmission, self).setUp()
+        self.lock_dir = self.useFixture(fixtures.TempDir()).path
+        self.now = [0.0]
+        self.free = {"device:raspberrypi4-64": 2, "physical:host": 1}
+
+    def _controller(self, **kwargs):
+        def sleep(seconds):
+            self.now[0] += seconds
+
+        kwargs.setdefault("timeout", 100)
+        return admission.AdmissionController(
+            lambda key, holder_leases: self.free[key],
+            lock_dir=self.lock_dir,
+            poll_interval=10,
+            clock=lambda: self.now[0],
+            sleep=sleep,
+            **kwargs,
+        )
+
+    def test_classes_queue_for_capacity(self):
+        site = fake_blazar.FakeBlazar(hosts=1, devices=1)
+        server = fake_blazar.FakeBlazarServer(site).start()
+        self.addCleanup(server.stop)
+        leases = server.make_client(leases_client.LeasesClient)
+        controller = self._controller(refresh_interval=0)
+        controller.capacity = admission.ApiCapacity(
+            devices_client=server.make_client(devices_client.ReservableDevicesClient)
+        )
+        demand = {"device:raspberrypi4-64": 1}
+
+        first, waited = controller.admit("A", demand)
+        self.assertEqual(0, waited)
+        # A holds the only device before its lease exists...
+        self.assertRaises(
+            exceptions.AdmissionTimeoutException, controller.admit, "B", demand
+        )
+        # ...and once its lease makes the device look busy
+        lease = leases.create_lease(
+            name="lease",
+            start_date="now",
+            end_date=datetime(2050, 1, 1).strftime("%Y-%m-%d %H:%M"),
+            reservations=[{"resource_type": "device", "min": 1, "max": 1,
+                           "resource_properties": ""}],
+        )["lease"]
+        controller.note_lease(first, list(demand), lease["id"])
+        self.now[0] = 0
+        self.assertRaises(
+            exceptions.AdmissionTimeoutException, controller.admit, "B", demand
+        )
+
+        controller.release(first, list(demand))
+        leases.delete_lease(lease["id"])
+        self.now[0] = 0
+        _, waited = controller.admit("B", demand)
+        self.assertEqual(0, waited)
+
+    def test_failed_admission_releases_taken_resources(self):
+        controller = self._controller(timeout=5)
+        controller.admit("A", {"physical:host": 1})
+        self.assertRaises(
+            exceptions.AdmissionTimeoutException,
+            controller.admit,
+            "B",
+            {"device:raspberrypi4-64": 1, "physical:host": 1},
+        )
+        holders = controller._semaphore("device:raspberrypi4-64").holders()
+        self.assertEqual({}, holders)
+
+    def test_unknown_capacity_admits(self):
+        def forbidden(key, holder_leases):
+            raise lib_exc.Forbidden()
+
+        controller = self._controller()
+        controller.capacity = forbidden
+        for name in ("A", "B", "C"):
+            controller.admit(name, {"physical:host": 1})
+
+    def test_holders_of_exited_processes_are_dropped(self):
+        process = multiprocessing.Process(target=lambda: None)
+        process.start()
+        process.join()
+
+        semaphore = self._controller()._semaphore("physical:host")
+        semaphore.try_acquire("%d:A" % process.pid, 1, lambda leases: 1, 60)
+        self.assertEqual({}, semaphore.holders())
+
+    def test_api_capacity(self):
+        site = fake_blazar.FakeBlazar(hosts=3, devices=2)
+        with fake_blazar.FakeBlazarServer(site) as server:
+            capacity = admission.ApiCapacity(
+                hosts_client=server.make_client(hosts_client.ReservableHostsClient),
+                devices_client=server.make_client(
+                    devices_client.ReservableDevicesClient
+                ),
+            )
+            self.assertEqual(2, capacity("device:raspberrypi4-64"))
+            self.assertEqual(0, capacity("device:jetson-nano"))
+            self.assertEqual(3, capacity("physical:host"))
+            self.assertEqual(1, capacity("physical:host:compute_skylake"))
+
+            leases = server.make_client(leases_client.LeasesClient)
+            leases.create_lease(
+                name="lease",
+                start_date="now",
+                end_date=datetime(2050, 1, 1).strftime("%Y-%m-%d %H:%M"),
+                reservations=[{"resource_type": "device", "min": 1, "max": 1,
+                               "resource_properties": ""}],
+            )
+            self.assertEqual(1, capacity("device:raspberrypi4-64"))
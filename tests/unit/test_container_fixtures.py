@@ -0,0 +1,91 @@
+from unittest import mock
+
+from tempest.tests import base
+
+from blazar_tempest_plugin.common import admission
+from blazar_tempest_plugin.common import utils
+from blazar_tempest_plugin.common import waiters
+from blazar_tempest_plugin.tests.api import base as api_base
+
+
+class TestSharedContainer(base.TestCase):
+    def setUp(self):
+        super(TestSharedContainer, self).setUp()
+
+        # defined here so the test loader does not pick it up
+        class FakeContainerTest(api_base.ContainerApiBase):
+            share_container = True
+            _class_cleanups = []
+            os_primary = mock.Mock()
+            leases_client = mock.Mock()
+            container_client = mock.Mock()
+
+            def test_read(self):
+                pass
+
+            def test_read_again(self):
+                pass
+
+            @api_base.dedicated_container
+            def test_delete(self):
+                pass
+
+        self.test_class = FakeContainerTest
+        self.leases = FakeContainerTest.leases_client
+        self.leases.create_lease.return_value = {"lease": {"id": "shared"}}
+        self.containers = FakeContainerTest.container_client
+        self.containers.post_container.return_value = (
+            mock.Mock(status=202), mock.Mock(uuid="container")
+        )
+        self.patchobject(admission, "admit_test_class")
+        watcher = self.patchobject(waiters, "get_lease_watcher").return_value
+        watcher.wait_for_lease_status.side_effect = lambda lease_id, status: {
+            "id": lease_id
+        }
+        self.patchobject(
+            utils, "get_device_reservation_from_lease",
+            side_effect=lambda lease: lease["id"],
+        )
+        leases = iter(range(10))
+        self.patchobject(
+            FakeContainerTest, "_reserve_device",
+            side_effect=lambda: {"id": "lease-%d" % next(leases)},
+        )
+        self.patchobject(
+            FakeContainerTest, "_create_reserved_container",
+            side_effect=lambda name, hints, sleep: mock.Mock(sleep=sleep),
+        )
+
+    def _setup(self, method):
+        test = self.test_class(method)
+        test._setup_container()
+        return test
+
+    def test_read_only_tests_share_one_container(self):
+        self.test_class.resource_setup()
+        first = self._setup("test_read")
+        second = self._setup("test_read_again")
+        dedicated = self._setup("test_delete")
+
+        self.assertIs(first.container, second.container)
+        self.assertEqual("shared", second.lease["id"])
+        self.assertIn("sleep 3600", self.containers.post_container.call_args.args[0].command)
+        # the shared lease ends after its container
+        self.assertGreater(
+            self.leases.create_lease.call_args.kwargs["end_date"],
+            utils.time_offset_to_blazar_string(seconds=3600),
+        )
+        self.assertEqual("lease-0", dedicated.lease["id"])
+        self.assertEqual(60, dedicated.container.sleep)
+
+        # the shared lease and container are deleted by class cleanups,
+        # whose failures tearDownClass reports
+        cleanups = self.test_class._class_cleanups
+        self.assertEqual(3, len(cleanups))
+        for fn, args, kwargs in reversed(cleanups):
+            fn(*args, **kwargs)
+        self.containers.delete_container.assert_called_once_with(
+            "container", {"stop": True}
+        )
+        self.leases.delete_lease.assert_called_once_with("shared")
+        self.assertIsNone(self.test_class._shared_container)
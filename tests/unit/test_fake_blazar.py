@@ -0,0 +1,85 @@
+import json
+
+from tempest.lib import exceptions as lib_exc
+from tempest.tests import base
+
+from blazar_tempest_plugin.common import waiters
+from blazar_tempest_plugin.services.reservation import hosts_client
+from blazar_tempest_plugin.services.reservation import leases_client
+from blazar_tempest_plugin.tools import fake_blazar
+
+
+class TestFakeBlazar(base.TestCase):
+    def setUp(self):
+        super(TestFakeBlazar, self).setUp()
+        self.clock = fake_blazar.FakeClock(start=0, speed=0)
+        self.site = fake_blazar.FakeBlazar(
+            hosts=5, node_types=["a", "b"], clock=self.clock, start_lag=30
+        )
+        server = fake_blazar.FakeBlazarServer(self.site).start()
+        self.addCleanup(server.stop)
+
+        self.leases = server.make_client(
+            leases_client.LeasesClient, retry_attempts=2, retry_base_delay=0
+        )
+        self.hosts = server.make_client(
+            hosts_client.ReservableHostsClient, retry_attempts=2, retry_base_delay=0
+        )
+
+    def _create_lease(self, count=1, node_type="a", minutes=10):
+        return self.leases.create_lease(
+            name="lease",
+            start_date="now",
+            end_date="1970-01-01 00:%02d" % minutes,
+            reservations=[
+                {
+                    "resource_type": "physical:host",
+                    "min": count,
+                    "max": count,
+                    "resource_properties": json.dumps(["==", "$node_type", node_type]),
+                }
+            ],
+        )["lease"]
+
+    def test_lease_lifecycle_follows_the_clock(self):
+        lease = self._create_lease()
+        self.assertEqual("STARTING", lease["status"])
+
+        self.clock.advance(30)
+        lease = self.leases.show_lease(lease["id"])["lease"]
+        self.assertEqual("ACTIVE", lease["status"])
+        self.assertEqual(
+            ["DONE", "UNDONE"], [event["status"] for event in lease["events"]]
+        )
+
+        self.clock.advance(600)
+        self.assertEqual(
+            "TERMINATED", self.leases.show_lease(lease["id"])["lease"]["status"]
+        )
+
+    def test_reservations_are_limited_by_the_fleet(self):
+        lease = self._create_lease(count=3)
+        host_ids = [h["id"] for h in self.leases.show_hosts_in_lease(lease["id"])["hosts"]]
+        self.assertEqual(["1", "3", "5"], host_ids)
+        allocation = self.hosts.show_host_allocation("3")["allocation"]
+        self.assertEqual(lease["id"], allocation["reservations"][0]["lease_id"])
+
+        self.assertRaises(lib_exc.ServerFault, self._create_lease, count=1)
+        self._create_lease(count=2, node_type="b")
+
+        self.leases.delete_lease(lease["id"])
+        waiters.wait_for_leases_termination(self.leases, [lease["id"]])
+        self._create_lease(count=3)
+
+    def test_pagination_and_fault_injection(self):
+        self.site.fail_next(count=1, status=503, method="GET", path="/os-hosts")
+        self.assertEqual(
+            [str(i) for i in range(1, 6)],
+            [host["id"] for host in self.hosts.iter_hosts(limit=2)],
+        )
+        self.assertEqual(4, self.site.requests["GET /os-hosts"])
+
+        self.site.fail_next(count=1, status=503, path="/leases")
+        self.assertEqual([], self.leases.list_leases()["leases"])
+        self.site.fail_next(count=1, status=503, method="POST")
+        self.assertRaises(lib_exc.UnexpectedResponseCode, self._create_lease)
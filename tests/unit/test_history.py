@@ -0,0 +1,62 @@
+import io
+
+import fixtures
+from tempest.tests import base
+
+from blazar_tempest_plugin.common import history
+from blazar_tempest_plugin.tools import schedule as schedule_tool
+
+
+class TestDurationHistory(base.TestCase):
+    def setUp(self):
+        super(TestDurationHistory, self).setUp()
+        self.path = self.useFixture(fixtures.TempDir()).path + "/durations.sqlite"
+        self.history = history.DurationHistory(self.path, window=3)
+        self.addCleanup(self.history.close)
+
+    def test_estimates_use_recent_samples(self):
+        for i, duration in enumerate([500, 10, 20, 30]):
+            self.history.record(history.TEST, "m.A.test_1", duration, recorded_at=i)
+        self.assertEqual({"m.A.test_1": 20}, self.history.estimates(history.TEST))
+
+    def test_class_estimates(self):
+        self.history.record_test("m.A.test_1[smoke]", 10)
+        self.history.record_test("m.A.test_2", 30)
+        self.history.record_test("m.B.test_1", 20)
+        # class B's own duration includes its fixtures
+        self.history.record_class("m.B", 900)
+
+        estimates = self.history.class_estimates(
+            ["m.A.test_1[smoke]", "m.A.test_2", "m.A.test_new", "m.B.test_1",
+             "m.C.test_1"]
+        )
+        self.assertEqual({"m.A": 60, "m.B": 900, "m.C": 20}, estimates)
+
+    def test_longest_first_schedule(self):
+        estimates = {"a": 100, "b": 60, "c": 50, "d": 40, "e": 30, "f": 20}
+        groups = history.schedule(estimates, 2)
+        self.assertEqual([(160, ["a", "d", "f"]), (140, ["b", "c", "e"])], groups)
+        self.assertEqual(
+            "- worker:\n  - '^m\\.A\\.'\n", history.worker_file([(1, ["m.A"]), (0, [])])
+        )
+
+    def test_schedule_tool(self):
+        self.history.record_class("m.Long", 1000)
+        self.history.record_test("m.Short.test_1", 10)
+        output = self.path + ".yaml"
+        self.patch("sys.stderr", io.StringIO())
+
+        schedule_tool.main(["--history", self.path, "--workers", "2",
+                            "--output", output])
+        with open(output) as f:
+            self.assertEqual(
+                "- worker:\n  - '^m\\.Long\\.'\n- worker:\n  - '^m\\.Short\\.'\n",
+                f.read(),
+            )
+
+    def test_schedule_tool_rejects_no_workers(self):
+        self.patch("sys.stderr", io.StringIO())
+        self.assertRaises(
+            SystemExit, schedule_tool.main,
+            ["--history", self.path, "--workers", "0"],
+        )
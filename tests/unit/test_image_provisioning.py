@@ -0,0 +1,119 @@
+from unittest import mock
+
+from tempest.tests import base
+
+from blazar_tempest_plugin.tests.scenario import test_images
+
+
+class TestImageProvisioner(base.TestCase):
+    def setUp(self):
+        super(TestImageProvisioner, self).setUp()
+        self.fixtures = {name: mock.Mock() for name in ("a", "b")}
+        self.error = Exception("no such image")
+
+        # defined here so the test loader does not pick it up, with its
+        # own state rather than the real provisioner's
+        class FakeProvisioner(test_images.ImageProvisioner):
+            _set_up = False
+            _torn_down = False
+            _error = None
+            _provisioned = {}
+            _released = set()
+
+        def set_up():
+            FakeProvisioner._provisioned.update({
+                name: {"fixture": fixture} for name, fixture in self.fixtures.items()
+            })
+            FakeProvisioner._provisioned["c"] = self.error
+
+        self.provisioner = FakeProvisioner
+        self.set_up = self.patchobject(FakeProvisioner, "setUpClass", side_effect=set_up)
+        self.tear_down = self.patchobject(FakeProvisioner, "tearDownClass")
+
+    def test_images_are_provisioned_once(self):
+        self.assertIs(self.fixtures["a"], self.provisioner.acquire("a")["fixture"])
+        self.assertIs(self.fixtures["b"], self.provisioner.acquire("b")["fixture"])
+        self.assertEqual(1, self.set_up.call_count)
+
+    def test_failed_image_raises(self):
+        self.assertRaises(Exception, self.provisioner.acquire, "c")
+        self.provisioner.acquire("a")
+
+    def test_last_release_tears_down(self):
+        self.provisioner.acquire("a")
+        for name in ("a", "b", "c"):
+            self.tear_down.assert_not_called()
+            self.provisioner.release(name)
+        self.fixtures["a"].doCleanups.assert_called_once_with()
+        self.fixtures["b"].doCleanups.assert_called_once_with()
+        self.tear_down.assert_called_once_with()
+
+        # the module teardown does not tear down twice
+        self.provisioner._tear_down()
+        self.assertEqual(1, self.tear_down.call_count)
+
+    def test_tear_down_frees_unclaimed_servers(self):
+        # e.g. the class of image b was filtered out
+        self.provisioner.acquire("a")
+        self.provisioner.release("a")
+        self.tear_down.assert_not_called()
+
+        self.provisioner._tear_down()
+        self.fixtures["b"].doCleanups.assert_called_once_with()
+        self.tear_down.assert_called_once_with()
+        self.assertEqual({"a"}, self.provisioner._released)
+
+        # a later image class sets the servers up again
+        self.provisioner.acquire("b")
+        self.assertEqual(2, self.set_up.call_count)
+
+    def test_failed_setup_is_raised_by_every_class(self):
+        self.set_up.side_effect = self.error
+        self.assertRaises(Exception, self.provisioner.acquire, "a")
+        self.assertRaises(Exception, self.provisioner.acquire, "b")
+        self.assertEqual(1, self.set_up.call_count)
+        self.provisioner.release("a")
+        self.tear_down.assert_not_called()
+
+
+class TestImageRebuilder(base.TestCase):
+    def setUp(self):
+        super(TestImageRebuilder, self).setUp()
+        self.servers_client = mock.Mock()
+        self.servers_client.show_server.side_effect = lambda server_id: {
+            "server": {"id": server_id}
+        }
+        self.patchobject(
+            test_images, "find_image",
+            side_effect=lambda client, name: {"id": name + "-id", "name": name},
+        )
+        self.wait = self.patchobject(test_images.tempest_waiters, "wait_for_server_status")
+        self.patchobject(test_images.ImageRebuilder, "image_client", mock.Mock(), create=True)
+        self.patchobject(
+            test_images.ImageRebuilder, "servers_client", self.servers_client, create=True
+        )
+        self.fixture = mock.Mock()
+        self.shared = {
+            "image": {"id": "a-id", "name": "a"},
+            "server": {"id": "server"},
+            "fip": "192.0.2.1",
+            "remote": mock.sentinel.first_remote,
+            "fixture": self.fixture,
+        }
+
+    def test_booted_image_is_not_rebuilt(self):
+        taken = test_images.ImageRebuilder._take("a", self.shared)
+        self.assertIs(mock.sentinel.first_remote, taken["remote"])
+        self.servers_client.rebuild_server.assert_not_called()
+
+    def test_other_images_rebuild_the_server(self):
+        self.fixture.get_remote_client.return_value = mock.sentinel.remote
+        taken = test_images.ImageRebuilder._take("b", self.shared)
+
+        self.servers_client.rebuild_server.assert_called_once_with("server", "b-id")
+        self.wait.assert_called_once_with(self.servers_client, "server", "ACTIVE")
+        self.fixture.get_remote_client.assert_called_once_with(
+            "192.0.2.1", server={"id": "server"}
+        )
+        self.assertIs(mock.sentinel.remote, taken["remote"])
+        self.assertEqual("b", taken["image"]["name"])
@@ -0,0 +1,82 @@
+import json
+
+from tempest.lib import exceptions as lib_exc
+from tempest.tests import base
+
+from blazar_tempest_plugin.common import lease_pool
+from blazar_tempest_plugin.services.reservation import leases_client
+from blazar_tempest_plugin.tools import fake_blazar
+
+
+class TestLeasePool(base.TestCase):
+    def setUp(self):
+        super(TestLeasePool, self).setUp()
+        self.clock = fake_blazar.FakeClock(start=0, speed=0)
+        self.site = fake_blazar.FakeBlazar(hosts=2, node_types=["a"], clock=self.clock)
+        server = fake_blazar.FakeBlazarServer(self.site).start()
+        self.addCleanup(server.stop)
+        self.leases = server.make_client(leases_client.LeasesClient)
+        self.pool = lease_pool.LeasePool(size=1, min_remaining=300, now=self.clock.now)
+        self.created = []
+
+    def _create(self):
+        lease = self.leases.create_lease(
+            name="lease",
+            start_date="now",
+            end_date="1970-01-01 00:10",
+            reservations=[
+                {
+                    "resource_type": "physical:host",
+                    "min": 1,
+                    "max": 1,
+                    "resource_properties": json.dumps(["==", "$node_type", "a"]),
+                }
+            ],
+        )["lease"]
+        self.created.append(lease["id"])
+        return lease
+
+    def _borrow(self, key=("project", "physical:host", "a")):
+        return self.pool.borrow(key, self.leases, self._create)
+
+    def test_leases_are_reused(self):
+        first = self._borrow()
+        self.pool.give_back(first["id"])
+        second = self._borrow()
+        self.assertEqual(first["id"], second["id"])
+
+        # the pool keeps one idle lease per key, the extra one is deleted
+        third = self._borrow()
+        self.pool.give_back(second["id"])
+        self.pool.give_back(third["id"])
+        self.assertEqual(2, len(self.created))
+        self.assertRaises(lib_exc.NotFound, self.leases.show_lease, third["id"])
+
+    def test_leases_near_their_end_are_extended(self):
+        lease = self._borrow()
+        self.pool.give_back(lease["id"])
+
+        self.clock.advance(400)
+        lease = self._borrow()
+        self.assertEqual([lease["id"]], self.created)
+        self.assertGreater(lease["end_date"], "1971")
+
+    def test_inactive_leases_are_dropped(self):
+        lease = self._borrow()
+        self.pool.give_back(lease["id"])
+        self.leases.delete_lease(lease["id"])
+
+        other = self._borrow()
+        self.assertNotEqual(lease["id"], other["id"])
+
+    def test_drain_deletes_a_projects_leases(self):
+        mine = self._borrow()
+        self.pool.give_back(mine["id"])
+        theirs = self._borrow(key=("other", "physical:host", "a"))
+
+        self.pool.drain("project")
+        self.assertRaises(lib_exc.NotFound, self.leases.show_lease, mine["id"])
+        self.leases.show_lease(theirs["id"])
+
+        self.pool.drain()
+        self.assertRaises(lib_exc.NotFound, self.leases.show_lease, theirs["id"])
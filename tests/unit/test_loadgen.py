@@ -0,0 +1,123 @@
+from tempest.lib import auth
+from tempest.tests import base
+
+from blazar_tempest_plugin.auth import application_credential_provider
+from blazar_tempest_plugin.auth import oidc_provider
+from blazar_tempest_plugin.services.reservation import hosts_client
+from blazar_tempest_plugin.services.reservation import leases_client
+from blazar_tempest_plugin.tools import fake_blazar
+from blazar_tempest_plugin.tools import loadgen
+
+
+class TestHistogram(base.TestCase):
+    def test_percentiles_within_precision(self):
+        histogram = loadgen.Histogram()
+        for i in range(1, 1001):
+            histogram.record(i / 1000.0)
+
+        self.assertEqual(1000, histogram.count)
+        self.assertAlmostEqual(0.5, histogram.percentile(50), delta=0.5 * 0.02)
+        self.assertAlmostEqual(0.99, histogram.percentile(99), delta=0.99 * 0.02)
+        self.assertEqual(1.0, histogram.percentile(100))
+
+
+class TestLoadGenerator(base.TestCase):
+    def test_run_against_fake_site(self):
+        site = fake_blazar.FakeBlazar(hosts=10)
+        server = fake_blazar.FakeBlazarServer(site).start()
+        self.addCleanup(server.stop)
+        site.fail_next(count=2, status=503, method="GET", path="/os-hosts")
+
+        generator = loadgen.LoadGenerator(
+            server.make_client(leases_client.LeasesClient),
+            server.make_client(hosts_client.ReservableHostsClient),
+            rate=200,
+            concurrency=4,
+            mix={"create_lease": 2, "delete_lease": 1, "list_hosts": 1},
+            seed=1,
+        )
+        report = generator.run(duration=0.5)
+        generator.cleanup()
+
+        operations = report["operations"]
+        self.assertEqual({"create_lease", "delete_lease", "list_hosts"}, set(operations))
+        # concurrent identical GETs share a response, and so a failure too
+        self.assertEqual(
+            ["503 UnexpectedResponseCode"], list(operations["list_hosts"]["errors"])
+        )
+        self.assertEqual({}, operations["create_lease"]["errors"])
+        self.assertEqual({}, site.leases)
+
+
+class TestEventLag(base.TestCase):
+    def test_lag_against_fake_site(self):
+        # one fake minute per real second
+        clock = fake_blazar.FakeClock(speed=60)
+        site = fake_blazar.FakeBlazar(clock=clock, start_lag=20, end_lag=40)
+        server = fake_blazar.FakeBlazarServer(site).start()
+        self.addCleanup(server.stop)
+
+        report = loadgen.measure_event_lag(
+            server.make_client(leases_client.LeasesClient),
+            batch_size=3,
+            spread=2,
+            poll_interval=0.05,
+            timeout=10,
+            clock=clock.time,
+        )
+
+        self.assertEqual({}, report["errors"])
+        self.assertEqual(3, report["start_lag"]["count"])
+        # polls are 3 fake seconds apart
+        self.assertTrue(20 <= report["start_lag"]["p50"] <= 30, report)
+        self.assertTrue(40 <= report["end_lag"]["max"] <= 50, report)
+        self.assertEqual({}, site.leases)
+
+
+class TestSiteAuthProvider(base.TestCase):
+    def test_auth_types(self):
+        common = {"OS_AUTH_URL": "https://keystone/v3"}
+        password = loadgen._site_auth_provider(
+            dict(common, OS_USERNAME="user", OS_PASSWORD="secret",
+                 OS_PROJECT_NAME="project")
+        )
+        self.assertIsInstance(password, auth.KeystoneV3AuthProvider)
+
+        oidc = loadgen._site_auth_provider(
+            dict(common, OS_AUTH_TYPE="v3oidcpassword", OS_USERNAME="user",
+                 OS_PASSWORD="secret", OS_PROJECT_NAME="project",
+                 OS_IDENTITY_PROVIDER="idp", OS_PROTOCOL="openid",
+                 OS_CLIENT_ID="client")
+        )
+        self.assertIsInstance(oidc, oidc_provider.KeystoneV3OidcAuthProvider)
+        self.assertEqual("idp", oidc.credentials.identity_provider)
+
+        app = loadgen._site_auth_provider(
+            dict(common, OS_AUTH_TYPE="v3applicationcredential",
+                 OS_APPLICATION_CREDENTIAL_ID="id",
+                 OS_APPLICATION_CREDENTIAL_SECRET="secret")
+        )
+        self.assertIsInstance(
+            app,
+            application_credential_provider.KeystoneV3ApplicationCredentialAuthProvider,
+        )
+
+        self.assertRaises(
+            SystemExit, loadgen._site_auth_provider,
+            dict(common, OS_AUTH_TYPE="token"),
+        )
+
+    def test_application_credential_secret_is_not_shown(self):
+        credentials = application_credential_provider.KeystoneV3ApplicationCredentials(
+            application_credential_name="name",
+            application_credential_secret="s3cret",
+        )
+        self.assertIn("name", str(credentials))
+        self.assertNotIn("s3cret", str(credentials))
+        # the message of an invalid credentials error
+        ex = self.assertRaises(
+            Exception,
+            application_credential_provider.KeystoneV3ApplicationCredentialAuthProvider,
+            credentials, "https://keystone/v3",
+        )
+        self.assertNotIn("s3cret", str(ex))
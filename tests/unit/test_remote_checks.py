@@ -0,0 +1,115 @@
+import os
+import subprocess
+import tempfile
+
+from unittest import mock
+
+from tempest.lib import exceptions as lib_exc
+from tempest.tests import base
+
+from blazar_tempest_plugin.common import remote_checks
+from blazar_tempest_plugin.common import utils
+from blazar_tempest_plugin.tests.scenario import test_images
+
+
+class LocalRemote(object):
+    """Runs commands as tempest's RemoteClient would, on this host."""
+
+    def __init__(self):
+        self.commands = []
+
+    def exec_command(self, cmd):
+        self.commands.append(cmd)
+        return subprocess.run(
+            ["bash", "-c", "set -eu -o pipefail; " + cmd],
+            capture_output=True, text=True, check=True,
+        ).stdout
+
+
+class TestRemoteChecks(base.TestCase):
+    def test_checks_run_in_one_command(self):
+        remote = LocalRemote()
+        results = remote_checks.run_checks(remote, [
+            remote_checks.Check("echo", "echo out; echo err >&2"),
+            remote_checks.Check("fail", "exit 3"),
+            remote_checks.Check("after_exit", "printf 'a b\\n\\nc'"),
+            remote_checks.Check("file", remote_checks.wait_for_file("/nonexistent", timeout=1)),
+        ])
+
+        self.assertEqual(1, len(remote.commands))
+        self.assertEqual(["after_exit", "echo", "fail", "file"], sorted(results))
+        self.assertEqual("out\nerr\n", results["echo"].stdout)
+        self.assertTrue(results["echo"].ok)
+        self.assertEqual(3, results["fail"].exit_code)
+        self.assertEqual("a b\n\nc", results["after_exit"].stdout)
+        self.assertEqual(1, results["file"].exit_code)
+        self.assertGreaterEqual(results["echo"].duration, 0)
+
+    def test_unreported_checks_are_missing(self):
+        checks = [remote_checks.Check("a", "true"), remote_checks.Check("b", "true")]
+        output = "noise\nmarker 0 0 1.0 2.5 %s\n" % "aGk="
+        results = remote_checks.parse_output(output, checks, "marker")
+        self.assertEqual(["a"], list(results))
+        self.assertEqual("hi", results["a"].stdout)
+        self.assertEqual(1.5, results["a"].duration)
+
+    def test_wait_returns_once_the_file_appears(self):
+        path = os.path.join(tempfile.mkdtemp(), "openrc")
+        self.addCleanup(subprocess.run, ["rm", "-rf", os.path.dirname(path)])
+        subprocess.Popen(["bash", "-c", "sleep 0.5; touch %s" % path])
+
+        remote = LocalRemote()
+        result = remote_checks.wait(
+            remote, "openrc", remote_checks.wait_for_file(path, timeout=20)
+        )
+        self.assertTrue(result.ok)
+        self.assertLess(result.duration, 10)
+        self.assertEqual(1, len(remote.commands))
+
+        self.assertTrue(utils.wait_for_remote_file(remote, path, timeout=1))
+        self.assertEqual(2, len(remote.commands))
+
+        # directories are not files
+        self.assertFalse(
+            utils.wait_for_remote_file(remote, os.path.dirname(path), timeout=1)
+        )
+
+    def test_wait_for_file_in_directory_with_spaces(self):
+        directory = tempfile.mkdtemp(suffix=" with spaces")
+        self.addCleanup(subprocess.run, ["rm", "-rf", directory])
+        path = os.path.join(directory, "file")
+        subprocess.Popen(["bash", "-c", "sleep 0.5; touch '%s'" % path])
+        self.assertTrue(utils.wait_for_remote_file(LocalRemote(), path, timeout=20))
+
+    def test_wait_for_command_times_out(self):
+        result = remote_checks.wait(
+            LocalRemote(), "sleep", remote_checks.wait_for_command("sleep 5", timeout=1)
+        )
+        self.assertEqual(124, result.exit_code)
+
+    def test_image_checks_are_batched_once(self):
+        checks = test_images.batch_checks(["verify_openrc", "verify_openrc_exists"])
+        self.assertEqual(["openrc_exists", "openrc_token"], [c.name for c in checks])
+
+
+class TestBatchedImageChecks(base.TestCase):
+    def test_slow_wait_only_fails_its_own_check(self):
+        remote = mock.Mock()
+        quick_output = []
+
+        def exec_command(cmd):
+            if quick_output:
+                return LocalRemote().exec_command(cmd)
+            quick_output.append(cmd)
+            raise lib_exc.TimeoutException("cloud-init is slow")
+
+        remote.exec_command.side_effect = exec_command
+        checks = [
+            remote_checks.Check("wait", "sleep 600", blocking=True),
+            remote_checks.Check("quick", "echo ok"),
+        ]
+        results = test_images.run_batched_checks(remote, checks)
+
+        self.assertIsInstance(results["wait"], lib_exc.TimeoutException)
+        self.assertEqual("ok\n", results["quick"].stdout)
+        self.assertEqual(2, remote.exec_command.call_count)
@@ -0,0 +1,599 @@
+import asyncio
+import http.server
+import json
+import threading
+import time
+from unittest import mock
+
+import fixtures
+
+from tempest.lib import exceptions as lib_exc
+from tempest.tests import base
+
+from blazar_tempest_plugin.common import context
+from blazar_tempest_plugin.common import exceptions
+from blazar_tempest_plugin.common import tracing
+from blazar_tempest_plugin.common import waiters
+from blazar_tempest_plugin.services.reservation import async_base
+from blazar_tempest_plugin.services.reservation import async_clients
+from blazar_tempest_plugin.services.reservation import base as client_base
+from blazar_tempest_plugin.services.reservation import hosts_client
+from blazar_tempest_plugin.services.reservation import leases_client
+from blazar_tempest_plugin.services.reservation import pool
+from blazar_tempest_plugin.services.reservation import ratelimit
+from blazar_tempest_plugin.services.reservation import retry
+from blazar_tempest_plugin.tools.fake_blazar import FakeAuthProvider
+
+
+class FakeStreamedResponse(object):
+    """Mimic the raw urllib3 response returned for chunked GETs."""
+
+    def __init__(self, body, status=200, chunk_size=7):
+        self.data = json.dumps(body).encode("utf-8")
+        self.status = status
+        self.chunk_size = chunk_size
+        self.released = False
+
+    def stream(self, amt):
+        for i in range(0, len(self.data), self.chunk_size):
+            yield self.data[i:i + self.chunk_size]
+
+    def release_conn(self):
+        self.released = True
+
+    def close(self):
+        pass
+
+
+def _hosts(start, stop):
+    return [{"id": str(i), "hypervisor_hostname": "hv-%d" % i} for i in range(start, stop)]
+
+
+class TestJsonListStream(base.TestCase):
+    def test_yields_items_and_collects_members(self):
+        body = {
+            "hosts": _hosts(0, 5),
+            "hosts_links": [{"rel": "next", "href": "/os-hosts?marker=4"}],
+            "total": 12345,
+        }
+        data = json.dumps(body).encode("utf-8")
+        for chunk_size in (1, 3, 64):
+            chunks = [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+            stream = client_base._JsonListStream(chunks)
+            self.assertEqual(body["hosts"], list(stream))
+            self.assertEqual("hosts", stream.key)
+            self.assertEqual(12345, stream.members["total"])
+            self.assertEqual("4", client_base._next_link_marker(stream.members))
+
+    def test_multibyte_characters_split_across_chunks(self):
+        data = json.dumps({"leases": [{"id": "1", "name": "café—Ω"}]}, ensure_ascii=False)
+        data = data.encode("utf-8")
+        chunks = [data[i:i + 1] for i in range(len(data))]
+        self.assertEqual("café—Ω", list(client_base._JsonListStream(chunks))[0]["name"])
+
+
+class TestIterResources(base.TestCase):
+    def setUp(self):
+        super(TestIterResources, self).setUp()
+        self.client = hosts_client.ReservableHostsClient(
+            mock.Mock(), "reservation", "regionOne"
+        )
+
+    def test_follows_marker_pagination(self):
+        pages = {
+            None: _hosts(0, 2),
+            "1": _hosts(2, 4),
+            "3": _hosts(4, 5),
+        }
+        requested = []
+
+        def fake_get(url, chunked=False):
+            requested.append(url)
+            marker = None
+            if "marker=" in url:
+                marker = url.split("marker=")[1]
+            return FakeStreamedResponse({"hosts": pages[marker]}), b""
+
+        self.patchobject(self.client, "get", side_effect=fake_get)
+        hosts = list(self.client.iter_hosts(limit=2))
+
+        self.assertEqual(_hosts(0, 5), hosts)
+        self.assertEqual(
+            ["/os-hosts?limit=2", "/os-hosts?limit=2&marker=1", "/os-hosts?limit=2&marker=3"],
+            requested,
+        )
+
+    def test_server_ignoring_pagination(self):
+        responses = []
+
+        def fake_get(url, chunked=False):
+            responses.append(FakeStreamedResponse({"hosts": _hosts(0, 2)}))
+            return responses[-1], b""
+
+        self.patchobject(self.client, "get", side_effect=fake_get)
+        self.assertEqual(_hosts(0, 2), list(self.client.iter_hosts(limit=2)))
+        self.assertEqual(2, len(responses))
+        self.assertTrue(all(r.released for r in responses))
+
+
+class FakeResponse(dict):
+    def __init__(self, status=200, **headers):
+        super(FakeResponse, self).__init__(headers)
+        self.status = status
+
+
+class TestResponseCache(base.TestCase):
+    def setUp(self):
+        super(TestResponseCache, self).setUp()
+        self.client = hosts_client.ReservableHostsClient(
+            mock.Mock(), "reservation", "regionOne", response_cache=True
+        )
+        self.get = self.patchobject(self.client, "get")
+        self.get.return_value = (
+            FakeResponse(etag='"v1"'),
+            json.dumps({"host": {"id": "1"}}),
+        )
+
+    def test_show_is_cached(self):
+        first = self.client.show_host("1")
+        second = self.client.show_host("1")
+
+        self.assertIs(first, second)
+        self.assertEqual(1, self.get.call_count)
+        self.assertEqual(1, self.client.response_cache.stats["hits"])
+        self.assertEqual(1, self.client.response_cache.stats["misses"])
+
+    def test_allocations_are_not_cached(self):
+        self.get.return_value = (FakeResponse(), json.dumps({"allocations": []}))
+        self.client.list_host_allocations()
+        self.client.list_host_allocations()
+        self.assertEqual(2, self.get.call_count)
+
+    def test_stale_entry_is_revalidated(self):
+        self.client.show_host("1")
+        for entry in self.client.response_cache._entries.values():
+            entry.expires_at = 0
+
+        self.get.return_value = (FakeResponse(status=304), b"")
+        self.assertEqual({"id": "1"}, self.client.show_host("1")["host"])
+        self.assertEqual(
+            {"If-None-Match": '"v1"'}, self.get.call_args.kwargs["headers"]
+        )
+        self.assertEqual(1, self.client.response_cache.stats["revalidations"])
+
+    def test_writes_invalidate_overlapping_entries(self):
+        self.client.show_host("1")
+        self.patchobject(
+            self.client, "put", return_value=(FakeResponse(), json.dumps({}))
+        )
+        self.client.update_resource("/os-hosts/1", {})
+
+        self.client.show_host("1")
+        self.assertEqual(2, self.get.call_count)
+
+
+class TestSingleFlight(base.TestCase):
+    def test_concurrent_gets_share_one_request(self):
+        client = hosts_client.ReservableHostsClient(
+            mock.Mock(), "reservation", "regionOne"
+        )
+        release = threading.Event()
+
+        def slow_get(url):
+            release.wait(5)
+            return FakeResponse(), json.dumps({"host": {"id": "1"}})
+
+        get = self.patchobject(client, "get", side_effect=slow_get)
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(client.show_host("1")))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(1, get.call_count)
+        self.assertEqual(5, len(results))
+        self.assertTrue(all(r is results[0] for r in results))
+
+    def test_different_keys_are_not_coalesced(self):
+        single_flight = client_base.SingleFlight()
+        self.assertEqual("a", single_flight.do(("GET", "token-a"), lambda: "a"))
+        self.assertEqual("b", single_flight.do(("GET", "token-b"), lambda: "b"))
+
+    def test_async_callers_share_one_call(self):
+        single_flight = client_base.SingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {"lease": {}}
+
+        async def main():
+            return await asyncio.gather(
+                *(single_flight.do_async("key", fetch) for _ in range(5))
+            )
+
+        results = asyncio.run(main())
+        self.assertEqual(1, len(calls))
+        self.assertTrue(all(r is results[0] for r in results))
+
+
+class TestAsyncClients(base.TestCase):
+    def setUp(self):
+        super(TestAsyncClients, self).setUp()
+        if async_base.aiohttp is None:
+            self.skipTest("aiohttp is not installed")
+
+    def test_same_methods_and_return_shapes(self):
+        from aiohttp import web
+
+        leases = {}
+
+        async def create_lease(request):
+            lease = dict(await request.json(), id=str(len(leases)), status="PENDING")
+            leases[lease["id"]] = lease
+            return web.json_response({"lease": lease}, status=201)
+
+        async def list_leases(request):
+            return web.json_response({"leases": list(leases.values())})
+
+        async def show_lease(request):
+            lease = leases.get(request.match_info["lease_id"])
+            if lease is None:
+                return web.json_response({"error_message": "not found"}, status=404)
+            return web.json_response({"lease": lease})
+
+        async def main():
+            app = web.Application()
+            app.router.add_post("/leases", create_lease)
+            app.router.add_get("/leases", list_leases)
+            app.router.add_get("/leases/{lease_id}", show_lease)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            site = web.TCPSite(runner, "127.0.0.1", 0)
+            await site.start()
+            port = runner.addresses[0][1]
+
+            client = async_clients.AsyncLeasesClient(
+                FakeAuthProvider("http://127.0.0.1:%d" % port),
+                "reservation",
+                "regionOne",
+            )
+            try:
+                async with client:
+                    created = await asyncio.gather(
+                        *(client.create_lease(name="lease-%d" % i) for i in range(20))
+                    )
+                    shown = await asyncio.gather(
+                        *(client.show_lease(c["lease"]["id"]) for c in created)
+                    )
+                    listed = await client.list_leases()
+                    iterated = [lease async for lease in client.iter_leases(limit=0)]
+                    not_found = None
+                    try:
+                        await client.show_lease("missing")
+                    except Exception as ex:
+                        not_found = ex
+            finally:
+                await runner.cleanup()
+            return created, shown, listed, iterated, not_found
+
+        created, shown, listed, iterated, not_found = asyncio.run(main())
+
+        self.assertEqual(201, created[0].response.status)
+        self.assertEqual(
+            [c["lease"]["id"] for c in created], [s["lease"]["id"] for s in shown]
+        )
+        self.assertEqual(20, len(listed["leases"]))
+        self.assertEqual(listed["leases"], iterated)
+        self.assertIsInstance(not_found, lib_exc.NotFound)
+
+
+    def test_token_is_fetched_once_off_the_loop(self):
+        from aiohttp import web
+
+        class ExpiringAuthProvider(FakeAuthProvider):
+            cache = None
+            fetch_threads = []
+
+            def is_expired(self, cache):
+                return False
+
+            def get_auth(self):
+                if self.cache is None:
+                    self.fetch_threads.append(threading.get_ident())
+                    time.sleep(0.05)
+                    self.cache = ("fake-token", {})
+                return self.cache
+
+        async def list_leases(request):
+            return web.json_response({"leases": []})
+
+        async def main():
+            app = web.Application()
+            app.router.add_get("/leases", list_leases)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            site = web.TCPSite(runner, "127.0.0.1", 0)
+            await site.start()
+            port = runner.addresses[0][1]
+            provider = ExpiringAuthProvider("http://127.0.0.1:%d" % port)
+            client = async_clients.AsyncLeasesClient(
+                provider, "reservation", "regionOne"
+            )
+            try:
+                async with client:
+                    await asyncio.gather(
+                        *(client.request_async("GET", "/leases") for _ in range(10))
+                    )
+            finally:
+                await runner.cleanup()
+            return provider, threading.get_ident()
+
+        provider, loop_thread = asyncio.run(main())
+        self.assertEqual(1, len(provider.fetch_threads))
+        self.assertNotEqual(loop_thread, provider.fetch_threads[0])
+
+
+class _KeepAliveHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = json.dumps({"leases": []}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestSharedConnectionPool(base.TestCase):
+    def test_clients_share_keepalive_connections(self):
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        pool.reset_pool_stats()
+
+        auth_provider = FakeAuthProvider("http://127.0.0.1:%d" % server.server_port)
+        clients = [
+            leases_client.LeasesClient(
+                auth_provider, "reservation", "regionOne", connection_keepalive=True
+            )
+            for _ in range(3)
+        ]
+        self.assertIs(clients[0].http_obj, clients[2].http_obj)
+
+        for client in clients:
+            for _ in range(3):
+                self.assertEqual([], client.list_leases()["leases"])
+
+        stats = pool.get_pool_stats()["http://127.0.0.1:%d" % server.server_port]
+        self.assertEqual(9, stats["requests"])
+        self.assertEqual(1, stats["connections"])
+        self.assertAlmostEqual(8 / 9, stats["reuse_ratio"])
+
+
+def _json_response(status, body, **headers):
+    headers.setdefault("content-type", "application/json")
+    return FakeResponse(status=status, **headers), json.dumps(body)
+
+
+class TestRetryPolicy(base.TestCase):
+    def setUp(self):
+        super(TestRetryPolicy, self).setUp()
+        self.sleep = self.patchobject(client_base.time, "sleep")
+        retry.reset_retry_stats()
+        context.set_current_test("test-retries")
+        self.addCleanup(context.set_current_test, None)
+
+    def _client(self, **kwargs):
+        client = leases_client.LeasesClient(
+            FakeAuthProvider("http://blazar.%s" % self.id()),
+            "reservation",
+            "regionOne",
+            **kwargs,
+        )
+        return client, self.patchobject(client, "_request")
+
+    def test_idempotent_requests_are_retried(self):
+        client, request = self._client(retry_attempts=3, retry_max_delay=5)
+        request.side_effect = [
+            _json_response(503, {}, **{"retry-after": "7"}),
+            _json_response(500, {"error_message": "boom"}),
+            _json_response(200, {"lease": {"id": "1"}}),
+        ]
+
+        self.assertEqual("1", client.show_lease("1")["lease"]["id"])
+        self.assertEqual(3, request.call_count)
+        delays = [call.args[0] for call in self.sleep.call_args_list]
+        self.assertEqual(7, delays[0])
+        self.assertTrue(1 <= delays[1] <= 5)
+
+        stats = retry.get_retry_stats("test-retries")
+        self.assertEqual(2, stats["retries"])
+        self.assertEqual(sum(delays), stats["retry_wait"])
+
+    def test_post_and_client_errors_are_not_retried(self):
+        client, request = self._client(retry_attempts=3)
+        request.return_value = _json_response(503, {})
+        self.assertRaises(
+            lib_exc.UnexpectedResponseCode, client.create_lease, name="lease"
+        )
+        request.return_value = _json_response(404, {})
+        self.assertRaises(lib_exc.NotFound, client.show_lease, "1")
+        self.assertEqual(2, request.call_count)
+
+    def test_circuit_breaker_opens_and_recovers(self):
+        client, request = self._client(
+            circuit_breaker_threshold=2, circuit_breaker_reset_timeout=30
+        )
+        breaker = client.circuit_breaker
+        now = [0]
+        breaker.clock = lambda: now[0]
+
+        request.return_value = _json_response(502, {})
+        for _ in range(2):
+            self.assertRaises(lib_exc.UnexpectedResponseCode, client.list_leases)
+        self.assertRaises(exceptions.CircuitOpenException, client.list_leases)
+        self.assertEqual(2, request.call_count)
+
+        now[0] = 31
+        request.return_value = _json_response(200, {"leases": []})
+        self.assertEqual([], client.list_leases()["leases"])
+        self.assertEqual(breaker.CLOSED, breaker.state)
+
+        stats = retry.get_retry_stats("test-retries")
+        self.assertEqual(1, stats["breaker_trips"])
+        self.assertEqual(1, stats["breaker_rejections"])
+
+    def test_lease_conflicts_do_not_open_the_circuit_breaker(self):
+        client, request = self._client(circuit_breaker_threshold=2)
+        # blazar's answer to a lease that cannot get its hardware
+        request.return_value = _json_response(500, {"error_message": "Not enough"})
+        for _ in range(3):
+            self.assertRaises(
+                lib_exc.ServerFault, client.create_lease, name="lease"
+            )
+        request.return_value = _json_response(503, {})
+        for _ in range(3):
+            self.assertRaises(
+                lib_exc.UnexpectedResponseCode, client.create_lease, name="lease"
+            )
+        self.assertEqual(client.circuit_breaker.CLOSED, client.circuit_breaker.state)
+
+
+class TestRateLimiter(base.TestCase):
+    def setUp(self):
+        super(TestRateLimiter, self).setUp()
+        self.lock_dir = self.useFixture(fixtures.TempDir()).path
+        self.now = [1000.0]
+
+    def _bucket(self, rate, burst=None):
+        return ratelimit.FileTokenBucket(
+            self.lock_dir + "/bucket", rate, burst, clock=lambda: self.now[0]
+        )
+
+    def test_buckets_on_the_same_file_share_tokens(self):
+        # two instances stand in for two worker processes
+        first, second = self._bucket(2, burst=2), self._bucket(2, burst=2)
+
+        self.assertEqual(0, first.reserve())
+        self.assertEqual(0, second.reserve())
+        self.assertEqual(0.5, first.reserve())
+        self.assertEqual(1.0, second.reserve())
+
+        self.now[0] += 10
+        self.assertEqual(0, first.reserve())
+
+    def test_specific_limits_apply_to_matching_requests(self):
+        limiter = ratelimit.RateLimiter(
+            "http://blazar",
+            rate=100,
+            limits={"POST": "1", "/os-hosts": "1"},
+            lock_dir=self.lock_dir,
+        )
+        for bucket in limiter._buckets.values():
+            bucket.clock = lambda: self.now[0]
+
+        for _ in range(3):
+            self.assertEqual(0, limiter.reserve("GET", "/leases?limit=1"))
+        self.assertEqual(0, limiter.reserve("post", "/leases"))
+        self.assertEqual(1, limiter.reserve("POST", "/leases"))
+        self.assertEqual(0, limiter.reserve("GET", "/os-hosts/1/allocation"))
+        self.assertEqual(1, limiter.reserve("GET", "/os-hosts"))
+
+    def test_no_limits_configured(self):
+        self.assertIsNone(ratelimit.get_rate_limiter("http://blazar", rate=0))
+        self.assertIsNone(
+            ratelimit.get_rate_limiter("http://blazar", limits={"POST": "0"})
+        )
+
+
+class TestTracing(base.TestCase):
+    def setUp(self):
+        super(TestTracing, self).setUp()
+        self.patchobject(client_base.time, "sleep")
+        self.trace_file = self.useFixture(fixtures.TempDir()).path + "/trace.jsonl"
+        self.addCleanup(tracing.configure, None)
+        context.set_current_test("test-tracing")
+        self.addCleanup(context.set_current_test, None)
+
+    def _spans(self):
+        with open(self.trace_file) as f:
+            return [json.loads(line) for line in f]
+
+    def _client(self, **kwargs):
+        client = leases_client.LeasesClient(
+            FakeAuthProvider("http://blazar.%s" % self.id()),
+            "reservation",
+            "regionOne",
+            trace_file=self.trace_file,
+            **kwargs,
+        )
+        return client, self.patchobject(client, "_request")
+
+    def test_request_span_covers_retries(self):
+        client, request = self._client(retry_attempts=2)
+        request.side_effect = [
+            _json_response(503, {}),
+            _json_response(
+                200, {"lease": {"id": "1"}}, **{"x-openstack-request-id": "req-1"}
+            ),
+        ]
+        client.show_lease("1")
+
+        [span] = self._spans()
+        self.assertEqual("GET /leases/%s", span["name"])
+        self.assertEqual("client", span["kind"])
+        self.assertEqual(tracing.trace_id_for("test-tracing"), span["trace_id"])
+        self.assertEqual("test-tracing", span["test_id"])
+        self.assertEqual("OK", span["status"])
+        attributes = span["attributes"]
+        self.assertEqual(1, attributes["retries"])
+        self.assertEqual(200, attributes["http.status_code"])
+        self.assertEqual("req-1", attributes["openstack.request_id"])
+        self.assertEqual("/leases/1", attributes["http.target"])
+
+    def test_wait_span_is_parent_of_polls(self):
+        client, request = self._client()
+        request.side_effect = [
+            _json_response(200, {"lease": {"id": "1", "status": "PENDING"}}),
+            _json_response(200, {"lease": {"id": "1", "status": "ACTIVE"}}),
+        ]
+        self.patchobject(tracing.time, "sleep")
+        waiters.wait_for_lease_status(client, "1", "ACTIVE")
+
+        polls = [s for s in self._spans() if s["kind"] == "client"]
+        [wait] = [s for s in self._spans() if s["kind"] == "internal"]
+        self.assertEqual("wait_for_lease_status", wait["name"])
+        self.assertEqual("1", wait["attributes"]["lease_id"])
+        self.assertEqual(1, wait["attributes"]["sleeps"])
+        self.assertEqual(2, len(polls))
+        for poll in polls:
+            self.assertEqual(wait["span_id"], poll["parent_span_id"])
+            self.assertEqual(wait["trace_id"], poll["trace_id"])
+
+    def test_otlp_format(self):
+        client, request = self._client(trace_format="otlp")
+        request.return_value = _json_response(404, {})
+        self.assertRaises(lib_exc.NotFound, client.show_lease, "1")
+
+        [document] = self._spans()
+        [span] = document["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        self.assertEqual("GET /leases/%s", span["name"])
+        self.assertEqual(tracing.KIND_CLIENT, span["kind"])
+        self.assertEqual(2, span["status"]["code"])
+        attributes = {a["key"]: a["value"] for a in span["attributes"]}
+        self.assertEqual({"intValue": "404"}, attributes["http.status_code"])
+        self.assertEqual({"stringValue": "test-tracing"}, attributes["test.id"])
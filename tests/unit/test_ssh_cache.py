@@ -0,0 +1,69 @@
+from unittest import mock
+
+from tempest.lib.common import ssh
+from tempest.tests import base
+
+from blazar_tempest_plugin.common import ssh_cache
+
+
+class TestConnectionCache(base.TestCase):
+    def setUp(self):
+        super(TestConnectionCache, self).setUp()
+        self.connections = []
+
+        def connect(client, *args, **kwargs):
+            connection = mock.Mock()
+            connection.get_transport.return_value.is_active.return_value = True
+            self.connections.append(connection)
+            return connection
+
+        self.patchobject(ssh.Client, "_get_ssh_connection", autospec=True,
+                         side_effect=connect)
+        self.cache = ssh_cache.ConnectionCache(keepalive_interval=10)
+
+    def _client(self, host="192.0.2.1", username="cc", password="secret"):
+        return ssh_cache.CachedSSHClient.from_client(
+            ssh.Client(host, username, password=password), self.cache
+        )
+
+    def test_connection_is_shared(self):
+        first = self._client()._get_ssh_connection()
+        first.close()
+        self._client()._get_ssh_connection().get_transport().open_session()
+        self._client(username="root")._get_ssh_connection()
+
+        self.assertEqual(2, len(self.connections))
+        self.connections[0].close.assert_not_called()
+        self.connections[0].get_transport().open_session.assert_called_once_with(timeout=10.0)
+        self.connections[0].get_transport().set_keepalive.assert_called_once_with(10)
+        self.assertEqual(
+            {"connections": 2, "handshakes": 2, "reconnects": 0, "reuses": 1},
+            self.cache.stats(),
+        )
+
+    def test_dead_connection_is_replaced(self):
+        client = self._client()
+        client._get_ssh_connection()
+        self.connections[0].get_transport().is_active.return_value = False
+
+        client._get_ssh_connection().get_transport().open_session()
+        self.assertEqual(2, len(self.connections))
+        self.connections[0].close.assert_called_once_with()
+        self.connections[1].get_transport().open_session.assert_called_once_with(timeout=10.0)
+        self.assertEqual(1, self.cache.stats()["reconnects"])
+
+    def test_channel_is_retried_on_a_new_connection(self):
+        transport = self._client()._get_ssh_connection().get_transport()
+        self.connections[0].get_transport().open_session.side_effect = EOFError
+
+        channel = transport.open_session()
+        self.assertEqual(2, len(self.connections))
+        self.assertIs(self.connections[1].get_transport().open_session.return_value,
+                      channel)
+
+    def test_discard(self):
+        self._client()._get_ssh_connection()
+        self.cache.discard("192.0.2.1")
+        self.connections[0].close.assert_called_once_with()
+        self._client()._get_ssh_connection()
+        self.assertEqual(2, len(self.connections))
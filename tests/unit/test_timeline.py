@@ -0,0 +1,114 @@
+import socket
+
+import fixtures
+from tempest.tests import base
+
+from blazar_tempest_plugin.common import timeline
+from blazar_tempest_plugin.tools import timeline as timeline_tool
+
+
+class FakeClient(object):
+    """Return scripted responses, repeating the last one."""
+
+    def __init__(self, **responses):
+        self.responses = {name: list(values) for name, values in responses.items()}
+
+    def __getattr__(self, name):
+        values = self.responses[name]
+
+        def call(*args, **kwargs):
+            return values.pop(0) if len(values) > 1 else values[0]
+
+        return call
+
+
+class FakeClients(object):
+    def __init__(self, servers, ports, floatingips):
+        self.servers_client = FakeClient(
+            list_servers=[{"servers": [{"id": "server-1"}]}],
+            show_server=[{"server": server} for server in servers],
+        )
+        self.ports_client = FakeClient(list_ports=[{"ports": p} for p in ports])
+        self.floating_ips_client = FakeClient(
+            list_floatingips=[{"floatingips": f} for f in floatingips]
+        )
+
+
+class TestTimeline(base.TestCase):
+    def setUp(self):
+        super(TestTimeline, self).setUp()
+        self.now = [100.0]
+        self.timeline = timeline.Timeline("test-a", clock=lambda: self.now[0])
+        self.addCleanup(timeline._finished.clear)
+
+    def _at(self, seconds, event, **details):
+        self.now[0] = 100 + seconds
+        self.timeline.mark(event, **details)
+
+    def test_phases_from_first_events(self):
+        self._at(0, "lease_created")
+        self._at(30, "lease_active")
+        self._at(31, "server_created")
+        self._at(90, "server_spawning")
+        self._at(600, "server_active")
+        self._at(700, "server_active")
+        self._at(650, "ssh_port_open")
+        self._at(655, "ssh_login")
+
+        phases = self.timeline.phases()
+        self.assertEqual(30, phases["lease_activation"])
+        self.assertEqual(59, phases["scheduling"])
+        self.assertEqual(510, phases["deploy"])
+        self.assertEqual(50, phases["ssh_port_open"])
+        self.assertEqual(624, phases["server_provisioning"])
+        self.assertNotIn("port_activation", phases)
+
+    def test_finish_appends_and_summarizes(self):
+        path = self.useFixture(fixtures.TempDir()).path + "/timeline.jsonl"
+        self._at(0, "lease_created")
+        self._at(10, "lease_active")
+        self.timeline.finish(path)
+
+        other = timeline.Timeline("test-b", clock=lambda: self.now[0])
+        other.mark("lease_created", at=0)
+        other.mark("lease_active", at=40)
+        other.finish(path)
+
+        records = timeline.load(path)
+        self.assertEqual(["test-a", "test-b"], [r["test_id"] for r in records])
+        summary = timeline.summarize(records)["lease_activation"]
+        self.assertEqual(2, summary["count"])
+        self.assertEqual(25, summary["mean"])
+        self.assertEqual(40, summary["max"])
+        self.assertEqual("test-b", summary["slowest_test"])
+        self.assertEqual(0, timeline_tool.main([path]))
+
+    def test_observer_records_server_transitions(self):
+        listener = socket.socket()
+        listener.bind(("127.0.0.1", 0))
+        listener.listen(1)
+        self.addCleanup(listener.close)
+
+        clients = FakeClients(
+            servers=[
+                {"status": "BUILD", "OS-EXT-STS:task_state": "scheduling"},
+                {"status": "BUILD", "OS-EXT-STS:task_state": "spawning"},
+                {"status": "ACTIVE", "OS-EXT-STS:task_state": None},
+            ],
+            ports=[[{"id": "port-1", "status": "DOWN"}],
+                   [{"id": "port-1", "status": "ACTIVE"}]],
+            floatingips=[[], [{"floating_ip_address": "127.0.0.1"}]],
+        )
+        observer = timeline.ProvisioningObserver(
+            self.timeline, clients, "server", ssh_port=listener.getsockname()[1]
+        )
+
+        self.assertFalse(observer.poll())
+        self.assertFalse(observer.poll())
+        self.assertTrue(observer.poll())
+
+        events = [e["event"] for e in self.timeline.events]
+        self.assertEqual(3, events.count("server_state"))
+        for event in ("server_spawning", "server_active", "port_active",
+                      "floating_ip_associated", "ssh_port_open"):
+            self.assertIn(event, events)
@@ -0,0 +1,200 @@
+from tempest.lib import exceptions as lib_exc
+from tempest.tests import base
+
+from blazar_tempest_plugin.common import exceptions as blazar_exceptions
+from blazar_tempest_plugin.common import polling
+from blazar_tempest_plugin.common import tracing
+from blazar_tempest_plugin.common import waiters
+
+
+class FakeLeasesClient(object):
+    """Leases client returning a scripted sequence of lease listings."""
+
+    build_interval = 0
+    build_timeout = 5
+
+    def __init__(self, snapshots):
+        self.snapshots = list(snapshots)
+        self.list_calls = 0
+
+    def list_leases(self):
+        self.list_calls += 1
+        if len(self.snapshots) > 1:
+            leases = self.snapshots.pop(0)
+        else:
+            leases = self.snapshots[0]
+        return {"leases": leases}
+
+
+def _lease(lease_id, status):
+    return {"id": lease_id, "status": status}
+
+
+class TestLeaseWatcher(base.TestCase):
+    def test_many_leases_share_list_calls(self):
+        client = FakeLeasesClient(
+            [
+                [_lease("a", "PENDING"), _lease("b", "PENDING")],
+                [_lease("a", "ACTIVE"), _lease("b", "PENDING")],
+                [_lease("a", "ACTIVE"), _lease("b", "ACTIVE")],
+            ]
+        )
+        watcher = waiters.LeaseWatcher(client, interval=0)
+        future_a = watcher.watch("a", "ACTIVE")
+        future_b = watcher.watch("b", ["ACTIVE", "TERMINATED"])
+
+        self.assertEqual("ACTIVE", future_a.result(timeout=5)["status"])
+        self.assertEqual("ACTIVE", future_b.result(timeout=5)["status"])
+        self.assertLessEqual(client.list_calls, 3)
+
+    def test_error_status_fails_future(self):
+        client = FakeLeasesClient([[_lease("a", "ERROR")]])
+        watcher = waiters.LeaseWatcher(client)
+
+        self.assertRaises(
+            blazar_exceptions.LeaseErrorException,
+            watcher.wait_for_lease_status,
+            "a",
+            "ACTIVE",
+        )
+
+    def test_missing_lease_is_not_found(self):
+        client = FakeLeasesClient([[]])
+        watcher = waiters.LeaseWatcher(client)
+
+        self.assertRaises(
+            lib_exc.NotFound, watcher.wait_for_lease_status, "a", "ACTIVE"
+        )
+
+    def test_timeout(self):
+        client = FakeLeasesClient([[_lease("a", "PENDING")]])
+        watcher = waiters.LeaseWatcher(client, interval=0.01)
+
+        self.assertIsNone(watcher.wait_for_lease_status("a", "ACTIVE", timeout=0.1))
+
+    def test_failed_poll_does_not_stop_the_watcher(self):
+        client = FakeLeasesClient([[_lease("a", "ACTIVE")]])
+        watcher = waiters.LeaseWatcher(client, interval=0)
+        real_poll = watcher.poll
+        polls = []
+
+        def poll():
+            polls.append(1)
+            if len(polls) == 1:
+                raise RuntimeError("boom")
+            real_poll()
+
+        self.patchobject(watcher, "poll", side_effect=poll)
+        self.assertEqual(
+            "ACTIVE", watcher.wait_for_lease_status("a", "ACTIVE", timeout=5)["status"]
+        )
+
+    def test_cancelled_future_is_skipped_on_list_error(self):
+        client = FakeLeasesClient([[]])
+        client.list_leases = lambda: (_ for _ in ()).throw(lib_exc.ServerFault())
+        watcher = waiters.LeaseWatcher(client)
+        with watcher._lock:
+            # keep the thread from polling before the future is cancelled
+            watcher._thread = object()
+        future = watcher.watch("a", "ACTIVE")
+        other = watcher.watch("b", "ACTIVE")
+        future.cancel()
+
+        watcher.poll()
+        self.assertRaises(lib_exc.ServerFault, other.result, 0)
+
+    def test_shared_watcher_per_client(self):
+        client = FakeLeasesClient([[]])
+        self.assertIs(
+            waiters.get_lease_watcher(client), waiters.get_lease_watcher(client)
+        )
+
+
+class FakeClock(object):
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestLeasePollSchedule(base.TestCase):
+    START = 1_000_000.0
+
+    def _schedule(self, clock, status="ACTIVE"):
+        lease = {
+            "start_date": "1970-01-12T13:46:40.000000",
+            "end_date": "1970-01-12T14:46:40.000000",
+        }
+        return polling.LeasePollSchedule(
+            lease,
+            status,
+            min_interval=2,
+            max_interval=60,
+            lead_time=5,
+            transition_window=30,
+            jitter=0,
+            clock=clock,
+        )
+
+    def test_parse_lease_date_is_utc(self):
+        self.assertEqual(
+            self.START, polling.parse_lease_date("1970-01-12T13:46:40.000000")
+        )
+
+    def test_sleeps_until_shortly_before_start(self):
+        clock = FakeClock(self.START - 600)
+        self.assertEqual(595, self._schedule(clock).next_interval())
+
+    def test_polls_tightly_around_transition(self):
+        clock = FakeClock(self.START + 10)
+        self.assertEqual(2, self._schedule(clock).next_interval())
+
+    def test_backs_off_after_transition_window(self):
+        clock = FakeClock(self.START + 31)
+        schedule = self._schedule(clock)
+        intervals = [schedule.next_interval() for _ in range(7)]
+        self.assertEqual([2, 4, 8, 16, 32, 60, 60], intervals)
+
+    def test_terminated_uses_end_date(self):
+        clock = FakeClock(self.START + 100)
+        self.assertEqual(
+            3600 - 100 - 5,
+            self._schedule(clock, status="TERMINATED").next_interval(),
+        )
+
+
+class TestLeasesTermination(base.TestCase):
+    def test_waits_until_gone_or_terminated(self):
+        client = FakeLeasesClient(
+            [
+                [_lease("a", "TERMINATING"), _lease("b", "ACTIVE")],
+                [_lease("b", "TERMINATED")],
+            ]
+        )
+        sleep = self.patchobject(tracing, "sleep")
+        waiters.wait_for_leases_termination(client, {"a", "b", "c"})
+        self.assertEqual(2, client.list_calls)
+        # counted on the span of the wait
+        sleep.assert_called_once_with(client.build_interval)
+
+    def test_errors_and_timeouts_are_aggregated(self):
+        client = FakeLeasesClient(
+            [[_lease("a", "ERROR"), _lease("b", "TERMINATING"), _lease("c", "ACTIVE")]]
+        )
+        client.build_timeout = 0
+
+        exc = self.assertRaises(
+            blazar_exceptions.LeasesTerminationException,
+            waiters.wait_for_leases_termination,
+            client,
+            ["a", "b", "c"],
+        )
+        self.assertIn("3 lease(s)", str(exc))
+        self.assertIn("lease a failed to delete", str(exc))
+        self.assertIn("lease b timed out in status TERMINATING", str(exc))
+
+    def test_single_lease_termination_uses_show_lease(self):
+        client = FakeLeasesClient([[]])
+        client.show_lease = lambda lease_id: {"lease": _lease(lease_id, "TERMINATED")}
+        waiters.wait_for_lease_termination(client, "a")